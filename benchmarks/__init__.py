@@ -0,0 +1 @@
+"""性能测试脚本，在仓库根目录下用 python -m benchmarks.xxx 运行"""
@@ -0,0 +1,25 @@
+"""流光溢彩四边采样耗时（1080p与4K输入）
+
+用法：python -m benchmarks.bench_ambilight
+"""
+import timeit
+
+import numpy as np
+
+from ledcore.ambilight import EdgeSampler
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'分辨率':>10} {'灯珠布局':>22} {'每帧(ms)':>10}")
+    for w, h in ((1920, 1080), (3840, 2160)):
+        frame = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        for layout in ((15, 25, 15, 20), (49, 49, 49, 49), (120, 200, 120, 200)):
+            sampler = EdgeSampler(*layout)
+            n = 200
+            t = timeit.timeit(lambda: sampler.sample(frame), number=n) / n
+            print(f"{f'{w}x{h}':>10} {str(layout):>22} {t * 1e3:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
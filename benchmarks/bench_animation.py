@@ -0,0 +1,50 @@
+"""动画与帧率无关的验证及小数偏移插值的耗时
+
+对每个确定性的颜色模式，分别以 20/60/100 FPS 渲染到同一时刻，检查最后一帧完全相同；
+再比较整数偏移（两次切片拷贝）与小数偏移（插值）每帧的耗时。
+
+用法：python -m benchmarks.bench_animation
+"""
+import timeit
+
+import numpy as np
+
+from ledcore import effects, render
+from ledcore.devices import OutputDevice
+
+FRAME_RATES = (20, 60, 100)
+
+
+def frame_at(color_mode, fps, t_end=2.0, total_len=76):
+    device = OutputDevice({'D1': total_len, 'D2': 0, 'D3': 0, 'D4': 0,
+                           'color_mode': color_mode, 'waterfall_speed': 3})
+    last = None
+    for i in range(int(t_end * fps) + 1):
+        packet = device.render_frame(i / fps)
+        last = packet.copy()
+        device.pool.release(packet)
+    return last
+
+
+def main():
+    print("同一时刻不同帧率的画面是否一致：")
+    for color_mode, cls in enumerate(effects.EFFECTS):
+        if cls in (effects.TwinkleEffect, effects.FireEffect):
+            continue  # 随机效果只保证统计上一致
+        frames = [frame_at(color_mode, fps) for fps in FRAME_RATES]
+        same = all(np.array_equal(frames[0], f) for f in frames[1:])
+        print(f"  {cls.label:<8} {'一致' if same else '不一致'}")
+
+    print(f"\n{'灯珠数':>6} {'整数偏移(us)':>14} {'小数偏移(us)':>14}")
+    for total_len in (76, 1000, 4000):
+        palette = render.waterfall_colors(total_len, 0, render.MODE_RAINBOW, [255, 0, 0])
+        scratch = render.new_scratch(palette)
+        out = render.new_frame(total_len)
+        n = 2000
+        whole = timeit.timeit(lambda: render.shift_into(out, palette, 17, scratch), number=n) / n
+        frac = timeit.timeit(lambda: render.shift_into(out, palette, 17.4, scratch), number=n) / n
+        print(f"{total_len:>6} {whole * 1e6:>14.1f} {frac * 1e6:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
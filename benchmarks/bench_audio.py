@@ -0,0 +1,93 @@
+"""音乐律动：各音频块大小下的分析耗时与端到端延迟
+
+先生成一段扫频测试音（WAV），对每种块大小：
+1. 不限速地连续分析，得到每块的FFT+分频带耗时；
+2. 按实际时长播放该WAV，在无界面引擎中以音乐律动模式运行，串口用按波特率
+   限速的 FakeSerial 代替，统计从音频块采集完成到串口写完的延迟。
+总延迟约为“块时长（凑满一块的缓冲）+ 块到串口写完”，据此选择块大小。
+
+用法：python -m benchmarks.bench_audio [--seconds 3] [--leds 76] [--baudrate 115200]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from ledcore import effects
+from ledcore.audio import BandAnalyzer, WavSource
+from ledcore.engine import Engine
+from ledcore.fake_serial import FakeSerial
+
+BLOCK_SIZES = (256, 512, 1024, 2048, 4096)
+SAMPLE_RATE = 44100
+
+
+def write_sweep(path, seconds):
+    """40Hz~16kHz 对数扫频，每秒一个来回"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    phase = np.cumsum(40 * 400 ** np.abs((t % 1.0) * 2 - 1) / SAMPLE_RATE)
+    samples = (0.5 * np.sin(2 * np.pi * phase) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+
+
+def analysis_time(path, block_size, blocks=200):
+    source = WavSource(path, realtime=False)
+    analyzer = BandAnalyzer(block_size, source.sample_rate)
+    data = [source.read(block_size) for _ in range(blocks)]
+    source.close()
+    start = time.perf_counter()
+    for samples in data:
+        analyzer.analyze(samples)
+    return (time.perf_counter() - start) / blocks
+
+
+def end_to_end(path, block_size, seconds, leds, baudrate, directory):
+    config_path = os.path.join(directory, f'config-{block_size}.json')
+    side = leds // 4
+    audio_mode = next(i for i, cls in enumerate(effects.EFFECTS) if cls.audio_reactive)
+    with open(config_path, 'w') as f:
+        json.dump({'audio_source': path, 'audio_block': block_size,
+                   'devices': [{'port': 'fake', 'baudrate': baudrate, 'color_mode': audio_mode,
+                                'D1': side, 'D2': side, 'D3': side, 'D4': leds - 3 * side}]}, f)
+    engine = Engine(config_path, FakeSerial)
+    engine.load_config()
+    engine.open_device(engine.primary)
+    engine.run(seconds)
+    state = engine.state()
+    engine.close()
+    return state['audio'], state['metrics']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=3.0, help="每种块大小的运行时长")
+    parser.add_argument('--leds', type=int, default=76)
+    parser.add_argument('--baudrate', type=int, default=115200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sweep.wav')
+        write_sweep(path, 4.0)
+        print(f"{args.leds} 颗灯珠，波特率 {args.baudrate}\n")
+        print(f"{'块大小':>6} {'块时长(ms)':>10} {'分析(ms)':>9} {'帧率':>6} "
+              f"{'块到写完p50':>11} {'p95':>7} {'总延迟p50':>9} {'未用块':>6}")
+        for block_size in BLOCK_SIZES:
+            analysis = analysis_time(path, block_size)
+            audio, metrics = end_to_end(path, block_size, args.seconds, args.leds,
+                                        args.baudrate, directory)
+            latency = metrics['latency_ms']
+            print(f"{block_size:>6} {audio['block_ms']:>10.1f} {analysis * 1000:>9.3f} "
+                  f"{metrics['fps']:>6.1f} {latency['p50']:>11.1f} {latency['p95']:>7.1f} "
+                  f"{audio['block_ms'] + latency['p50']:>9.1f} {audio['skipped']:>6}")
+
+
+if __name__ == '__main__':
+    main()
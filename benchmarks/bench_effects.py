@@ -0,0 +1,49 @@
+"""各灯效每帧渲染耗时与内存分配
+
+灯效每帧不应分配与灯珠数成正比的内存：峰值分配超过 MAX_ALLOC 字节
+（小于4000颗灯珠一帧的大小）时以返回码1退出。
+
+用法：python -m benchmarks.bench_effects
+"""
+import sys
+import timeit
+import tracemalloc
+
+from ledcore import effects, render
+
+MAX_ALLOC = 1024
+
+
+def main():
+    color = [255, 128, 0]
+    failures = []
+    print(f"{'灯效':<8} {'灯珠数':>6} {'每帧(us)':>10} {'峰值分配(B)':>12}")
+    for cls in effects.EFFECTS:
+        for total_len in (76, 1000, 4000):
+            effect = cls()
+            effect.setup(total_len)
+            out = render.new_frame(total_len)
+            frame = [0]
+
+            def step():
+                frame[0] += 1
+                effect.render(out, frame[0] * 0.02, frame[0], color)
+
+            step()
+            n = 2000
+            t = timeit.timeit(step, number=n) / n
+            tracemalloc.start()
+            for _ in range(100):
+                step()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{cls.label:<8} {total_len:>6} {t * 1e6:>10.1f} {peak:>12}")
+            if peak > MAX_ALLOC:
+                failures.append(f"{cls.label} {total_len} 颗灯珠: 每帧峰值分配 {peak} 字节")
+    if failures:
+        print(f"\n每帧峰值分配超过 {MAX_ALLOC} 字节：\n" + '\n'.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
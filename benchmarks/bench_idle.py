@@ -0,0 +1,124 @@
+"""空闲检测：输出不变时与逐帧重发相比的CPU唤醒次数和占用
+
+无界面引擎在以下场景各运行若干秒，串口用按波特率限速的 FakeSerial 代替：
+    单色-空闲    单色模式，输出不变，只按 idle_keepalive 重发
+    单色-逐帧    单色模式，idle_keepalive 为0（原来的做法：每帧重新渲染发送相同的数据）
+    彩虹         有动画的效果，每帧都在变化
+统计进程所有线程每秒的上下文切换次数（Linux 的 /proc，近似CPU唤醒次数）、
+CPU占用和每秒写串口次数；最后在空闲中修改颜色，测量到新颜色开始写串口的延迟。
+
+用法：python -m benchmarks.bench_idle [--seconds 5] [--leds 76] [--baudrate 115200]
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+from ledcore import effects
+from ledcore.engine import Engine
+from ledcore.fake_serial import FakeSerial
+
+SOLID_MODE = next(i for i, cls in enumerate(effects.EFFECTS) if not cls.animated)
+
+
+def context_switches():
+    """当前进程所有线程的上下文切换次数之和，不支持时返回 None"""
+    total = 0
+    paths = glob.glob(f'/proc/{os.getpid()}/task/*/status')
+    if not paths:
+        return None
+    for path in paths:
+        try:
+            with open(path) as f:
+                for line in f:
+                    # voluntary_ctxt_switches 与 nonvoluntary_ctxt_switches
+                    if 'ctxt_switches' in line:
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def make_engine(directory, name, color_mode, keepalive, leds, baudrate):
+    config_path = os.path.join(directory, f'{name}.json')
+    side = leds // 4
+    with open(config_path, 'w') as f:
+        json.dump({'idle_keepalive': keepalive,
+                   'devices': [{'port': 'fake', 'baudrate': baudrate, 'color_mode': color_mode,
+                                'D1': side, 'D2': side, 'D3': side, 'D4': leds - 3 * side}]}, f)
+    engine = Engine(config_path, FakeSerial)
+    engine.load_config()
+    engine.open_device(engine.primary)
+    return engine
+
+
+def measure(engine, seconds):
+    """运行 seconds 秒，返回 (每秒上下文切换, CPU占用%, 每秒写串口次数)"""
+    engine.tick()  # 先发出第一帧并进入稳定状态
+    time.sleep(0.2)
+    switches, cpu, writes = context_switches(), time.process_time(), engine.primary.writer.ser.writes
+    start = time.monotonic()
+    engine.run(seconds)
+    elapsed = time.monotonic() - start
+    cpu = time.process_time() - cpu
+    writes = engine.primary.writer.ser.writes - writes
+    if switches is not None:
+        switches = (context_switches() - switches) / elapsed
+    return switches, cpu / elapsed * 100, writes / elapsed
+
+
+def wake_latency(engine, changes=5):
+    """空闲中（在其他线程）修改颜色，返回从修改到新帧开始写串口的延迟（毫秒）列表"""
+    ser = engine.primary.writer.ser
+    colors = [[0, 255, 0], [0, 0, 255]]
+    latencies = []
+    runner = threading.Thread(target=engine.run, daemon=True)
+    runner.start()
+    for i in range(changes):
+        time.sleep(0.3)
+        writes = ser.writes
+        start = time.monotonic()
+        color = colors[i % 2]
+        engine.call_soon(lambda: engine.apply_settings({'custom_color': color}))
+        while ser.writes == writes and time.monotonic() - start < 2:
+            time.sleep(0.0005)
+        latencies.append((time.monotonic() - start) * 1000)
+    engine.stop()
+    runner.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5.0, help="每个场景的运行时长")
+    parser.add_argument('--leds', type=int, default=76)
+    parser.add_argument('--baudrate', type=int, default=115200)
+    args = parser.parse_args()
+
+    scenarios = (
+        ("单色-空闲", SOLID_MODE, 1.0),
+        ("单色-逐帧", SOLID_MODE, 0),
+        ("彩虹", 0, 1.0),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{args.leds} 颗灯珠，波特率 {args.baudrate}，每个场景 {args.seconds:.0f} 秒\n")
+        print(f"{'场景':<10} {'唤醒/秒':>8} {'CPU(%)':>7} {'写串口/秒':>9}")
+        for name, color_mode, keepalive in scenarios:
+            engine = make_engine(directory, name, color_mode, keepalive, args.leds, args.baudrate)
+            switches, cpu, writes = measure(engine, args.seconds)
+            engine.close()
+            switches = f"{switches:>8.1f}" if switches is not None else f"{'-':>8}"
+            print(f"{name:<10} {switches} {cpu:>7.2f} {writes:>9.1f}")
+
+        engine = make_engine(directory, 'wake', SOLID_MODE, 1.0, args.leds, args.baudrate)
+        engine.tick()
+        latencies = wake_latency(engine)
+        engine.close()
+        print("\n空闲中修改颜色到开始写串口：" + '、'.join(f"{ms:.1f}" for ms in latencies) + " ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""局域网控制接口回环测试：HTTP修改设置 + 高速DDP推流
+
+在本机启动无界面引擎（串口用 fake_serial.FakeDevice 代替），客户端通过
+127.0.0.1 调用 HTTP 接口并以尽可能高的速率推送DDP帧，再间隔发送最后一帧，最后检查：
+控制器上解码出的画面等于最后推送的一帧（不一致时以返回码1退出），接收缓冲没有随推送速率增长。
+
+用法：python -m benchmarks.bench_netapi [--frames 2000] [--leds 300]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from ledcore import render
+from ledcore.engine import Engine
+from ledcore.fake_serial import FakeDevice
+from ledcore.netapi import NetworkServer
+from ledcore.stream import ddp_packets
+
+
+def request(address, method, path, body=None):
+    conn = http.client.HTTPConnection(*address, timeout=5)
+    try:
+        conn.request(method, path, body=body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--leds', type=int, default=300)
+    parser.add_argument('--baudrate', type=int, default=2000000)
+    args = parser.parse_args()
+
+    fakes = []
+
+    def fake_serial():
+        fakes.append(FakeDevice(caps=0))
+        return fakes[-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.json')
+        side = args.leds // 4
+        with open(config_path, 'w') as f:
+            json.dump({'devices': [{'port': 'loop', 'baudrate': args.baudrate, 'D1': side, 'D2': side,
+                                    'D3': side, 'D4': args.leds - 3 * side}]}, f)
+
+        engine = Engine(config_path, fake_serial)
+        engine.load_config()
+        engine.open_device(engine.primary)
+        engine.network = NetworkServer(engine, '127.0.0.1', http_port=0, ddp_port=0)
+        engine.network.start()
+        runner = threading.Thread(target=engine.run, daemon=True)
+        runner.start()
+
+        http_address = engine.network.http_address
+        status, state = request(http_address, 'POST', '/api/settings',
+                                json.dumps({'color_mode': 1, 'custom_color': [0, 0, 255]}))
+        assert status == 200 and state['devices'][0]['color_mode'] == 1, state
+        status, error = request(http_address, 'POST', '/api/settings', json.dumps({'bogus': 1}))
+        assert status == 400, error
+        print("HTTP 接口: 修改设置成功，无效设置返回 400")
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        rng = np.random.default_rng(0)
+        frames = rng.integers(0, 256, size=(16, args.leds, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        for i in range(args.frames):
+            for packet in ddp_packets(frames[i % len(frames)], sequence=i):
+                sock.sendto(packet, engine.network.ddp_address)
+        elapsed = time.perf_counter() - start
+
+        # 本机连续发送时大部分UDP包会被丢弃，最后一帧间隔发送，确保控制器收到
+        time.sleep(0.05)
+        last = rng.integers(0, 256, size=(args.leds, 3), dtype=np.uint8)
+        for packet in ddp_packets(last, sequence=args.frames):
+            sock.sendto(packet, engine.network.ddp_address)
+            time.sleep(0.002)
+        time.sleep(0.3)
+
+        status, state = request(http_address, 'GET', '/api/state')
+        engine.stop()
+        runner.join()
+        engine.close()
+
+    stream = state['stream']
+    sent_serial = fakes[0].decoder.frames
+    expected = np.ascontiguousarray(last[:, render.GRB_ORDER])
+    match = np.array_equal(fakes[0].decoder.pixels, expected)
+    print(f"推送 {args.frames} 帧，用时 {elapsed:.2f}s（{args.frames / elapsed:.0f} 帧/秒，"
+          f"{args.leds} 颗灯珠）")
+    print(f"接收 {stream['frames']} 帧（UDP丢包 {args.frames - stream['frames']}），"
+          f"合并未发送 {stream['dropped']}，串口发送 {sent_serial} 帧")
+    print(f"控制器画面与最后一帧一致: {match}")
+    if not match:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""输出级（颜色校正 + 电流限制）的开销
+
+对比三种配置每帧写入数据包的耗时：默认参数（直接按颜色顺序写入）、伽马/亮度查找表、
+查找表 + 电流限制（全白帧，每帧都会触发压暗）；并检查默认参数时输出与 write_pixels
+逐字节相同、限流后估算电流不超过预算、每帧没有新的内存分配。
+
+用法：python -m benchmarks.bench_output_stage
+"""
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from ledcore import render
+from ledcore.output_stage import DEFAULT_LED_CURRENT, OutputStage
+
+SIZES = (76, 300, 1000, 4000, 65535)
+
+CONFIGS = (
+    ('默认', dict(), 0.0),
+    ('查找表', dict(gamma=2.2, brightness=0.8, gain=(1.0, 0.9, 0.7)), 0.0),
+    ('查找表+限流', dict(gamma=2.2, brightness=0.8, gain=(1.0, 0.9, 0.7)), 2.0),
+)
+
+
+def check_identity(total_len=300):
+    rgb = np.random.default_rng(1).integers(0, 256, (total_len, 3), dtype=np.uint8)
+    expected = render.new_packet(total_len)
+    render.write_pixels(expected, rgb, render.channel_order('GRB'))
+    stage = OutputStage()
+    stage.configure('GRB')
+    packet = stage.apply(render.new_packet(total_len), rgb)
+    return np.array_equal(packet, expected)
+
+
+def check_limit(total_len=300, max_current=2.0):
+    rgb = np.full((total_len, 3), 255, dtype=np.uint8)
+    stage = OutputStage()
+    stage.configure('GRB')
+    packet = stage.apply(render.new_packet(total_len), rgb, max_current)
+    after = int(packet[render.HEADER_LEN:].sum()) / (255 * 3) * DEFAULT_LED_CURRENT
+    return stage.current, after
+
+
+def alloc_peak(stage, packet, rgb, max_current):
+    stage.apply(packet, rgb, max_current)
+    tracemalloc.start()
+    for _ in range(20):
+        stage.apply(packet, rgb, max_current)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    print(f"默认参数输出与 write_pixels 相同: {'是' if check_identity() else '否'}")
+    before, after = check_limit()
+    print(f"300颗全白限流2A: 估算 {before:.2f}A -> {after:.2f}A\n")
+
+    print(f"{'灯珠数':>6} " + ' '.join(f"{name + '(us)':>14}" for name, _, _ in CONFIGS)
+          + f" {'峰值分配(B)':>12}")
+    rng = np.random.default_rng(0)
+    for total_len in SIZES:
+        rgb = rng.integers(0, 256, (total_len, 3), dtype=np.uint8)
+        white = np.full((total_len, 3), 255, dtype=np.uint8)
+        packet = render.new_packet(total_len)
+        n = max(20, 200000 // total_len)
+        times = []
+        peak = 0
+        for _, params, max_current in CONFIGS:
+            stage = OutputStage()
+            stage.configure('GRB', **params)
+            frame = white if max_current else rgb
+            times.append(timeit.timeit(lambda: stage.apply(packet, frame, max_current), number=n) / n)
+            peak = max(peak, alloc_peak(stage, packet, frame, max_current))
+        print(f"{total_len:>6} " + ' '.join(f"{t * 1e6:>14.1f}" for t in times) + f" {peak:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""压缩协议与原协议的字节数对比，并用参考解码器校验还原结果
+
+走设备的实际渲染路径（OutputDevice.render_frame，按时间计算流水偏移量），
+扩展协议的能力直接设置到设备的编码器上，相当于协商完成。
+
+用法：python -m benchmarks.bench_protocol
+"""
+import numpy as np
+
+from ledcore import effects, protocol, render
+from ledcore.devices import OutputDevice
+from ledcore.fake_serial import FakeDevice
+
+FPS = 50
+SECONDS = 10
+
+
+def run(effect_index, total_len, caps):
+    """按 FPS 渲染 SECONDS 秒，返回 (每秒字节数, 编码统计)"""
+    output = OutputDevice({'D1': total_len, 'D2': 0, 'D3': 0, 'D4': 0,
+                           'color_mode': effect_index, 'delta_protocol': True})
+    encoder = output.writer.encoder
+    encoder.reset(caps)
+    device = FakeDevice(caps)
+    device.open()
+    sent = 0
+    for frame in range(FPS * SECONDS):
+        packet = output.render_frame(frame / FPS)
+        data = encoder.encode(packet)
+        if data is not None:
+            device.write(data)
+            sent += len(data)
+        if not np.array_equal(device.decoder.pixels, render.packet_pixels(packet)):
+            raise AssertionError(f"解码结果不一致: 效果={effect_index} 第{frame}帧")
+        output.pool.release(packet)
+    return sent / SECONDS, encoder.stats
+
+
+def main():
+    print(f"{'灯效':<8} {'灯珠数':>6} {'原协议(B/s)':>12} {'扩展(B/s)':>10} {'节省':>7}  编码统计")
+    for index, cls in enumerate(effects.EFFECTS):
+        for total_len in (76, 1000):
+            legacy, _ = run(index, total_len, 0)
+            delta, stats = run(index, total_len, protocol.CAP_ALL)
+            saving = 1 - delta / legacy
+            print(f"{cls.label:<8} {total_len:>6} {legacy:>12.0f} {delta:>10.0f} {saving:>7.1%}  {stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""对比原逐像素循环、向量化渲染与调色板缓存的速度，并校验输出字节一致
+
+用法：python -m benchmarks.bench_render
+"""
+import timeit
+
+import numpy as np
+
+from ledcore import render
+
+
+def legacy_frame(total_len, waterfall_offset, color_mode, custom_color):
+    """原 ShotAndSendThread 中的逐像素循环，作为对照"""
+    sendrgb = np.zeros((total_len + 1) * 3, dtype=np.uint8)
+    sendrgb[0] = 0x28
+    sendrgb[1] = total_len // 256
+    sendrgb[2] = total_len % 256
+    for i in range(total_len):
+        offset = (i + waterfall_offset) % total_len
+        if color_mode == 0:
+            r = int(255 * (1 + np.sin(np.pi * 2 * offset / total_len)) / 2)
+            g = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len + 1/3))) / 2)
+            b = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len + 2/3))) / 2)
+        elif color_mode == 1:
+            r, g, b = custom_color
+        else:
+            r = int(255 * (1 + np.sin(np.pi * 2 * offset / total_len * 2)) / 2)
+            g = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len * 3 + 0.5))) / 2)
+            b = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len * 4 + 1))) / 2)
+        sendrgb[3 + i*3] = g
+        sendrgb[3 + i*3 + 1] = r
+        sendrgb[3 + i*3 + 2] = b
+    return sendrgb
+
+
+def vector_frame(total_len, waterfall_offset, color_mode, custom_color):
+    sendrgb = render.new_packet(total_len)
+    rgb = render.waterfall_colors(total_len, waterfall_offset, color_mode, custom_color)
+    render.write_pixels(sendrgb, rgb)
+    return sendrgb
+
+
+_cache = render.PaletteCache()
+
+
+def cached_frame(total_len, waterfall_offset, color_mode, custom_color):
+    sendrgb = render.new_packet(total_len)
+    rgb = np.empty((total_len, 3), dtype=np.uint8)
+    _cache.rotate_into(rgb, total_len, waterfall_offset, color_mode, custom_color)
+    render.write_pixels(sendrgb, rgb)
+    return sendrgb
+
+
+def check_identical(max_len=196):
+    """逐个长度、偏移和模式比较各实现的输出"""
+    color = [255, 0, 0]
+    for total_len in range(1, max_len + 1):
+        for mode in (0, 1, 2):
+            for offset in range(total_len):
+                a = legacy_frame(total_len, offset, mode, color)
+                b = vector_frame(total_len, offset, mode, color)
+                c = cached_frame(total_len, offset, mode, color)
+                if not (np.array_equal(a, b) and np.array_equal(a, c)):
+                    raise AssertionError(f"输出不一致: len={total_len} mode={mode} offset={offset}")
+
+
+def main():
+    check_identical()
+    print("输出校验通过（长度1~196，全部偏移与模式）")
+    print(f"{'灯珠数':>6} {'模式':>4} {'循环(ms)':>10} {'向量化(ms)':>11} {'调色板(ms)':>11} {'加速比':>7}")
+    color = [255, 0, 0]
+    for total_len in (4, 61, 196, 1000, 4000):
+        for mode in (0, 1, 2):
+            n = max(3, 20000 // total_len)
+            t_old = timeit.timeit(lambda: legacy_frame(total_len, 7, mode, color), number=n) / n
+            t_new = timeit.timeit(lambda: vector_frame(total_len, 7, mode, color), number=n * 10) / (n * 10)
+            t_pal = timeit.timeit(lambda: cached_frame(total_len, 7, mode, color), number=n * 10) / (n * 10)
+            print(f"{total_len:>6} {mode:>4} {t_old * 1e3:>10.3f} {t_new * 1e3:>11.4f} {t_pal * 1e3:>11.4f}"
+                  f" {t_old / t_pal:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""放映文件回放与实时渲染的每帧开销对比
+
+对几种颜色模式和灯珠数，先离线渲染一段放映文件，再比较实时渲染一帧
+（灯效 + 输出级）与回放一帧（定位映射区中的帧并切出数据包）的耗时；
+最后写一个较大的放映文件，检查打开时不会读入整个文件，顺序访问时常驻内存中
+只有映射的文件页面（干净的文件页，内存紧张时系统可以直接回收）。
+
+用法：python -m benchmarks.bench_show [--minutes 10]
+"""
+import argparse
+import os
+import resource
+import tempfile
+import timeit
+
+from ledcore import effects
+from ledcore.devices import OutputDevice
+from ledcore.show import ShowFile, ShowPlayer, render_show
+
+SIZES = (76, 1000, 4000)
+MODES = (0, 4, 6)  # 彩虹色渐变、流星追逐、火焰
+
+
+class ManualClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_frame_cost(directory):
+    print(f"{'颜色模式':<10} {'灯珠数':>6} {'实时渲染(us)':>14} {'回放(us)':>10}")
+    for color_mode in MODES:
+        for total_len in SIZES:
+            device = OutputDevice({'D1': total_len, 'D2': 0, 'D3': 0, 'D4': 0,
+                                   'color_mode': color_mode, 'gamma': 2.2})
+            path = os.path.join(directory, f"{color_mode}-{total_len}.show")
+            render_show([device], path, 10, 30)
+
+            frame_no = 0
+
+            def live():
+                nonlocal frame_no
+                frame_no += 1
+                device.pool.release(device.render_frame(frame_no / 30))
+
+            clock = ManualClock()
+            player = ShowPlayer([path], clock=clock)
+
+            def playback():
+                clock.t += 1 / 30
+                player.frame()
+
+            n = 300
+            live_time = timeit.timeit(live, number=n) / n
+            play_time = timeit.timeit(playback, number=n) / n
+            player.close()
+            print(f"{effects.EFFECTS[color_mode].label:<10} {total_len:>6} "
+                  f"{live_time * 1e6:>14.1f} {play_time * 1e6:>10.1f}")
+
+
+def bench_long_show(directory, minutes):
+    total_len = 1000
+    device = OutputDevice({'D1': total_len, 'D2': 0, 'D3': 0, 'D4': 0, 'color_mode': 0})
+    path = os.path.join(directory, 'long.show')
+    render_show([device], path, minutes * 60, 30)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+
+    before = rss_mb()
+    show = ShowFile(path)
+    opened = rss_mb()
+    checksum = 0
+    for i in range(0, show.frame_count, 30):
+        checksum += int(show.packets(i)[0][3])
+    show.close()
+    print(f"\n{minutes}分钟放映文件 {size_mb:.0f}MB：打开后常驻内存 +{opened - before:.1f}MB，"
+          f"每秒抽一帧顺序访问后峰值 +{rss_mb() - before:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=float, default=10, help="大文件测试的放映时长")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        bench_frame_cost(directory)
+        bench_long_show(directory, args.minutes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""启动耗时与内存：无界面引擎 vs Kivy界面
+
+每种方式在独立的子进程中冷启动，按 ledcore.startup 的阶段记录耗时：
+导入、加载配置、打开串口、首帧、首包（第一帧数据包已交给串口），Kivy界面
+另记完整界面创建完成的时刻；同时记录子进程的峰值常驻内存。
+串口用 FakeSerial 代替，配置为上次连接过串口的状态。Kivy界面一项调用
+build() 和 build_widgets()（不创建窗口），未安装Kivy时跳过。
+
+用法：python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ledcore.startup import STAGES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS = """
+import json, sys, time
+from ledcore.startup import StartupTimer
+startup = StartupTimer()
+from ledcore.engine import Engine
+from ledcore.fake_serial import FakeSerial
+startup.mark('import')
+engine = Engine(sys.argv[1], FakeSerial, startup=startup)
+engine.load_config()
+engine.open_saved_ports()
+engine.tick()
+engine.close()
+import resource
+print(json.dumps({'stages': startup.to_dict(),
+                  'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+KIVY_UI = """
+import json, os, sys
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+import main
+from ledcore.fake_serial import FakeSerial
+main.CONFIG_FILE = sys.argv[1]
+main.default_serial_factory = lambda: FakeSerial
+app = main.LEDControlApp()
+app.build()
+app.build_widgets(0)
+app.engine.close()
+import resource
+print(json.dumps({'stages': main.STARTUP.to_dict(),
+                  'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def write_config(path):
+    """上次连接过串口的配置，启动时直接打开并发出第一帧"""
+    with open(path, 'w') as f:
+        json.dump({'devices': [{'port': 'fake', 'D1': 19, 'D2': 19, 'D3': 19, 'D4': 19}]}, f)
+
+
+def measure(code, config_path, runs):
+    """运行 runs 次，返回各阶段耗时、进程总耗时（ms）和峰值内存（MB）的中位数，失败时返回 None"""
+    stages, process, rss = {}, [], []
+    for _ in range(runs):
+        wall = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code, config_path], cwd=ROOT,
+                                capture_output=True, text=True)
+        wall = time.perf_counter() - wall
+        if result.returncode != 0:
+            return None
+        data = json.loads(result.stdout.splitlines()[-1])
+        for stage, ms in data['stages'].items():
+            stages.setdefault(stage, []).append(ms)
+        process.append(wall * 1000)
+        rss.append(data['maxrss'] / 1024)  # Linux 下 ru_maxrss 单位为KB
+    result = {stage: statistics.median(stages[stage]) for stage, _ in STAGES if stage in stages}
+    result['process_ms'] = statistics.median(process)
+    result['max_rss_mb'] = statistics.median(rss)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="输出JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.json')
+        write_config(config_path)
+        results = {
+            'headless': measure(HEADLESS, config_path, args.runs),
+            'kivy_ui': measure(KIVY_UI, config_path, args.runs),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    labels = [(stage, label) for stage, label in STAGES if stage != 'network']
+    print(f"{'方式':<10} " + ' '.join(f"{label + '(ms)':>10}" for _, label in labels)
+          + f" {'进程总耗时(ms)':>14} {'峰值内存(MB)':>12}")
+    for name, r in results.items():
+        if r is None:
+            print(f"{name:<10} {'(不可用)':>10}")
+            continue
+        print(f"{name:<10} " + ' '.join(f"{r[stage]:>10.1f}" if stage in r else f"{'-':>10}"
+                                        for stage, _ in labels)
+              + f" {r['process_ms']:>14.1f} {r['max_rss_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
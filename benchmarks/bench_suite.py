@@ -0,0 +1,207 @@
+"""基准测试套件：各颜色模式 × 灯珠数的渲染性能，以及模拟串口下的端到端帧率
+
+render：每种颜色模式在4~数千颗灯珠下完整渲染一帧（灯效 + 按颜色顺序写入数据包）
+的耗时、帧率和 tracemalloc 峰值分配。
+serial：用 FakeSerial 按波特率限速并注入写入卡顿，运行真实的设备/发送线程/帧调度，
+统计实际发送帧率、丢帧和写入错误。
+
+用法：
+    python -m benchmarks.bench_suite [--quick] [--json results.json]
+    python -m benchmarks.bench_suite --compare baseline.json [--tolerance 0.25]
+与基线相比有指标变差超过 tolerance 时以返回码1退出，便于在CI中发现性能退化。
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from ledcore import effects, pacing
+from ledcore.devices import DeviceManager, OutputDevice
+from ledcore.fake_serial import FakeSerial
+from ledcore.metrics import FrameMetrics
+
+SIZES = (4, 16, 76, 300, 1000, 4000)
+QUICK_SIZES = (4, 76, 1000)
+
+# (名称, 波特率, 灯珠数, 每N次写入卡顿一次, 卡顿秒数)
+SERIAL_SCENARIOS = (
+    ('115200-76', 115200, 76, 0, 0.0),
+    ('1M-300', 1000000, 300, 0, 0.0),
+    ('1M-1000', 1000000, 1000, 0, 0.0),
+    ('115200-76-stall', 115200, 76, 20, 0.1),
+    ('115200-76-timeout', 115200, 76, 10, 0.8),
+)
+
+
+def bench_render(color_mode, total_len, min_time):
+    """完整渲染一帧的耗时"""
+    device = OutputDevice({'D1': total_len, 'D2': 0, 'D3': 0, 'D4': 0, 'color_mode': color_mode})
+    frame_no = 0
+
+    def step():
+        nonlocal frame_no
+        frame_no += 1
+        device.pool.release(device.render_frame(frame_no * 0.02))
+
+    for _ in range(20):
+        step()
+
+    frames = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(50):
+            step()
+        frames += 50
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    tracemalloc.start()
+    for _ in range(50):
+        step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    frame_time = elapsed / frames
+    return {
+        'suite': 'render',
+        'name': f"{color_mode}-{total_len}",
+        'effect': effects.EFFECTS[color_mode].label,
+        'color_mode': color_mode,
+        'leds': total_len,
+        'frame_us': frame_time * 1e6,
+        'fps': 1.0 / frame_time,
+        'alloc_peak_bytes': peak,
+    }
+
+
+def bench_serial(name, baudrate, total_len, stall_every, stall_time, duration):
+    """FakeSerial 上的端到端发送"""
+    fakes = []
+
+    def fake_serial():
+        fakes.append(FakeSerial(stall_every=stall_every, stall_time=stall_time))
+        return fakes[-1]
+
+    metrics = FrameMetrics()
+    manager = DeviceManager(fake_serial, metrics=metrics)
+    manager.load([{'D1': total_len, 'D2': 0, 'D3': 0, 'D4': 0, 'baudrate': baudrate}])
+    device = manager.primary
+    device.open('fake')
+    pacer = pacing.FramePacer()
+
+    rendered = 0
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        frame_start = time.monotonic()
+        links = manager.render_all(frame_start - start)
+        rendered += 1
+        time.sleep(pacer.next_delay_for(links, time.monotonic() - frame_start))
+    elapsed = time.monotonic() - start
+    write_ms = metrics.snapshot()['write_ms']
+    # 长帧分块写入，按写完的帧数而不是 write() 调用次数统计
+    sent = device.writer.frames_written
+    manager.stop()
+
+    fake = fakes[0]
+    max_fps = pacing.max_fps(total_len * 3 + 3, baudrate)
+    return {
+        'suite': 'serial',
+        'name': name,
+        'baudrate': baudrate,
+        'leds': total_len,
+        'rendered': rendered,
+        'sent': sent,
+        'fps_sent': sent / elapsed,
+        'max_fps': max_fps,
+        'efficiency': sent / elapsed / max_fps,
+        'dropped': device.writer.dropped,
+        'write_errors': metrics.write_errors,
+        'stalls': fake.stalls,
+        'write_p95_ms': write_ms['p95'],
+    }
+
+
+# 各套件用于比较的指标，以及数值变大是否代表变差
+COMPARE_METRICS = {
+    'render': ('frame_us', True),
+    'serial': ('efficiency', False),
+}
+
+
+def compare(results, baseline, tolerance):
+    """返回相对基线变差超过 tolerance 的条目说明"""
+    base = {(r['suite'], r['name']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        old = base.get((r['suite'], r['name']))
+        if old is None:
+            continue
+        key, higher_is_worse = COMPARE_METRICS[r['suite']]
+        if not old[key]:
+            continue
+        change = (r[key] - old[key]) / old[key]
+        if (change if higher_is_worse else -change) > tolerance:
+            regressions.append(f"{r['suite']}/{r['name']}: {key} {old[key]:.3f} -> {r[key]:.3f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true', help="减少灯珠规格和运行时间")
+    parser.add_argument('--json', metavar='PATH', help="结果写入JSON文件（'-' 为标准输出）")
+    parser.add_argument('--compare', metavar='PATH', help="与基线JSON比较")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="允许的相对变差")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    min_time = 0.05 if args.quick else 0.2
+    duration = 0.5 if args.quick else 2.0
+    # 表格输出到 stderr，--json - 时 stdout 只有JSON
+    out = sys.stderr if args.json == '-' else sys.stdout
+
+    results = []
+    print(f"{'颜色模式':<10} {'灯珠数':>6} {'每帧(us)':>10} {'帧率':>10} {'峰值分配(B)':>12}", file=out)
+    for color_mode in range(len(effects.EFFECTS)):
+        for total_len in sizes:
+            r = bench_render(color_mode, total_len, min_time)
+            results.append(r)
+            print(f"{r['effect']:<10} {total_len:>6} {r['frame_us']:>10.1f} {r['fps']:>10.0f} "
+                  f"{r['alloc_peak_bytes']:>12}", file=out)
+
+    print(f"\n{'串口场景':<18} {'发送帧率':>8} {'理论上限':>8} {'丢帧':>6} {'写入错误':>8} {'p95(ms)':>8}", file=out)
+    for scenario in SERIAL_SCENARIOS:
+        r = bench_serial(*scenario, duration)
+        results.append(r)
+        print(f"{r['name']:<18} {r['fps_sent']:>8.1f} {r['max_fps']:>8.1f} {r['dropped']:>6} "
+              f"{r['write_errors']:>8} {r['write_p95_ms']:>8.2f}", file=out)
+
+    report = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"性能退化: {line}", file=out)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
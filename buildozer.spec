@@ -22,7 +22,7 @@ source.include_patterns = assets/*,images/*
 source.exclude_exts = spec
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = venv, .git, .idea
+source.exclude_dirs = venv, .git, .idea, benchmarks
 
 # (list) List of exclusions using pattern matching
 source.exclude_patterns = buildozer.spec
@@ -79,7 +79,7 @@ fullscreen = 0
 #android.presplash_color = #FFFFFF
 
 # (list) Permissions
-android.permissions = INTERNET, BLUETOOTH, BLUETOOTH_ADMIN, ACCESS_COARSE_LOCATION, ACCESS_FINE_LOCATION, USB_PERMISSION, WRITE_EXTERNAL_STORAGE, READ_EXTERNAL_STORAGE
+android.permissions = INTERNET, BLUETOOTH, BLUETOOTH_ADMIN, ACCESS_COARSE_LOCATION, ACCESS_FINE_LOCATION, USB_PERMISSION, WRITE_EXTERNAL_STORAGE, READ_EXTERNAL_STORAGE, RECORD_AUDIO
 
 # (list) features (adds uses-feature -tags to manifest)
 android.features = android.hardware.usb.host
@@ -0,0 +1 @@
+"""LED灯条控制核心模块（不依赖Kivy界面）"""
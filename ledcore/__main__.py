@@ -0,0 +1,179 @@
+"""无界面命令行
+
+用法：
+    python -m ledcore run [--config config.json] [--port PORT] [--fps N] [--duration 秒]
+                          [--host 地址] [--api-port 端口] [--ddp-port 端口]
+                          [--show a.show b.show [--no-loop]] [--record out.show]
+                          [--audio mic|-|song.wav] [--audio-block 1024]
+    python -m ledcore show render [--config config.json] --output a.show --duration 秒 [--fps 30]
+    python -m ledcore show info a.show
+    python -m ledcore ports
+    python -m ledcore fps [--leds 76 300 1000] [--baudrate 115200 921600]
+"""
+import time
+
+START = time.perf_counter()
+
+import argparse
+import signal
+import sys
+
+from ledcore.log_buffer import LEVEL_ERROR
+from ledcore.startup import StartupTimer
+
+
+def print_log(message, error_level=0):
+    stream = sys.stderr if error_level == LEVEL_ERROR else sys.stdout
+    print(f"{time.strftime('%H:%M:%S')} {message}", file=stream, flush=True)
+
+
+def cmd_run(args):
+    """加载配置并在前台运行引擎，Ctrl+C 或 SIGTERM 退出"""
+    from ledcore.engine import Engine, default_serial_factory
+
+    startup = StartupTimer(START)
+    startup.mark('import')
+    engine = Engine(args.config, default_serial_factory(),
+                    on_log=None if args.quiet else print_log, startup=startup)
+    engine.load_config()
+    # 命令行指定的设置只用于本次运行，不写回配置文件
+    if args.fps is not None:
+        engine.override('target_fps', args.fps)
+    if args.port:
+        engine.override('port', args.port, engine.primary)
+    if args.audio is not None:
+        engine.override('audio_source', args.audio)
+    if args.audio_block is not None:
+        engine.override('audio_block', args.audio_block)
+    if engine.has_serial:
+        engine.open_saved_ports()
+    elif not args.quiet:
+        print_log("当前平台不支持串口功能，只渲染不发送", LEVEL_ERROR)
+    if args.show:
+        try:
+            engine.play_show(args.show, loop=not args.no_loop)
+        except (OSError, ValueError) as e:
+            print_log(f"放映文件加载失败: {e}", LEVEL_ERROR)
+            engine.close()
+            return 1
+    if args.record:
+        engine.start_recording(args.record, args.record_fps)
+    # 先发出第一帧再启动网络接口（导入 asyncio 较慢）
+    first_delay = engine.tick()
+    engine.start_network(args.host, args.api_port, args.ddp_port)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: engine.stop())
+    if not args.quiet:
+        print_log(f"启动耗时：{startup.report()}（共 {len(engine.devices.devices)} 台设备）")
+    try:
+        engine.run(args.duration, first_delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+        if not args.quiet:
+            print_log(engine.metrics.summary_text())
+    return 0
+
+
+def cmd_show_render(args):
+    """按配置文件中各设备当前的灯效离线渲染放映文件"""
+    from ledcore.config_store import ConfigStore
+    from ledcore.devices import OutputDevice, devices_from_config
+    from ledcore.show import render_show
+
+    config = ConfigStore(args.config).load() or {}
+    devices = [OutputDevice(device_config) for device_config in devices_from_config(config)]
+    start = time.perf_counter()
+    count = render_show(devices, args.output, args.duration, args.fps,
+                        config.get('check_test', True), config.get('check_waterfall', True))
+    print_log(f"已写入 {args.output}：{count} 帧，耗时 {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def cmd_show_info(args):
+    """打印放映文件的布局、帧率和时长"""
+    from ledcore.show import ShowFile
+
+    show = ShowFile(args.file)
+    print(f"帧率 {show.fps:g}，{show.frame_count} 帧，时长 {show.duration:.1f}s，每帧 {show.frame_len} 字节")
+    for item in show.layout:
+        print(f"  {item['name'] or '设备'}: D1~D4={item['D1']}/{item['D2']}/{item['D3']}/{item['D4']}，"
+              f"附加段 {len(item['segments'])} 个，颜色顺序 {item['color_order']}")
+    show.close()
+    return 0
+
+
+def cmd_ports(args):
+    """列出系统串口"""
+    from ledcore.port_discovery import list_serial_ports
+    try:
+        ports = list_serial_ports()
+    except ImportError:
+        print_log("当前平台不支持串口功能", LEVEL_ERROR)
+        return 1
+    for port in ports:
+        print(port)
+    return 0
+
+
+def cmd_fps(args):
+    """打印各灯珠数和波特率下链路能承载的最高帧率"""
+    from ledcore.pacing import max_fps_for_leds
+
+    print(f"{'灯珠数':>8} " + ' '.join(f"{baudrate:>9}" for baudrate in args.baudrate))
+    for leds in args.leds:
+        print(f"{leds:>8} " + ' '.join(f"{max_fps_for_leds(leds, baudrate):>9.1f}"
+                                     for baudrate in args.baudrate))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m ledcore', description="LED灯条控制（无界面）")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="按配置文件驱动灯带")
+    run.add_argument('--config', default='config.json', help="配置文件路径")
+    run.add_argument('--port', help="覆盖第一台设备的串口")
+    run.add_argument('--fps', type=float, help="覆盖目标帧率（0为只受串口速率限制）")
+    run.add_argument('--duration', type=float, help="运行指定秒数后退出")
+    run.add_argument('--host', help="网络接口监听地址（默认取配置文件 api_host）")
+    run.add_argument('--api-port', type=int, help="HTTP控制接口端口，0为不启动")
+    run.add_argument('--ddp-port', type=int, help="DDP帧接收端口（通常为4048），0为不启动")
+    run.add_argument('--show', nargs='+', metavar='FILE', help="按顺序播放放映文件")
+    run.add_argument('--no-loop', action='store_true', help="播放列表播完后恢复实时渲染")
+    run.add_argument('--record', metavar='FILE', help="把发送的画面录制为放映文件")
+    run.add_argument('--record-fps', type=float, default=30, help="录制帧率")
+    run.add_argument('--audio', help="音乐律动的音频来源：mic、-（标准输入16位PCM）或WAV文件")
+    run.add_argument('--audio-block', type=int, help="音频分析块大小（采样点数）")
+    run.add_argument('--quiet', action='store_true', help="不输出日志")
+    run.set_defaults(func=cmd_run)
+
+    show = commands.add_parser('show', help="放映文件")
+    show_commands = show.add_subparsers(dest='show_command', required=True)
+    show_render = show_commands.add_parser('render', help="离线渲染当前灯效")
+    show_render.add_argument('--config', default='config.json', help="配置文件路径")
+    show_render.add_argument('--output', required=True, help="放映文件路径")
+    show_render.add_argument('--duration', type=float, required=True, help="时长（秒）")
+    show_render.add_argument('--fps', type=float, default=30, help="帧率")
+    show_render.set_defaults(func=cmd_show_render)
+    show_info = show_commands.add_parser('info', help="查看放映文件")
+    show_info.add_argument('file')
+    show_info.set_defaults(func=cmd_show_info)
+
+    ports = commands.add_parser('ports', help="列出系统串口")
+    ports.set_defaults(func=cmd_ports)
+
+    fps = commands.add_parser('fps', help="各灯珠数和波特率下的最高帧率")
+    fps.add_argument('--leds', type=int, nargs='+',
+                     default=[76, 150, 300, 600, 1000, 2000, 4000, 10000])
+    fps.add_argument('--baudrate', type=int, nargs='+',
+                     default=[115200, 460800, 921600, 2000000])
+    fps.set_defaults(func=cmd_fps)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
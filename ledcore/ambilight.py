@@ -0,0 +1,254 @@
+"""流光溢彩：从画面四边采样颜色，生成每颗灯珠的RGB值
+
+画面来源可以是屏幕截图、视频文件或图片序列（本地测试用）。
+采样先按固定步长把画面缩小到 work_size 左右（只取视图，不拷贝原图），
+再对四条边做向量化分块平均，耗时与输入分辨率基本无关。
+截图和解码在 CaptureThread 后台线程中进行，渲染循环只取最新的一帧。
+"""
+import glob
+import os
+import threading
+
+import numpy as np
+
+# 可选依赖：视频需要OpenCV，图片和截图需要Pillow
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    cv2 = None
+    HAS_CV2 = False
+
+try:
+    from PIL import Image, ImageGrab
+    HAS_PIL = True
+except ImportError:
+    Image = None
+    ImageGrab = None
+    HAS_PIL = False
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.npy')
+
+
+def load_image(path):
+    """读取图片为 (H, W, 3) uint8 数组，.npy 文件不需要Pillow"""
+    if path.endswith('.npy'):
+        return np.load(path)
+    if not HAS_PIL:
+        raise RuntimeError("读取图片需要安装Pillow")
+    with Image.open(path) as img:
+        return np.asarray(img.convert('RGB'))
+
+
+class ImageSequenceSource:
+    """图片序列画面来源，循环播放
+
+    只有一张图片时解码一次后缓存，文件修改时间变化才重新读取。
+    """
+
+    def __init__(self, paths, loop=True):
+        self.paths = list(paths)
+        self.loop = loop
+        self.index = 0
+        self._cached = None  # (路径, 修改时间, 画面)
+
+    def read(self):
+        if not self.paths:
+            return None
+        if self.index >= len(self.paths):
+            if not self.loop:
+                return None
+            self.index = 0
+        path = self.paths[self.index]
+        self.index += 1
+        if len(self.paths) > 1:
+            return load_image(path)
+        mtime = os.stat(path).st_mtime_ns
+        if self._cached is None or self._cached[:2] != (path, mtime):
+            self._cached = (path, mtime, load_image(path))
+        return self._cached[2]
+
+    def close(self):
+        pass
+
+
+class VideoFileSource:
+    """视频文件画面来源（需要OpenCV），播放到结尾后从头开始"""
+
+    def __init__(self, path, loop=True):
+        if not HAS_CV2:
+            raise RuntimeError("读取视频需要安装opencv-python")
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+
+    def read(self):
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        if not ok:
+            return None
+        return frame[:, :, ::-1]  # BGR转RGB
+
+    def close(self):
+        self.capture.release()
+
+
+class ScreenshotSource:
+    """桌面截图画面来源（需要Pillow，Android上不可用）"""
+
+    def __init__(self):
+        if not HAS_PIL:
+            raise RuntimeError("截图需要安装Pillow")
+
+    def read(self):
+        return np.asarray(ImageGrab.grab().convert('RGB'))
+
+    def close(self):
+        pass
+
+
+def open_source(spec):
+    """按配置创建画面来源
+
+    spec 为 'screen' 时截屏；为目录或通配符时作为图片序列；
+    为图片文件时作为单帧序列；其他文件作为视频。
+    """
+    if spec == 'screen':
+        return ScreenshotSource()
+    if os.path.isdir(spec):
+        paths = sorted(p for p in glob.glob(os.path.join(spec, '*')) if p.lower().endswith(IMAGE_EXTS))
+        return ImageSequenceSource(paths)
+    if any(ch in spec for ch in '*?['):
+        return ImageSequenceSource(sorted(glob.glob(spec)))
+    if spec.lower().endswith(IMAGE_EXTS):
+        return ImageSequenceSource([spec])
+    return VideoFileSource(spec)
+
+
+class CaptureThread:
+    """在后台线程中打开并读取画面来源，渲染循环用 latest() 取最新的一帧
+
+    截图、解码图片和视频都较慢，放在渲染循环（界面主线程）中会卡住界面、打乱帧间隔。
+    与 SerialWriter 一样只保留最新的结果：每次 latest() 取走当前最新帧并请求采集下一帧，
+    采集频率跟随渲染帧率，渲染循环不取帧时不采集。
+    打开或读取出错时记入 error 并结束线程。
+    """
+
+    def __init__(self, open_source_fn):
+        self.error = None
+        self.frames = 0  # 已采集的帧数
+        self._open_source = open_source_fn
+        self._frame = None
+        self._requested = True
+        self._running = True
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='CaptureThread', daemon=True)
+        self._thread.start()
+
+    def latest(self, timeout=0.0):
+        """返回最新采集的一帧（还没有时返回 None），并请求采集下一帧
+
+        timeout 大于0时最多等待这么久直到采集到第一帧（刚打开画面来源时使用）。
+        """
+        with self._cond:
+            if timeout > 0:
+                self._cond.wait_for(lambda: self.frames or self.error is not None
+                                    or not self._running, timeout)
+            self._requested = True
+            self._cond.notify_all()
+            return self._frame
+
+    def _run(self):
+        source = None
+        try:
+            source = self._open_source()
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._requested or not self._running)
+                    if not self._running:
+                        break
+                    self._requested = False
+                frame = source.read()
+                with self._cond:
+                    self._frame = frame
+                    self.frames += 1
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                self.error = e
+                self._cond.notify_all()
+        finally:
+            if source is not None:
+                source.close()
+
+    def close(self):
+        """停止采集线程并关闭画面来源"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+
+def _segment_means(profile, count):
+    """把 (L, 3) 的一维颜色分布平均分成 count 段，返回每段均值 (count, 3)
+
+    用前缀和计算区间平均；count 大于 L 时相邻灯珠取同一像素。
+    """
+    length = len(profile)
+    cumsum = np.zeros((length + 1, 3), dtype=np.float64)
+    np.cumsum(profile, axis=0, out=cumsum[1:])
+    idx = np.arange(count + 1) * length / count
+    start = np.floor(idx[:-1]).astype(np.intp)
+    end = np.maximum(np.ceil(idx[1:]).astype(np.intp), start + 1)
+    end = np.minimum(end, length)
+    start = np.minimum(start, end - 1)
+    return (cumsum[end] - cumsum[start]) / (end - start)[:, None]
+
+
+class EdgeSampler:
+    """四边采样器
+
+    d1..d4 分别是左、上、右、下四边的灯珠数。灯珠按顺时针排列：
+    左边从下到上，上边从左到右，右边从上到下，下边从右到左。
+    depth 为采样带宽度占画面宽/高的比例。
+    """
+
+    def __init__(self, d1, d2, d3, d4, depth=0.1, work_size=(160, 90)):
+        self.counts = (d1, d2, d3, d4)
+        self.depth = depth
+        self.work_size = work_size
+        self.rgb = np.zeros((d1 + d2 + d3 + d4, 3), dtype=np.uint8)
+
+    def downsample(self, frame):
+        """按整数步长缩小画面（返回视图），大边不小于 work_size 和灯珠数"""
+        h, w = frame.shape[:2]
+        d1, d2, d3, d4 = self.counts
+        work_w = max(self.work_size[0], d2, d4)
+        work_h = max(self.work_size[1], d1, d3)
+        sx = max(w // work_w, 1)
+        sy = max(h // work_h, 1)
+        return frame[::sy, ::sx, :3]
+
+    def sample(self, frame):
+        """返回 (灯珠总数, 3) 的uint8 RGB数组（复用同一缓冲区）"""
+        small = self.downsample(frame)
+        h, w = small.shape[:2]
+        bw = max(int(w * self.depth), 1)
+        bh = max(int(h * self.depth), 1)
+        d1, d2, d3, d4 = self.counts
+
+        # 每条边先沿宽度方向平均得到一维分布，再按灯珠数分段平均
+        left = small[:, :bw].mean(axis=1)
+        top = small[:bh, :].mean(axis=0)
+        right = small[:, w - bw:].mean(axis=1)
+        bottom = small[h - bh:, :].mean(axis=0)
+
+        out = self.rgb
+        pos = 0
+        for profile, count in ((left[::-1], d1), (top, d2), (right, d3), (bottom[::-1], d4)):
+            if count:
+                out[pos:pos + count] = _segment_means(profile, count)
+            pos += count
+        return out
@@ -0,0 +1,35 @@
+"""动画时钟：流水偏移量由单调时钟决定，与渲染帧率无关
+
+界面上的流水速度沿用原来的 1~10 档，旧版每帧前进 waterfall_speed 颗灯珠，
+按旧版大约 REFERENCE_FPS 帧/秒换算为“灯珠/秒”，原有配置的观感基本不变。
+"""
+
+# 旧版渲染循环的大致帧率，用于把“每帧灯珠数”换算为“每秒灯珠数”
+REFERENCE_FPS = 30
+
+
+def leds_per_second(waterfall_speed):
+    """流水速度档位对应的每秒移动灯珠数"""
+    return waterfall_speed * REFERENCE_FPS
+
+
+class AnimationClock:
+    """按时间计算流水偏移量（单位为灯珠，可以是小数）
+
+    offset = 速度改变时的偏移量 + 速度 × 此后经过的秒数，
+    同一时刻无论之前渲染了多少帧结果都相同；速度改变时从当前位置继续，不会跳变。
+    """
+
+    def __init__(self):
+        self._speed = None
+        self._base = 0.0
+        self._t0 = 0.0
+
+    def offset(self, t, speed, period):
+        """t 时刻的偏移量，取值范围 [0, period)"""
+        if speed != self._speed:
+            if self._speed is not None:
+                self._base += self._speed * (t - self._t0)
+            self._speed = speed
+            self._t0 = t
+        return (self._base + speed * (t - self._t0)) % period
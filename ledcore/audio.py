@@ -0,0 +1,315 @@
+"""音乐律动：按固定大小的音频块做加窗FFT，得到各频带的能量
+
+音频来源（open_audio_source 的 spec）：
+    'mic'          麦克风（Android 上用 AudioRecord，桌面需要 sounddevice）
+    '-'            标准输入的原始16位小端PCM（如 arecord、ffmpeg 管道输出）
+    WAV 文件路径   本地测试，按实际时长节奏读取，播完从头循环
+分析在 AudioInput 的后台线程中进行，渲染循环只取最新一块的结果（新数据优先，
+不积压），每块记录采集完成的时刻，用于统计从音频块到串口写完的延迟。
+"""
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_BLOCK_SIZE = 1024
+DEFAULT_BANDS = 32
+
+
+class BandAnalyzer:
+    """一块音频 -> 各频带 0~1 的电平
+
+    频带在 fmin~fmax 之间按对数均匀划分，每个频带至少一个FFT频点；
+    电平按分贝计算，自动增益跟随近期峰值，dynamic_range 分贝以下为0。
+    上升立即跟随，下降按 release 秒的时间常数衰减（按音频时长计算，与块大小无关）。
+    """
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, sample_rate=DEFAULT_SAMPLE_RATE,
+                 bands=DEFAULT_BANDS, fmin=40.0, fmax=16000.0, dynamic_range=45.0,
+                 release=0.25, peak_release=10.0):
+        self.block_size = block_size
+        self.sample_rate = sample_rate
+        self.dynamic_range = dynamic_range
+        self.block_time = block_size / sample_rate
+        self._release = np.exp(-self.block_time / release)
+        self._peak_release = dynamic_range * self.block_time / peak_release
+
+        self._window = np.hanning(block_size)
+        self._windowed = np.zeros(block_size, dtype=np.float64)
+        self._power = np.zeros(block_size // 2 + 1, dtype=np.float64)
+        self.edges = band_edges(block_size, sample_rate, bands, fmin, fmax)
+        self._counts = np.diff(self.edges).astype(np.float64)
+        self._db = np.zeros(len(self.edges) - 1, dtype=np.float64)
+        self._peak = -np.inf
+        self.levels = np.zeros(len(self.edges) - 1, dtype=np.float64)
+
+    @property
+    def bands(self):
+        return len(self.levels)
+
+    def analyze(self, samples):
+        """分析一块单声道采样（float，-1~1），返回更新后的 levels"""
+        np.multiply(samples, self._window, out=self._windowed)
+        spectrum = np.fft.rfft(self._windowed)
+        np.multiply(spectrum.real, spectrum.real, out=self._power)
+        self._power += spectrum.imag * spectrum.imag
+        power = self._power[:self.edges[-1]]
+        np.add.reduceat(power, self.edges[:-1], out=self._db)
+        self._db /= self._counts
+        np.log10(self._db + 1e-12, out=self._db)
+        self._db *= 10
+
+        # 自动增益：峰值立即上升，之后缓慢回落
+        self._peak = max(float(self._db.max()), self._peak - self._peak_release)
+        floor = self._peak - self.dynamic_range
+        np.subtract(self._db, floor, out=self._db)
+        self._db /= self.dynamic_range
+        np.clip(self._db, 0.0, 1.0, out=self._db)
+
+        self.levels *= self._release
+        np.maximum(self.levels, self._db, out=self.levels)
+        return self.levels
+
+
+def band_edges(block_size, sample_rate, bands, fmin, fmax):
+    """各频带起止的FFT频点下标（长度 bands + 1，严格递增）"""
+    nbins = block_size // 2 + 1
+    freqs = np.geomspace(fmin, min(fmax, sample_rate / 2), bands + 1)
+    edges = np.rint(freqs * block_size / sample_rate).astype(np.intp)
+    edges[0] = max(edges[0], 1)  # 跳过直流分量
+    for i in range(1, len(edges)):
+        edges[i] = max(edges[i], edges[i - 1] + 1)
+    if edges[-1] > nbins:
+        raise ValueError(f"音频块太小，{block_size} 点无法划分 {bands} 个频带")
+    return edges
+
+
+# ---- 音频来源：read(n) 返回 n 个单声道 float 采样，结束时返回 None ----
+
+def _to_mono(data, sample_width, channels):
+    """PCM 字节 -> 单声道 float64（-1~1）"""
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float64) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype='<i2') / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(data, dtype='<i4') / 2147483648.0
+    else:
+        raise ValueError(f"不支持 {sample_width * 8} 位采样")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+class WavSource:
+    """WAV 文件（本地测试），realtime 为 True 时按实际时长节奏读取"""
+
+    def __init__(self, path, realtime=True, loop=True):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self._wav = wave.open(path, 'rb')
+        if self._wav.getcomptype() != 'NONE':
+            raise ValueError("只支持未压缩的 WAV 文件")
+        self.sample_rate = self._wav.getframerate()
+        self._start = None
+        self._samples = 0
+
+    def read(self, n):
+        data = self._wav.readframes(n)
+        width, channels = self._wav.getsampwidth(), self._wav.getnchannels()
+        if len(data) < n * width * channels:
+            if not self.loop:
+                return None
+            self._wav.rewind()
+            data += self._wav.readframes(n - len(data) // (width * channels))
+            # 文件比一块还短时补静音
+            data += bytes(n * width * channels - len(data))
+        if self.realtime:
+            # 一块音频在它最后一个采样“播放”到时才算采集完成
+            if self._start is None:
+                self._start = time.monotonic()
+            self._samples += n
+            delay = self._start + self._samples / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return _to_mono(data, width, channels)
+
+    def close(self):
+        self._wav.close()
+
+
+class PcmSource:
+    """二进制流中的原始16位小端PCM（默认为标准输入）"""
+
+    def __init__(self, stream=None, sample_rate=DEFAULT_SAMPLE_RATE, channels=1):
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def read(self, n):
+        size = n * 2 * self.channels
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.stream.read(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return _to_mono(bytes(data), 2, self.channels)
+
+    def close(self):
+        pass
+
+
+class MicSource:
+    """麦克风：Android 上通过 pyjnius 使用 AudioRecord，其他平台使用 sounddevice"""
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, block_size=DEFAULT_BLOCK_SIZE):
+        self.sample_rate = sample_rate
+        self._record = None
+        self._stream = None
+        try:
+            from jnius import autoclass
+        except ImportError:
+            autoclass = None
+        if autoclass is not None:
+            AudioRecord = autoclass('android.media.AudioRecord')
+            AudioFormat = autoclass('android.media.AudioFormat')
+            AudioSource = autoclass('android.media.MediaRecorder$AudioSource')
+            channel, encoding = AudioFormat.CHANNEL_IN_MONO, AudioFormat.ENCODING_PCM_16BIT
+            size = max(AudioRecord.getMinBufferSize(sample_rate, channel, encoding), block_size * 2 * 4)
+            self._record = AudioRecord(AudioSource.MIC, sample_rate, channel, encoding, size)
+            if self._record.getState() != AudioRecord.STATE_INITIALIZED:
+                raise OSError("麦克风初始化失败（需要录音权限）")
+            self._record.startRecording()
+            self._buffer = bytearray(block_size * 2)
+            return
+        try:
+            import sounddevice
+        except ImportError:
+            raise ImportError("当前平台不支持麦克风（需要 sounddevice）") from None
+        self._stream = sounddevice.InputStream(samplerate=sample_rate, channels=1, dtype='float32',
+                                               blocksize=block_size)
+        self._stream.start()
+
+    def read(self, n):
+        if self._stream is not None:
+            data, _ = self._stream.read(n)
+            return data[:, 0].astype(np.float64)
+        if len(self._buffer) != n * 2:
+            self._buffer = bytearray(n * 2)
+        # pyjnius 把 bytearray 作为 byte[] 传入，读取后写回原对象；阻塞读取直到凑满一块
+        got = 0
+        while got < len(self._buffer):
+            count = self._record.read(self._buffer, got, len(self._buffer) - got)
+            if count < 0:
+                raise OSError(f"麦克风读取失败: {count}")
+            got += count
+        return _to_mono(bytes(self._buffer), 2, 1)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+        if self._record is not None:
+            self._record.stop()
+            self._record.release()
+
+
+def open_audio_source(spec, sample_rate=DEFAULT_SAMPLE_RATE, block_size=DEFAULT_BLOCK_SIZE):
+    """按配置创建音频来源"""
+    if spec in ('', 'mic'):
+        return MicSource(sample_rate, block_size)
+    if spec == '-':
+        return PcmSource(sample_rate=sample_rate)
+    return WavSource(spec)
+
+
+class AudioInput:
+    """后台线程：读取音频块、分析频带，只保留最新结果
+
+    take() 返回 (levels, stamp)：levels 为最新频带电平的副本（在下次 take() 前有效），
+    stamp 为该块采集完成时的 time.monotonic()，同一块再次取出时为 None（不重复计入延迟）；
+    还没有数据时返回 (None, None)。
+    读取出错或来源结束时线程退出，error 记录原因。
+    """
+
+    def __init__(self, source, block_size=DEFAULT_BLOCK_SIZE, bands=DEFAULT_BANDS):
+        self.source = source
+        self.analyzer = BandAnalyzer(block_size, source.sample_rate, bands)
+        self.block_size = block_size
+        self.blocks = 0
+        self.skipped = 0
+        self.error = None
+        self._analysis_times = []
+        self._levels = np.zeros(self.analyzer.bands, dtype=np.float64)
+        self._out = np.zeros(self.analyzer.bands, dtype=np.float64)
+        self._stamp = None
+        self._fresh = False
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='AudioInput', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.source.close()
+
+    def _run(self):
+        try:
+            while self._running:
+                samples = self.source.read(self.block_size)
+                if samples is None:
+                    self.error = "音频来源已结束"
+                    return
+                stamp = time.monotonic()
+                start = time.perf_counter()
+                levels = self.analyzer.analyze(samples)
+                analysis_time = time.perf_counter() - start
+                with self._lock:
+                    if self._fresh:
+                        self.skipped += 1
+                    self._levels[:] = levels
+                    self._stamp = stamp
+                    self._fresh = True
+                    self.blocks += 1
+                    self._analysis_times.append(analysis_time)
+                    del self._analysis_times[:-100]
+        except Exception as e:
+            self.error = str(e)
+
+    def take(self):
+        with self._lock:
+            if self._stamp is None:
+                return None, None
+            self._out[:] = self._levels
+            stamp = self._stamp if self._fresh else None
+            self._fresh = False
+            return self._out, stamp
+
+    def stats(self):
+        """块时长、分析耗时（毫秒）和被覆盖未使用的块数"""
+        with self._lock:
+            times = list(self._analysis_times)
+        return {
+            'sample_rate': self.source.sample_rate,
+            'block_size': self.block_size,
+            'block_ms': self.block_size / self.source.sample_rate * 1000,
+            'analysis_ms': sum(times) / len(times) * 1000 if times else 0.0,
+            'blocks': self.blocks,
+            'skipped': self.skipped,
+            'error': self.error,
+        }
@@ -0,0 +1,121 @@
+"""配置存储：内存中合并修改，静默一段时间后在后台原子写入文件"""
+import json
+import os
+import threading
+import time
+
+
+class ConfigStore:
+    """延迟、原子、后台的配置持久化
+
+    replace() 只修改内存中的配置并记录修改时间；后台线程在最后一次修改后
+    静默 delay 秒才写盘，拖动滑条时的大量修改只会产生一次写入。
+    写入先写临时文件再 os.replace 替换，中途崩溃不会损坏原文件；
+    内容与上次写入相同时跳过写盘。应用暂停/退出时调用 flush()/close()。
+    on_saved() / on_error(exc) 在写盘线程中回调。
+    """
+
+    def __init__(self, path, delay=1.0, on_saved=None, on_error=None):
+        self.path = path
+        self.delay = delay
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self._data = {}
+        self._saved = json.dumps(self._data, indent=4)  # 从未修改过的空配置不写盘
+        self._changed_at = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def load(self):
+        """读取配置文件，文件不存在时返回 None，格式错误时抛出异常"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        with self._cond:
+            self._data = dict(data)
+            self._saved = json.dumps(self._data, indent=4)
+        return data
+
+    def replace(self, values):
+        """整体替换内存中的配置（删除不再使用的旧键），稍后由后台线程写盘"""
+        with self._cond:
+            self._data = dict(values)
+            self._changed_at = time.monotonic()
+            self._cond.notify()
+        self._ensure_thread()
+
+    def flush(self):
+        """立即写盘（内容未变化时跳过），返回是否实际写入
+
+        取内容和写盘都在 _write_lock 内：后台线程与 on_pause 同时 flush 时，
+        后写的一方取到的一定是最新内容，旧内容不会覆盖新内容。
+        """
+        with self._write_lock:
+            with self._cond:
+                self._changed_at = None
+                text = json.dumps(self._data, indent=4)
+                if text == self._saved:
+                    return False
+            self._atomic_write(text)
+            with self._cond:
+                self._saved = text
+        if self.on_saved is not None:
+            self.on_saved()
+        return True
+
+    def close(self):
+        """停止后台线程并写入未保存的修改"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.flush()
+
+    def _atomic_write(self, text):
+        import tempfile  # 只在写盘线程中用到，不拖慢启动
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='ConfigStore', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # 等待修改，并在最后一次修改后静默 delay 秒
+                while self._running:
+                    if self._changed_at is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._changed_at + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._running:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
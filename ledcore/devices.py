@@ -0,0 +1,365 @@
+"""多控制器输出：每台设备有自己的串口、灯条布局、颜色顺序和灯效
+
+所有设备在同一轮中渲染，各自的发送线程并行写串口，
+某个串口变慢只会让它自己丢帧，不会拖慢其他设备。
+"""
+from ledcore import effects, protocol, render
+from ledcore.animation import AnimationClock, leds_per_second
+from ledcore.output_stage import DEFAULT_LED_CURRENT, OutputStage
+from ledcore.serial_writer import SerialWriter
+
+DEVICE_DEFAULTS = {
+    'name': '',
+    'port': '',
+    'baudrate': 115200,
+    'D1': 11,
+    'D2': 20,
+    'D3': 11,
+    'D4': 15,
+    'color_order': 'GRB',
+    'color_mode': 0,
+    'waterfall_speed': 1,
+    'custom_color': {'r': 255, 'g': 0, 'b': 0},
+    'delta_protocol': False,
+    'segments': [],
+    # 输出校正与电流限制（max_current 为0时不限流，单位安培）
+    'gamma': 1.0,
+    'brightness': 1.0,
+    'channel_gain': [1.0, 1.0, 1.0],
+    'max_current': 0.0,
+    'led_current': DEFAULT_LED_CURRENT,
+}
+
+# 旧版配置文件中属于设备的扁平键（last_port 对应设备的 port）
+LEGACY_KEYS = ('baudrate', 'D1', 'D2', 'D3', 'D4', 'color_mode', 'waterfall_speed',
+               'custom_color', 'delta_protocol')
+
+
+def normalize_segments(segments):
+    """四边之外的附加灯带段，接受 [{'name': ..., 'leds': n}] 或灯珠数列表，无效时抛出 ValueError"""
+    result = []
+    for i, segment in enumerate(segments or []):
+        if isinstance(segment, dict):
+            name, leds = segment.get('name', ''), segment.get('leds')
+        else:
+            name, leds = '', segment
+        if not isinstance(name, str):
+            raise ValueError(f"第{i + 1}段名称必须是字符串")
+        if not isinstance(leds, int) or isinstance(leds, bool) or leds < 1:
+            raise ValueError(f"第{i + 1}段灯珠数必须是正整数")
+        result.append({'name': name, 'leds': leds})
+    return result
+
+
+def is_int(value):
+    """整数（不包括 bool）"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value):
+    """整数或浮点数（不包括 bool）"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_device_config(config):
+    """检查设备配置（格式与 to_config() 相同，缺少的键使用默认值），无效时抛出 ValueError
+
+    返回补全默认值、规范化附加灯带段后的配置。
+    """
+    config = dict(DEVICE_DEFAULTS, **config)
+    for key in ('name', 'port'):
+        if not isinstance(config[key], str):
+            raise ValueError(f"{key} 必须是字符串")
+    if not isinstance(config['delta_protocol'], bool):
+        raise ValueError("delta_protocol 必须是 true 或 false")
+    for key in ('D1', 'D2', 'D3', 'D4'):
+        if not is_int(config[key]) or config[key] < 0:
+            raise ValueError(f"{key} 必须是非负整数")
+    for key in ('waterfall_speed', 'baudrate'):
+        if not is_int(config[key]) or config[key] < 1:
+            raise ValueError(f"{key} 必须是正整数")
+    config['segments'] = normalize_segments(config['segments'])
+    render.check_total_len(sum(config[key] for key in ('D1', 'D2', 'D3', 'D4'))
+                           + sum(s['leds'] for s in config['segments']))
+    if not is_int(config['color_mode']) or not 0 <= config['color_mode'] < len(effects.EFFECTS):
+        raise ValueError(f"无效的颜色模式: {config['color_mode']}")
+    if not isinstance(config['color_order'], str):
+        raise ValueError(f"无效的颜色顺序: {config['color_order']}")
+    render.channel_order(config['color_order'])
+    if not is_number(config['gamma']) or config['gamma'] <= 0:
+        raise ValueError("gamma 必须是正数")
+    for key in ('brightness', 'max_current', 'led_current'):
+        if not is_number(config[key]) or config[key] < 0:
+            raise ValueError(f"{key} 必须是非负数")
+    gain = config['channel_gain']
+    if (not isinstance(gain, (list, tuple)) or len(gain) != 3
+            or not all(is_number(g) and g >= 0 for g in gain)):
+        raise ValueError("channel_gain 必须是3个非负数")
+    color = config['custom_color']
+    if (not isinstance(color, dict)
+            or not all(is_int(color.get(c)) and 0 <= color[c] <= 255 for c in 'rgb')):
+        raise ValueError("custom_color 必须是3个0~255的整数")
+    return config
+
+
+def devices_from_config(config):
+    """从配置中取出设备列表，兼容只有扁平键的旧版配置"""
+    if config.get('devices'):
+        return list(config['devices'])
+    device = {key: config[key] for key in LEGACY_KEYS if key in config}
+    if config.get('last_port'):
+        device['port'] = config['last_port']
+    return [device]
+
+
+class OutputDevice:
+    """一个输出目标（一个串口控制器）"""
+
+    def __init__(self, config=None, ser=None, metrics=None, on_error=None, on_negotiated=None):
+        config = check_device_config(config or {})
+        self.name = config['name']
+        self.port = config['port']
+        self.baudrate = config['baudrate']
+        self.D1 = config['D1']
+        self.D2 = config['D2']
+        self.D3 = config['D3']
+        self.D4 = config['D4']
+        self.color_order = config['color_order']
+        self.color_mode = config['color_mode']
+        self.waterfall_speed = config['waterfall_speed']
+        color = config['custom_color']
+        self.custom_color = [color['r'], color['g'], color['b']]
+        self.delta_protocol = config['delta_protocol']
+        # 附加灯带段接在四边之后，参与灯效渲染，流光溢彩模式下显示自定义颜色
+        self.segments = config['segments']
+        self.gamma = config['gamma']
+        self.brightness = config['brightness']
+        self.channel_gain = list(config['channel_gain'])
+        self.max_current = config['max_current']
+        self.led_current = config['led_current']
+
+        self.animation = AnimationClock()
+        self.effect = None
+        self.effect_mode = None
+        self.frame_rgb = None
+        self.sampler = None
+        self.pool = render.PacketPool()
+        self.output = OutputStage()
+        self.writer = SerialWriter(
+            ser,
+            on_error=(lambda e: on_error(self, e)) if on_error else None,
+            metrics=metrics,
+            on_release=self.pool.release,
+            encoder=protocol.FrameEncoder() if self.delta_protocol else None,
+            on_negotiated=(lambda caps: on_negotiated(self, caps)) if on_negotiated else None,
+        )
+
+    def __str__(self):
+        return self.name or self.port or '设备'
+
+    @property
+    def layout(self):
+        """屏幕四边的灯珠数（左、上、右、下）"""
+        return (self.D1, self.D2, self.D3, self.D4)
+
+    @property
+    def total_len(self):
+        return self.D1 + self.D2 + self.D3 + self.D4 + sum(s['leds'] for s in self.segments)
+
+    def to_config(self):
+        return {
+            'name': self.name,
+            'port': self.port,
+            'baudrate': self.baudrate,
+            'D1': self.D1,
+            'D2': self.D2,
+            'D3': self.D3,
+            'D4': self.D4,
+            'color_order': self.color_order,
+            'color_mode': self.color_mode,
+            'waterfall_speed': self.waterfall_speed,
+            'custom_color': {
+                'r': self.custom_color[0],
+                'g': self.custom_color[1],
+                'b': self.custom_color[2]
+            },
+            'delta_protocol': self.delta_protocol,
+            'segments': [dict(segment) for segment in self.segments],
+            'gamma': self.gamma,
+            'brightness': self.brightness,
+            'channel_gain': list(self.channel_gain),
+            'max_current': self.max_current,
+            'led_current': self.led_current,
+        }
+
+    def current_effect(self):
+        """返回当前颜色模式对应的灯效，模式或灯珠数变化时重新创建"""
+        total_len = self.total_len
+        if (self.effect is None or self.effect_mode != self.color_mode
+                or self.effect.total_len != total_len):
+            self.effect = effects.create_effect(self.color_mode)
+            self.effect.setup(total_len)
+            self.effect_mode = self.color_mode
+        return self.effect
+
+    def static_state(self, check_test=True, check_waterfall=True):
+        """输出与时间无关时返回决定输出内容的全部设置，否则返回 None
+
+        用于空闲检测（没有外部推送像素和采集画面时）：两次返回值相同说明输出的帧相同。
+        """
+        if check_test and check_waterfall and self.current_effect().animated:
+            return None
+        return self.to_config(), self.writer.is_open
+
+    def render_frame(self, t, check_test=True, check_waterfall=True, frame=None, pixels=None,
+                     audio=None):
+        """渲染一帧，返回从缓冲池取得的数据包
+
+        check_test/check_waterfall 与界面复选框含义相同；
+        正常工作模式下 frame 为采集到的画面，为 None 时使用自定义颜色。
+        pixels 为外部推送的 (total_len, 3) RGB 数据，优先于本地灯效。
+        audio 为音乐律动效果使用的频带电平。
+        """
+        total_len = self.total_len
+        packet = self.pool.acquire(total_len)
+        if self.frame_rgb is None or len(self.frame_rgb) != total_len:
+            self.frame_rgb = render.new_frame(total_len)
+        rgb = self.frame_rgb
+
+        if pixels is not None:
+            rgb[:] = pixels
+        elif check_test:
+            if check_waterfall:
+                # 流水偏移量由时间决定，帧率变化不影响动画速度
+                offset = self.animation.offset(t, leds_per_second(self.waterfall_speed), total_len)
+                encoder = self.writer.encoder
+                if encoder is not None and encoder.caps & protocol.CAP_ROTATE:
+                    # 控制器支持旋转编码时按整颗灯珠移动，流水帧只需发送旋转量；
+                    # 代价是不再在相邻灯珠之间插值，低速流水会一格一格地跳
+                    offset = round(offset)
+                effect = self.current_effect()
+                if effect.audio_reactive:
+                    effect.feed(audio, self.layout)
+                effect.render(rgb, t, offset, self.custom_color)
+            else:
+                rgb[:] = self.custom_color
+        elif frame is not None:
+            from ledcore import ambilight
+            if self.sampler is None or self.sampler.counts != self.layout:
+                self.sampler = ambilight.EdgeSampler(*self.layout)
+            edges = self.sampler.sample(frame)
+            if self.segments:
+                rgb[:len(edges)] = edges
+                rgb[len(edges):] = self.custom_color
+            else:
+                rgb = edges
+        else:
+            rgb[:] = self.custom_color
+
+        # 颜色顺序、伽马/亮度校正和电流限制
+        self.output.configure(self.color_order, self.gamma, self.brightness, self.channel_gain)
+        return self.output.apply(packet, rgb, self.max_current, self.led_current)
+
+    def send(self, packet, stamp=None):
+        """串口已打开时交给发送线程，否则直接归还缓冲区"""
+        if self.writer.is_open:
+            self.writer.submit(packet, stamp)
+        else:
+            self.pool.release(packet)
+
+    def open(self, port=None):
+        """打开串口（默认为上次使用的串口），成功后记住串口名，失败时抛出异常"""
+        port = self.port if port is None else port
+        self.writer.open(port, baudrate=self.baudrate,
+                         bytesize=8, parity='N', stopbits=1)
+        self.port = port
+
+
+class DeviceManager:
+    """管理全部输出设备，至少保留一台（界面编辑的是第一台）"""
+
+    def __init__(self, serial_factory=None, metrics=None, on_error=None, on_negotiated=None):
+        self.serial_factory = serial_factory
+        self.metrics = metrics
+        self.on_error = on_error
+        self.on_negotiated = on_negotiated
+        self.devices = []
+
+    @property
+    def primary(self):
+        return self.devices[0]
+
+    def add(self, config=None):
+        """添加一台设备并启动其发送线程"""
+        ser = self.serial_factory() if self.serial_factory else None
+        device = OutputDevice(config, ser=ser, metrics=self.metrics,
+                              on_error=self.on_error, on_negotiated=self.on_negotiated)
+        device.writer.start()
+        self.devices.append(device)
+        return device
+
+    def load(self, configs):
+        """按配置列表重建全部设备"""
+        self.stop()
+        for config in configs or [{}]:
+            self.add(config)
+
+    def to_config(self):
+        return [device.to_config() for device in self.devices]
+
+    @property
+    def total_len(self):
+        """所有设备的灯珠总数（外部帧流的像素空间大小）"""
+        return sum(device.total_len for device in self.devices)
+
+    def static_state(self, check_test=True, check_waterfall=True):
+        """所有设备的输出都与时间无关时返回各设备的 static_state，否则返回 None"""
+        states = []
+        for device in self.devices:
+            state = device.static_state(check_test, check_waterfall)
+            if state is None:
+                return None
+            states.append(state)
+        return states
+
+    def render_all(self, t, check_test=True, check_waterfall=True, frame=None, pixels=None,
+                   recorder=None, audio=None, stamp=None):
+        """所有设备渲染并投递一帧，返回各设备的 (包长, 波特率) 供帧调度使用
+
+        pixels 为外部推送的像素，按设备顺序依次切分给各设备；
+        recorder（show.ShowRecorder）不为 None 时发送前先录入放映文件；
+        stamp 为画面数据源的时刻，用于统计数据源到串口写完的延迟。
+        """
+        packets = []
+        start = 0
+        for device in self.devices:
+            part = None
+            if pixels is not None:
+                part = pixels[start:start + device.total_len]
+                start += device.total_len
+            packets.append(device.render_frame(t, check_test, check_waterfall, frame, part, audio))
+        if recorder is not None:
+            recorder.add(packets)
+        return self.send_all(packets, stamp)
+
+    def send_all(self, packets, stamp=None):
+        """按设备顺序投递数据包，返回串口已打开的设备的 (包长, 波特率)
+
+        没有打开的串口时返回全部设备的链路，渲染仍按配置的波特率节奏进行（录制等不受影响）。
+        """
+        links = []
+        closed = []
+        for device, packet in zip(self.devices, packets):
+            link = (len(packet), device.baudrate)
+            if device.writer.is_open:
+                links.append(link)
+            else:
+                closed.append(link)
+            device.send(packet, stamp)
+        return links or closed
+
+    def stop(self):
+        """停止所有发送线程并关闭串口"""
+        for device in self.devices:
+            device.writer.stop()
+        self.devices = []
@@ -0,0 +1,328 @@
+"""灯效插件：每种效果是一个类，渲染到预先分配的 (N, 3) uint8 RGB缓冲区
+
+新增效果只需继承 Effect 并用 @register 注册，界面的颜色模式下拉框
+按注册顺序生成，下标即配置文件中的 color_mode。
+setup() 在灯珠数变化时调用，所有缓冲区都在这里分配；
+render() 每帧调用，只做原地运算，不分配新的数组。
+效果只能依赖 t 和 offset（由时钟决定）变化，不能按调用次数推进，
+这样降低帧率只会让画面更新变稀，不会改变动画速度。
+"""
+import numpy as np
+
+from ledcore import render
+from ledcore.animation import REFERENCE_FPS
+
+EFFECTS = []
+
+
+def register(cls):
+    """注册效果类，注册顺序决定 color_mode 编号"""
+    EFFECTS.append(cls)
+    return cls
+
+
+def effect_labels():
+    """按 color_mode 顺序返回各效果的显示名"""
+    return [cls.label for cls in EFFECTS]
+
+
+def is_audio_mode(color_mode):
+    """color_mode 对应的效果是否需要音频输入"""
+    return 0 <= color_mode < len(EFFECTS) and EFFECTS[color_mode].audio_reactive
+
+
+def create_effect(color_mode):
+    """按 color_mode 创建效果实例，编号无效时使用第一个效果"""
+    if not 0 <= color_mode < len(EFFECTS):
+        color_mode = 0
+    return EFFECTS[color_mode]()
+
+
+class Effect:
+    """效果基类
+
+    label 为界面显示名；animated 为 False 表示输出只取决于颜色，
+    与时间和偏移量无关；audio_reactive 为 True 的效果每帧渲染前
+    由设备调用 feed() 传入最新的音频频带电平。
+    """
+
+    label = ''
+    animated = True
+    audio_reactive = False
+
+    def __init__(self):
+        self.total_len = 0
+
+    def setup(self, total_len):
+        """灯珠数变化时分配缓冲区"""
+        self.total_len = total_len
+
+    def render(self, out, t, offset, color):
+        """渲染一帧到 out
+
+        t 为运行秒数，offset 为流水偏移量（灯珠数，可以是小数），color 为自定义颜色。
+        """
+        raise NotImplementedError
+
+
+class PaletteEffect(Effect):
+    """固定渐变按偏移量旋转的效果（原流水灯的三种颜色模式）"""
+
+    color_mode = render.MODE_RAINBOW
+
+    def __init__(self):
+        super().__init__()
+        self.palette = render.PaletteCache()
+
+    def render(self, out, t, offset, color):
+        self.palette.rotate_into(out, self.total_len, offset, self.color_mode, color)
+
+
+@register
+class RainbowEffect(PaletteEffect):
+    label = "彩虹色渐变"
+    color_mode = render.MODE_RAINBOW
+
+
+@register
+class SolidEffect(Effect):
+    label = "单色模式"
+    animated = False
+
+    def render(self, out, t, offset, color):
+        out[:] = color
+
+
+@register
+class MultiColorEffect(PaletteEffect):
+    label = "多彩渐变"
+    color_mode = render.MODE_MULTI
+
+
+class ScaledColorEffect(Effect):
+    """输出为“自定义颜色 × 每颗灯珠亮度”的效果的公共部分"""
+
+    def setup(self, total_len):
+        super().setup(total_len)
+        self._level = np.zeros(total_len, dtype=np.float64)
+        self._color = np.zeros(3, dtype=np.float64)
+        self._rgb = np.zeros((total_len, 3), dtype=np.float64)
+
+    def _write(self, out, color):
+        self._color[:] = color
+        # 逐通道相乘：广播到 (N, 3) 会触发NumPy内部的临时缓冲区
+        for c in range(3):
+            np.multiply(self._level, self._color[c], out=self._rgb[:, c])
+        np.copyto(out, self._rgb, casting='unsafe')
+
+
+@register
+class BreathingEffect(Effect):
+    """整条灯带按正弦规律明暗变化"""
+
+    label = "呼吸灯"
+    period = 4.0
+
+    def setup(self, total_len):
+        super().setup(total_len)
+        self._source = None
+        self._base = np.zeros(3, dtype=np.float64)
+        self._color = np.zeros(3, dtype=np.float64)
+
+    def render(self, out, t, offset, color):
+        # 颜色变化时才拷贝进预分配的数组，直接传入列表时NumPy每帧都会临时转换
+        if color != self._source:
+            self._source = list(color)
+            self._base[:] = color
+        level = (1 - np.cos(2 * np.pi * t / self.period)) / 2
+        np.multiply(self._base, level, out=self._color)
+        out[:] = self._color
+
+
+@register
+class CometEffect(ScaledColorEffect):
+    """带渐暗拖尾的流星，头部随偏移量移动"""
+
+    label = "流星追逐"
+    tail_ratio = 0.25
+
+    def setup(self, total_len):
+        super().setup(total_len)
+        tail = max(int(total_len * self.tail_ratio), 1)
+        self._scratch = np.zeros((2, total_len), dtype=np.float64)
+        # 头部在下标0，拖尾向下标减小的方向（环绕到末尾）逐渐变暗
+        profile = np.zeros(total_len, dtype=np.float64)
+        dist = np.arange(min(tail, total_len))
+        profile[-dist] = ((tail - dist) / tail) ** 2
+        self._profile = profile
+
+    def render(self, out, t, offset, color):
+        render.shift_into(self._level, self._profile, -offset, self._scratch)
+        self._write(out, color)
+
+
+@register
+class TwinkleEffect(ScaledColorEffect):
+    """随机闪烁的星光，点亮后按半衰期逐渐熄灭
+
+    density 为每颗灯珠在 1/REFERENCE_FPS 秒内被点亮的概率，按实际帧间隔换算，
+    每秒点亮的星光数与帧率无关。
+    """
+
+    label = "星光闪烁"
+    density = 0.03
+    half_life = 0.3
+
+    def setup(self, total_len):
+        super().setup(total_len)
+        self._rng = np.random.default_rng()
+        self._rand = np.zeros(total_len, dtype=np.float64)
+        self._spark = np.zeros(total_len, dtype=bool)
+        self._last_t = None
+
+    def render(self, out, t, offset, color):
+        dt = 0.0 if self._last_t is None else max(t - self._last_t, 0.0)
+        self._last_t = t
+        self._level *= 0.5 ** (dt / self.half_life)
+        # 第一帧按一个参考帧间隔计算
+        chance = 1 - (1 - self.density) ** (dt * REFERENCE_FPS if dt > 0 else 1)
+        self._rng.random(out=self._rand)
+        # 比较结果写入 bool 数组，再把点亮的灯珠置为最亮（不做类型转换，不分配缓冲区）
+        np.greater(self._rand, 1 - chance, out=self._spark)
+        np.copyto(self._level, 1.0, where=self._spark)
+        self._write(out, color)
+
+
+def _fire_lut():
+    """热度0~255到火焰颜色（黑→红→黄→白）的查找表"""
+    heat = np.arange(256, dtype=np.float64) * 3
+    lut = np.zeros((256, 3), dtype=np.uint8)
+    lut[:, 0] = np.clip(heat, 0, 255)
+    lut[:, 1] = np.clip(heat - 255, 0, 255)
+    lut[:, 2] = np.clip(heat - 510, 0, 255)
+    return lut
+
+
+@register
+class FireEffect(Effect):
+    """一维火焰模拟：随机冷却、热量向上扩散、底部随机产生火星
+
+    模拟按固定的 step_rate 步/秒推进，帧率高于步频时重复上一步的画面，
+    低于步频时一帧内补做多步（最多 max_steps 步）。
+    """
+
+    label = "火焰"
+    cooling = 55
+    sparking = 0.5
+    step_rate = REFERENCE_FPS
+    max_steps = 10
+
+    def setup(self, total_len):
+        super().setup(total_len)
+        self._rng = np.random.default_rng()
+        self._heat = np.zeros(total_len, dtype=np.float64)
+        self._rand = np.zeros(total_len, dtype=np.float64)
+        self._index = np.zeros(total_len, dtype=np.intp)
+        self._lut = _fire_lut()
+        self._steps_done = None
+
+    def render(self, out, t, offset, color):
+        target = int(t * self.step_rate)
+        if self._steps_done is None:
+            steps = 1
+        else:
+            steps = min(max(target - self._steps_done, 0), self.max_steps)
+        self._steps_done = target
+        for _ in range(steps):
+            self._step()
+        np.copyto(self._index, self._heat, casting='unsafe')
+        # mode='clip' 时 take 直接写入 out（默认的 'raise' 会先写到临时缓冲区）
+        self._lut.take(self._index, axis=0, out=out, mode='clip')
+
+    def _step(self):
+        heat = self._heat
+        n = self.total_len
+        # 随机冷却
+        self._rng.random(out=self._rand)
+        self._rand *= self.cooling * 10.0 / max(n, 1) + 2
+        heat -= self._rand
+        np.maximum(heat, 0, out=heat)
+        # 热量向上扩散：heat[k] = (heat[k-1] + 2 * heat[k-2]) / 3，借用随机数缓冲区暂存
+        if n > 2:
+            tmp = self._rand
+            np.add(heat[1:-1], heat[:-2], out=tmp[2:])
+            tmp[2:] += heat[:-2]
+            np.divide(tmp[2:], 3, out=heat[2:])
+        # 底部随机产生火星
+        spark_zone = min(7, n)
+        if self._rng.random() < self.sparking:
+            y = self._rng.integers(spark_zone)
+            heat[y] = min(heat[y] + self._rng.integers(160, 256), 255)
+        np.minimum(heat, 255, out=heat)
+
+
+@register
+class SpectrumEffect(Effect):
+    """音乐律动：频带电平映射到四边，低频在左侧（D1），高频在底边（D4）
+
+    每条边显示四分之一的频带，边内按灯珠位置在相邻频带之间插值，
+    附加灯带段显示完整频谱。颜色按频带从低到高取彩虹色，亮度为电平；
+    没有音频数据时熄灭。映射关系只在频带数或布局变化时重新计算。
+    """
+
+    label = "音乐律动"
+    audio_reactive = True
+
+    def setup(self, total_len):
+        super().setup(total_len)
+        self._key = None
+        self._levels = None
+        self._lo = np.zeros(total_len, dtype=np.intp)
+        self._hi = np.zeros(total_len, dtype=np.intp)
+        self._weight = np.zeros(total_len, dtype=np.float64)
+        self._a = np.zeros(total_len, dtype=np.float64)
+        self._b = np.zeros(total_len, dtype=np.float64)
+        self._palette = np.zeros((total_len, 3), dtype=np.float64)
+        self._rgb = np.zeros((total_len, 3), dtype=np.float64)
+
+    def feed(self, levels, layout):
+        """设置本帧的频带电平（None 表示没有音频数据）和四边灯珠数"""
+        self._levels = levels
+        if levels is None:
+            return
+        key = (len(levels), tuple(layout))
+        if key != self._key:
+            self._build(len(levels), layout)
+            self._key = key
+
+    def _build(self, bands, layout):
+        positions = []
+        quarter = bands / 4
+        for side, count in enumerate(layout):
+            i = np.arange(count)
+            positions.append(np.clip(side * quarter + (i + 0.5) / count * quarter - 0.5,
+                                     side * quarter, (side + 1) * quarter - 1))
+        extra = self.total_len - sum(layout)
+        if extra > 0:
+            i = np.arange(extra)
+            positions.append(np.clip((i + 0.5) / extra * bands - 0.5, 0, bands - 1))
+        pos = np.concatenate(positions)[:self.total_len]
+        self._lo[:] = np.floor(pos)
+        self._hi[:] = np.minimum(self._lo + 1, bands - 1)
+        self._weight[:] = pos - self._lo
+        colors = render.waterfall_colors(bands, 0, render.MODE_RAINBOW, [0, 0, 0]).astype(np.float64)
+        self._palette[:] = colors[self._lo]
+
+    def render(self, out, t, offset, color):
+        if self._levels is None:
+            out[:] = 0
+            return
+        # a = levels[lo] + (levels[hi] - levels[lo]) * weight
+        np.take(self._levels, self._lo, out=self._a)
+        np.take(self._levels, self._hi, out=self._b)
+        self._b -= self._a
+        self._b *= self._weight
+        self._a += self._b
+        for c in range(3):
+            np.multiply(self._palette[:, c], self._a, out=self._rgb[:, c])
+        np.copyto(out, self._rgb, casting='unsafe')
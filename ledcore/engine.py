@@ -0,0 +1,849 @@
+"""灯带引擎：配置、输出设备、帧渲染与调度、串口发现与重连，不依赖Kivy
+
+Kivy界面和无界面的命令行（python -m ledcore run）共用同一个引擎。
+界面通过 call_soon 把后台线程的回调切回Kivy主线程，并用自己的时钟驱动
+tick()/poll_ports()；命令行调用 run() 在当前线程中循环。
+"""
+import collections
+import importlib.util
+import threading
+import time
+
+from ledcore import effects
+from ledcore.config_store import ConfigStore
+from ledcore.devices import (DeviceManager, check_device_config, devices_from_config, is_int,
+                             is_number)
+from ledcore.log_buffer import LEVEL_ERROR, LEVEL_INFO, LogBuffer
+from ledcore.metrics import FrameMetrics
+from ledcore.pacing import FramePacer
+from ledcore.port_discovery import PortDiscovery
+from ledcore.show import ShowPlayer, ShowRecorder
+from ledcore.startup import StartupTimer
+from ledcore.stream import FrameStream
+
+# on_connection 回调的状态
+STATUS_CONNECTED = 'connected'
+STATUS_CLOSED = 'closed'
+STATUS_UNPLUGGED = 'unplugged'
+STATUS_FAILED = 'failed'
+
+# 可以通过网络接口修改的设置
+GLOBAL_SETTINGS = ('target_fps', 'check_run', 'check_test', 'check_waterfall',
+                   'capture_source', 'auto_reconnect', 'audio_source', 'audio_block',
+                   'idle_keepalive')
+# 开关类和文本类的全局设置
+BOOL_SETTINGS = ('check_run', 'check_test', 'check_waterfall', 'auto_reconnect')
+STR_SETTINGS = ('capture_source', 'audio_source')
+DEVICE_SETTINGS = ('name', 'D1', 'D2', 'D3', 'D4', 'segments', 'baudrate', 'color_order',
+                   'color_mode', 'waterfall_speed', 'custom_color', 'gamma', 'brightness',
+                   'channel_gain', 'max_current', 'led_current')
+
+
+class LazySerial:
+    """serial.Serial 的代理：第一次设置或读取串口参数（即打开串口）时才导入pyserial并创建对象
+
+    没有打开过的串口 is_open 为 False，不触发导入。
+    """
+
+    def __init__(self):
+        object.__setattr__(self, '_ser', None)
+
+    @property
+    def is_open(self):
+        return self._ser is not None and self._ser.is_open
+
+    def _serial(self):
+        if self._ser is None:
+            import serial
+            object.__setattr__(self, '_ser', serial.Serial())
+        return self._ser
+
+    def __getattr__(self, name):
+        return getattr(self._serial(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._serial(), name, value)
+
+
+def default_serial_factory():
+    """返回创建串口对象的工厂，当前平台没有 pyserial 时返回 None
+
+    只检查 pyserial 是否存在，不导入；串口库在第一次打开串口时才导入。
+    """
+    if importlib.util.find_spec('serial') is None:
+        return None
+    return LazySerial
+
+
+class Engine:
+    """与界面无关的灯带引擎
+
+    call_soon(fn) 把后台线程（串口发送、配置写盘）的回调切换到引擎所在线程，
+    默认放入内部队列由 run() 执行；on_log(message, level) 在记录日志后调用；
+    on_connection(device, status) 在设备串口打开/关闭后调用；
+    on_settings() 在设置被网络接口修改后调用；
+    on_wake() 在空闲中被 wake() 唤醒时经 call_soon 调用，自己驱动 tick() 的界面据此立即安排下一帧；
+    startup 为调用方在进程入口创建的 StartupTimer，引擎记录加载配置、首帧、首包等阶段。
+    """
+
+    def __init__(self, config_path, serial_factory=None, call_soon=None,
+                 on_log=None, on_connection=None, on_settings=None, on_wake=None, startup=None):
+        self.call_soon = call_soon or self._queue_call
+        self.startup = startup or StartupTimer()
+        self.on_log = on_log
+        self.on_connection = on_connection
+        self.on_settings = on_settings
+        self.on_wake = on_wake
+        self._calls = collections.deque()
+        self._wake = threading.Event()
+        self._running = False
+
+        # 日志缓冲（定长、合并重复消息）
+        self.log_buffer = LogBuffer()
+        self.log_file = ''  # 为空时不写日志文件
+
+        self.metrics = FrameMetrics()  # 运行统计（帧率、渲染耗时、串口写入、丢帧）
+
+        # 输出设备：每台设备独占一个串口发送线程，界面编辑的是第一台设备
+        self.has_serial = serial_factory is not None
+        self.devices = DeviceManager(serial_factory, metrics=self.metrics,
+                                     on_error=self.on_serial_error,
+                                     on_negotiated=self.on_protocol_negotiated)
+        self.last_frame = 0
+        self.start_time = time.monotonic()
+
+        # 按各设备的波特率和包长计算帧间隔（target_fps 为0表示只受串口速率限制）
+        self.target_fps = 0
+        self.pacer = FramePacer()
+
+        # 空闲检测：输出与时间无关且输入没有变化时不再逐帧渲染发送，
+        # 只每 idle_keepalive 秒重发一次相同的帧（为0时不进入空闲）
+        self.idle_keepalive = 1.0
+        self._static_state = None
+        self._keepalive_due = 0.0
+        self._woken = False
+
+        # 串口发现与热插拔自动重连
+        self.port_discovery = PortDiscovery()
+        self.auto_reconnect = True
+        self.user_disconnected = False
+
+        # 正常工作模式的画面来源（'screen'、视频文件或图片目录，为空时使用自定义颜色）
+        self.capture_source = ''
+        self.frame_source = None
+        self.capture_failed = False
+
+        # 音乐律动的音频来源（'mic'、'-' 为标准输入、WAV 文件）和分析块大小，
+        # 有设备使用音乐律动效果时才打开
+        self.audio_source = 'mic'
+        self.audio_block = 1024
+        self.audio = None
+        self.audio_failed = False
+
+        # 外部推送的像素帧（网络接口），推送期间优先于本地灯效
+        self.stream = FrameStream()
+
+        # 放映文件播放列表（为空时实时渲染）和正在录制的放映文件
+        self.show_playlist = []
+        self.show_loop = True
+        self.player = None
+        self.recorder = None
+
+        # 局域网控制接口，端口为0时不启动
+        self.api_host = '127.0.0.1'
+        self.api_port = 0
+        self.ddp_port = 0
+        self.network = None
+
+        # 运行状态
+        self.check_run = True
+        self.check_test = True
+        self.check_waterfall = True
+
+        # 只用于本次运行的设置（命令行参数）：(设备序号或 None, 键, 原来的值, 覆盖值)
+        self._overrides = []
+
+        # 配置修改先合并在内存中，静默一段时间后在后台原子写盘
+        self.config_store = ConfigStore(config_path, on_saved=self.on_config_saved,
+                                        on_error=self.on_config_error)
+
+    @property
+    def primary(self):
+        """界面编辑的设备（第一台）"""
+        return self.devices.primary
+
+    @property
+    def idle(self):
+        """输出没有变化，渲染循环只定期重发（或已停止运行）"""
+        return self.metrics.idle
+
+    def wake(self):
+        """输入变化（设置修改、串口连接、外部推送）时调用，可在其他线程调用
+
+        下一帧重新渲染；空闲中的 run() 循环立即渲染，界面经 on_wake 重新安排下一帧。
+        """
+        self._static_state = None
+        if self.metrics.idle:
+            self.metrics.set_idle(False)
+            self._woken = True
+            self._wake.set()
+            if self.on_wake is not None:
+                self.call_soon(self.on_wake)
+
+    def log(self, message, error_level=LEVEL_INFO):
+        """记录日志"""
+        self.log_buffer.append(message, error_level)
+        if self.on_log is not None:
+            self.on_log(message, error_level)
+
+    def device_prefix(self, device):
+        """日志中的设备名前缀，第一台设备不加前缀"""
+        return '' if device is self.primary else f"{device}: "
+
+    # ---- 配置 ----
+
+    def load_config(self):
+        """加载配置文件并重建输出设备"""
+        device_configs = [{}]
+        try:
+            config = self.config_store.load()
+        except Exception as e:
+            self.log(f"加载配置失败: {e}", LEVEL_ERROR)
+            config = None
+        else:
+            if config is None:
+                self.log("配置文件不存在，使用默认配置")
+
+        if config is not None:
+            try:
+                # 加载输出设备（旧版配置中的扁平键自动转换为第一台设备）
+                device_configs = devices_from_config(config)
+
+                # 加载目标帧率
+                self.target_fps = config.get('target_fps', 0)
+                self.idle_keepalive = config.get('idle_keepalive', 1.0)
+
+                # 加载自动重连设置
+                self.auto_reconnect = config.get('auto_reconnect', True)
+
+                # 加载画面来源
+                self.capture_source = config.get('capture_source', '')
+
+                # 加载运行状态
+                self.check_run = config.get('check_run', True)
+                self.check_test = config.get('check_test', True)
+                self.check_waterfall = config.get('check_waterfall', True)
+
+                # 加载音频设置
+                self.audio_source = config.get('audio_source', 'mic')
+                self.audio_block = config.get('audio_block', 1024)
+
+                # 加载放映文件播放列表
+                self.show_playlist = list(config.get('show_playlist', []))
+                self.show_loop = config.get('show_loop', True)
+
+                # 加载网络接口设置
+                self.api_host = config.get('api_host', '127.0.0.1')
+                self.api_port = config.get('api_port', 0)
+                self.ddp_port = config.get('ddp_port', 0)
+
+                # 加载日志文件设置
+                self.log_file = config.get('log_file', '')
+                self.log_buffer.enable_file(self.log_file)
+
+                self.log("配置加载成功")
+            except Exception as e:
+                device_configs = [{}]
+                self.log(f"加载配置失败: {e}", LEVEL_ERROR)
+
+        self.pacer.target_fps = self.target_fps
+        try:
+            self.devices.load(device_configs)
+        except ValueError as e:
+            # 设备配置无效时使用默认设备，避免之后每一帧都出错
+            self.log(f"设备配置无效，使用默认设置: {e}", LEVEL_ERROR)
+            self.devices.load([{}])
+        self.startup.mark('config')
+
+        if self.show_playlist:
+            try:
+                self.play_show(self.show_playlist, self.show_loop)
+            except Exception as e:
+                self.log(f"放映文件加载失败: {e}", LEVEL_ERROR)
+
+    def save_config(self):
+        """保存配置（延迟写盘）"""
+        config = {
+            'devices': self.devices.to_config(),
+            'target_fps': self.target_fps,
+            'idle_keepalive': self.idle_keepalive,
+            'auto_reconnect': self.auto_reconnect,
+            'capture_source': self.capture_source,
+            'audio_source': self.audio_source,
+            'audio_block': self.audio_block,
+            'check_run': self.check_run,
+            'check_test': self.check_test,
+            'check_waterfall': self.check_waterfall,
+            'api_host': self.api_host,
+            'api_port': self.api_port,
+            'ddp_port': self.ddp_port,
+            'show_playlist': self.show_playlist,
+            'show_loop': self.show_loop,
+            'log_file': self.log_file
+        }
+
+        # 仍是命令行覆盖值的设置写入原来的值；运行中又被修改过的按新值保存
+        for index, key, original, value in self._overrides:
+            if index is not None and index >= len(config['devices']):
+                continue
+            target = config if index is None else config['devices'][index]
+            if target.get(key) == value:
+                target[key] = original
+
+        self.config_store.replace(config)
+        # 设置变化后重新渲染，空闲中立即唤醒
+        self.wake()
+
+    def state(self):
+        """当前设置、设备和运行统计（网络接口 GET /api/state）"""
+        state = {key: getattr(self, key) for key in GLOBAL_SETTINGS}
+        state['devices'] = self.devices.to_config()
+        for config, device in zip(state['devices'], self.devices.devices):
+            config['connected'] = device.writer.is_open
+            config['current'] = device.output.current
+            config['current_limited'] = device.output.limited
+        state['stream'] = {
+            'active': self.stream.active(),
+            'total_len': self.devices.total_len,
+            'frames': self.stream.frames,
+            'dropped': self.stream.dropped,
+            'invalid': self.stream.invalid,
+        }
+        state['audio'] = self.audio.stats() if self.audio is not None else None
+        state['show'] = self.player.state() if self.player is not None else None
+        state['recording'] = self.recorder.path if self.recorder is not None else None
+        state['metrics'] = self.metrics.snapshot()
+        state['startup_ms'] = self.startup.to_dict()
+        return state
+
+    def override(self, key, value, device=None):
+        """只在本次运行中修改设置（命令行参数），保存配置时仍写入原来的值
+
+        device 为 None 时修改全局设置，否则修改该设备的设置。
+        """
+        if device is None:
+            self._overrides.append((None, key, getattr(self, key), value))
+            setattr(self, key, value)
+        else:
+            index = self.devices.devices.index(device)
+            self._overrides.append((index, key, getattr(device, key), value))
+            setattr(device, key, value)
+        if key == 'target_fps':
+            self.pacer.target_fps = value
+
+    def apply_settings(self, values):
+        """修改设置并保存（网络接口 POST /api/settings），返回修改后的状态
+
+        全局设置直接给出；设备设置作用于 values['device'] 指定的设备（默认第一台）。
+        有无效的键或值时抛出 ValueError，不做任何修改。
+        """
+        values = dict(values)
+        index = values.pop('device', 0)
+        if not is_int(index) or not 0 <= index < len(self.devices.devices):
+            raise ValueError(f"无效的设备编号: {index}")
+        device = self.devices.devices[index]
+
+        unknown = set(values) - set(GLOBAL_SETTINGS) - set(DEVICE_SETTINGS)
+        if unknown:
+            raise ValueError(f"未知的设置: {', '.join(sorted(unknown))}")
+        if 'custom_color' in values:
+            color = values['custom_color']
+            if isinstance(color, (list, tuple)) and len(color) == 3:
+                color = {'r': color[0], 'g': color[1], 'b': color[2]}
+            values['custom_color'] = color
+        # 设备设置与现有设置合并后整体检查（类型、范围、灯珠总数）
+        checked = check_device_config(dict(device.to_config(), **{
+            key: value for key, value in values.items() if key in DEVICE_SETTINGS}))
+        if 'segments' in values:
+            values['segments'] = checked['segments']
+        if 'custom_color' in values:
+            color = checked['custom_color']
+            values['custom_color'] = [color['r'], color['g'], color['b']]
+        for key in BOOL_SETTINGS:
+            if key in values and not isinstance(values[key], bool):
+                raise ValueError(f"{key} 必须是 true 或 false")
+        for key in STR_SETTINGS:
+            if key in values and not isinstance(values[key], str):
+                raise ValueError(f"{key} 必须是字符串")
+        for key in ('target_fps', 'idle_keepalive'):
+            if key in values and (not is_number(values[key]) or values[key] < 0):
+                raise ValueError(f"{key} 必须是非负数")
+        if 'audio_block' in values and (not is_int(values['audio_block'])
+                                        or not 64 <= values['audio_block'] <= 16384):
+            raise ValueError("audio_block 必须是64~16384的整数")
+
+        baudrate = values.pop('baudrate', None)
+        for key, value in values.items():
+            if key in GLOBAL_SETTINGS:
+                setattr(self, key, value)
+            else:
+                setattr(device, key, value)
+        if baudrate is not None:
+            self.set_baudrate(device, baudrate)
+        if 'target_fps' in values:
+            self.pacer.target_fps = self.target_fps
+        if 'capture_source' in values:
+            self.stop_capture()
+            self.capture_failed = False
+        if 'audio_source' in values or 'audio_block' in values:
+            self.stop_audio()
+            self.audio_failed = False
+        self.save_config()
+        if self.on_settings is not None:
+            self.on_settings()
+        return self.state()
+
+    def flush_config(self):
+        """立即写入未保存的配置"""
+        try:
+            self.config_store.flush()
+        except Exception as e:
+            self.log(f"保存配置失败: {e}", LEVEL_ERROR)
+
+    def on_config_saved(self):
+        """配置写盘完成（在写盘线程中回调）"""
+        self.call_soon(lambda: self.log("配置保存成功"))
+
+    def on_config_error(self, error):
+        """配置写盘失败（在写盘线程中回调）"""
+        self.call_soon(lambda: self.log(f"保存配置失败: {error}", LEVEL_ERROR))
+
+    # ---- 帧渲染 ----
+
+    def tick(self):
+        """渲染并投递一帧，返回距离下一帧应等待的秒数"""
+        now = time.time()
+        interval = now - self.last_frame if self.last_frame > 0 else 0
+        self.last_frame = now
+
+        if not self.check_run:
+            # 停止运行时低频轮询，恢复后第一帧不计入帧间隔统计
+            self.last_frame = 0
+            self.metrics.set_idle(True)
+            return self.pacer.idle_interval
+
+        render_start = time.perf_counter()
+
+        # 有外部推送的像素帧时直接发送，其次播放放映文件，否则按当前模式渲染
+        self.stream.resize(self.devices.total_len)
+        pixels = self.stream.take()
+        if pixels is None and self.player is not None:
+            delay = self.play_frame(interval, render_start, now)
+            if delay is not None:
+                self.metrics.set_idle(False)
+                return delay
+
+        # 正常工作模式下先采集一帧画面，由各设备按自己的布局采样四边颜色
+        frame = None
+        if pixels is None and not self.check_test:
+            frame = self.capture_frame()
+        elif self.check_test and self.frame_source is not None:
+            self.stop_capture()
+
+        # 音乐律动取最新的频带电平，新音频块的采集时刻用于统计到串口写完的延迟
+        audio = stamp = None
+        if self.check_test and self.check_waterfall and any(
+                effects.is_audio_mode(device.color_mode) for device in self.devices.devices):
+            audio, stamp = self.audio_levels()
+            if pixels is not None:
+                stamp = None
+        elif self.audio is not None:
+            self.stop_audio()
+
+        # 输出与时间无关（单色、不流水、无画面来源）且输入没有变化时空闲：
+        # 跳过渲染和发送，到 idle_keepalive 时才重发一次
+        static = None
+        if (pixels is None and self.frame_source is None and self.recorder is None
+                and self.idle_keepalive > 0):
+            static = self.devices.static_state(self.check_test, self.check_waterfall)
+            if static is not None:
+                static = (self.check_test, self.check_waterfall, static)
+        if static is not None and static == self._static_state:
+            wait = self._keepalive_due - time.monotonic()
+            if wait > 0:
+                self.last_frame = 0
+                self.metrics.set_idle(True)
+                return wait
+        self._static_state = static
+
+        # 所有设备在同一轮中渲染，各自的发送线程并行写串口
+        links = self.devices.render_all(time.monotonic() - self.start_time,
+                                        self.check_test, self.check_waterfall, frame, pixels,
+                                        self.recorder, audio, stamp)
+        self._mark_first_packet()
+
+        self.metrics.record_frame(interval, time.perf_counter() - render_start)
+
+        # 按最快的已打开串口传输一帧所需的时间安排下一帧，较慢的串口由发送线程丢弃过期帧
+        delay = self.pacer.next_delay_for(links, time.time() - now)
+        if static is not None:
+            self._keepalive_due = time.monotonic() + self.idle_keepalive
+            self.last_frame = 0
+            self.metrics.set_idle(True)
+            return max(delay, self.idle_keepalive)
+        self.metrics.set_idle(False)
+        return delay
+
+    def play_frame(self, interval, render_start, now):
+        """发送放映文件的当前帧，返回距离下一帧的秒数；播放结束时返回 None"""
+        packets = self.player.frame()
+        if packets is False:
+            self.log("放映结束，恢复实时渲染")
+            self.player.close()
+            self.player = None
+            self.show_playlist = []
+            self.save_config()
+            return None
+        delay = 0.0
+        if packets is not None:
+            if any(len(packet) != (device.total_len + 1) * 3
+                   for device, packet in zip(self.devices.devices, packets)):
+                self.log("灯珠数已修改，与放映文件不一致，停止放映", LEVEL_ERROR)
+                self.stop_show()
+                return None
+            # 数据包直接引用映射区，发送线程写完后不归还缓冲池
+            links = self.devices.send_all(packets)
+            self._mark_first_packet()
+            self.metrics.record_frame(interval, time.perf_counter() - render_start)
+            delay = self.pacer.next_delay_for(links, time.time() - now)
+        return max(delay, self.player.next_frame_delay())
+
+    def _mark_first_packet(self):
+        """启动耗时：第一帧渲染完成、第一帧交给已打开的串口"""
+        if self.startup.pending('first_packet'):
+            self.startup.mark('first_frame')
+            if any(device.writer.is_open for device in self.devices.devices):
+                self.startup.mark('first_packet')
+
+    def audio_levels(self):
+        """返回 (频带电平, 新音频块的采集时刻)，首次调用时打开音频来源，不可用时返回 (None, None)"""
+        if self.audio_failed:
+            return None, None
+        if self.audio is None:
+            from ledcore.audio import AudioInput, open_audio_source
+            try:
+                source = open_audio_source(self.audio_source, block_size=self.audio_block)
+                self.audio = AudioInput(source, self.audio_block)
+            except Exception as e:
+                self.log(f"音频输入打开失败: {e}", LEVEL_ERROR)
+                self.audio_failed = True
+                return None, None
+            self.audio.start()
+            stats = self.audio.stats()
+            self.log(f"音频输入 {self.audio_source}：{stats['sample_rate']}Hz，"
+                     f"每块 {self.audio_block} 点（{stats['block_ms']:.1f}ms）")
+        if not self.audio.running:
+            self.log(f"音频输入停止: {self.audio.error}", LEVEL_ERROR)
+            self.stop_audio()
+            self.audio_failed = True
+            return None, None
+        return self.audio.take()
+
+    def stop_audio(self):
+        if self.audio is not None:
+            self.audio.stop()
+            self.audio = None
+
+    # ---- 放映文件 ----
+
+    def play_show(self, paths, loop=True):
+        """按播放列表播放放映文件，文件与当前设备布局不符时抛出 ValueError"""
+        player = ShowPlayer(paths, loop)
+        try:
+            player.check_layout(self.devices.devices)
+        except Exception:
+            player.close()
+            raise
+        self.stop_show(save=False)
+        self.player = player
+        self.show_playlist = list(paths)
+        self.show_loop = loop
+        self.save_config()
+        self.log(f"开始放映 {len(paths)} 个文件" + ("（循环）" if loop else ""))
+
+    def stop_show(self, save=True):
+        """停止放映，恢复实时渲染"""
+        if self.player is not None:
+            self.player.close()
+            self.player = None
+            self.log("停止放映")
+        if save:
+            self.show_playlist = []
+            self.save_config()
+
+    def control_show(self, values):
+        """网络接口 POST /api/show：播放列表、跳转、切换和停止，返回状态"""
+        if 'playlist' in values:
+            playlist = values['playlist']
+            if not isinstance(playlist, list) or not all(isinstance(p, str) for p in playlist):
+                raise ValueError("playlist 必须是文件路径列表")
+            self.play_show(playlist, bool(values.get('loop', True)))
+        if values.get('stop'):
+            self.stop_show()
+        elif any(key in values for key in ('select', 'next', 'seek')):
+            if self.player is None:
+                raise ValueError("当前没有在放映")
+            if 'select' in values:
+                self.player.select(values['select'])
+            if values.get('next'):
+                self.player.next()
+            if 'seek' in values:
+                if not isinstance(values['seek'], (int, float)):
+                    raise ValueError("seek 必须是秒数")
+                self.player.seek(values['seek'])
+        return self.state()
+
+    def start_recording(self, path, fps=30):
+        """把之后发送的每一帧按 fps 录制到放映文件"""
+        self.stop_recording()
+        self.recorder = ShowRecorder(path, self.devices.devices, fps)
+        self.log(f"开始录制放映文件 {path}")
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        recorder, self.recorder = self.recorder, None
+        recorder.close()
+        self.log(f"录制结束，共 {recorder.writer.frame_count} 帧")
+
+    def capture_frame(self):
+        """取后台线程采集的最新一帧画面，没有可用画面时返回 None（各设备改用自定义颜色）"""
+        if not self.capture_source or self.capture_failed:
+            return None
+
+        from ledcore import ambilight
+        if self.frame_source is None:
+            spec = self.capture_source
+            self.frame_source = ambilight.CaptureThread(lambda: ambilight.open_source(spec))
+            # 刚打开时等待第一帧，避免先闪一帧自定义颜色
+            frame = self.frame_source.latest(timeout=1.0)
+        else:
+            frame = self.frame_source.latest()
+        if self.frame_source.error is not None:
+            self.log(f"画面采集失败: {self.frame_source.error}", LEVEL_ERROR)
+            self.capture_failed = True
+            self.stop_capture()
+            return None
+        return frame
+
+    def stop_capture(self):
+        if self.frame_source is not None:
+            self.frame_source.close()
+            self.frame_source = None
+
+    # ---- 串口 ----
+
+    def ports_paused(self):
+        """所有设备的串口都已打开时暂停枚举，有串口断开后再恢复"""
+        return self.primary.writer.is_open and all(
+            device.writer.is_open for device in self.devices.devices[1:] if device.port)
+
+    def poll_ports(self):
+        """枚举一次串口，列表变化时自动重连上次使用的串口，返回列表是否变化
+
+        枚举失败时抛出异常。
+        """
+        changed = self.port_discovery.poll()
+        if changed and self.auto_reconnect:
+            # 上次使用的串口重新插入时自动重连
+            added = self.port_discovery.added
+            primary = self.primary
+            if (not self.user_disconnected and not primary.writer.is_open
+                    and primary.port in added):
+                self.log(f"检测到串口 {primary.port}，自动重连")
+                self.open_device(primary)
+            for device in self.devices.devices[1:]:
+                if not device.writer.is_open and device.port in added:
+                    self.log(f"{device}: 检测到串口 {device.port}，自动连接")
+                    self.open_device(device)
+        return changed
+
+    def open_saved_ports(self):
+        """启动时直接打开各设备上次使用的串口，不等串口枚举，返回打开的数量
+
+        打开失败的设备之后由 poll_ports() 在串口出现时自动重连。
+        """
+        opened = 0
+        for device in self.devices.devices:
+            if device.port and not device.writer.is_open:
+                opened += self.open_device(device)
+        self.startup.mark('ports')
+        return opened
+
+    def open_device(self, device, port=None):
+        """打开设备的串口（默认为上次使用的串口），返回是否成功"""
+        prefix = self.device_prefix(device)
+        old_port = device.port
+        try:
+            device.open(port)
+        except Exception as e:
+            self.log(f"{prefix}串口操作失败: {e}", LEVEL_ERROR)
+            self._notify_connection(device, STATUS_FAILED)
+            return False
+        self.log(f"{prefix}打开串口成功")
+        if device.port != old_port:
+            self.save_config()
+        self._notify_connection(device, STATUS_CONNECTED)
+        return True
+
+    def set_baudrate(self, device, baudrate):
+        """修改设备波特率，串口已打开时按新波特率重新打开"""
+        if baudrate == device.baudrate:
+            return
+        device.baudrate = baudrate
+        self.log(f"{self.device_prefix(device)}波特率改为 {baudrate}")
+        if device.writer.is_open:
+            self.close_device(device)
+            self.open_device(device)
+
+    def close_device(self, device, status=STATUS_CLOSED):
+        """关闭设备的串口并恢复串口检测"""
+        prefix = self.device_prefix(device)
+        try:
+            device.writer.close()
+            self.log(f"{prefix}关闭串口成功")
+        except Exception as e:
+            self.log(f"{prefix}串口操作失败: {e}", LEVEL_ERROR)
+
+        # 强制下次检测时重新比较完整的串口列表
+        self.port_discovery.ports = None
+        self.port_discovery.reset()
+        self._notify_connection(device, status)
+
+    def _notify_connection(self, device, status):
+        self.wake()
+        if self.on_connection is not None:
+            self.on_connection(device, status)
+
+    def on_serial_error(self, device, error):
+        """发送线程报告的串口错误，切回引擎线程处理"""
+        self.call_soon(lambda: self.handle_serial_error(device, error))
+
+    def on_protocol_negotiated(self, device, caps):
+        """发送线程报告的协议协商结果"""
+        prefix = self.device_prefix(device)
+        if caps:
+            message = f"{prefix}控制器支持压缩协议扩展 (0x{caps:02X})"
+        else:
+            message = f"{prefix}控制器不支持压缩协议扩展，使用原协议"
+        self.call_soon(lambda: self.log(message))
+        self.wake()
+
+    def handle_serial_error(self, device, error):
+        """记录串口错误，设备已被拔出时关闭串口，等待重新插入后自动重连"""
+        prefix = self.device_prefix(device)
+        self.log(f"{prefix}串口发送错误: {error}", LEVEL_ERROR)
+        if not device.writer.is_open:
+            return
+        try:
+            present = self.port_discovery.is_present(device.port)
+        except Exception:
+            present = True
+        if not present:
+            self.log(f"{prefix}串口 {device.port} 已断开，等待重新连接", LEVEL_ERROR)
+            self.close_device(device, STATUS_UNPLUGGED)
+
+    def start_network(self, host=None, api_port=None, ddp_port=None):
+        """启动局域网控制接口，参数默认取配置文件中的值，端口为0的服务不启动"""
+        from ledcore.netapi import NetworkServer
+
+        host = self.api_host if host is None else host
+        api_port = self.api_port if api_port is None else api_port
+        ddp_port = self.ddp_port if ddp_port is None else ddp_port
+        if not api_port and not ddp_port:
+            return None
+        self.network = NetworkServer(self, host, api_port or None, ddp_port or None)
+        try:
+            self.network.start()
+        except OSError as e:
+            self.network = None
+            self.log(f"网络接口启动失败: {e}", LEVEL_ERROR)
+            return None
+        if self.network.http_address:
+            self.log(f"控制接口 http://{self.network.http_address[0]}:{self.network.http_address[1]}/api/state")
+        if self.network.ddp_address:
+            self.log(f"DDP帧接收 udp://{self.network.ddp_address[0]}:{self.network.ddp_address[1]}")
+        self.startup.mark('network')
+        return self.network
+
+    def close(self):
+        """停止网络接口和发送线程、关闭串口并保存配置"""
+        if self.network is not None:
+            self.network.stop()
+            self.network = None
+        self.stop_recording()
+        self.stop_audio()
+        self.stop_capture()
+        self.devices.stop()
+        if self.player is not None:
+            self.player.close()
+            self.player = None
+        try:
+            self.config_store.close()
+        except Exception as e:
+            self.log(f"保存配置失败: {e}", LEVEL_ERROR)
+        self.log_buffer.disable_file()
+
+    # ---- 无界面运行 ----
+
+    def _queue_call(self, fn):
+        self._calls.append(fn)
+        self._wake.set()
+
+    def run(self, duration=None, first_delay=0.0):
+        """在当前线程中循环渲染，直到 stop() 或运行 duration 秒后返回
+
+        调用方已经先 tick() 过一次时，把它的返回值作为 first_delay 传入，保持帧间隔。
+        """
+        self._running = True
+        deadline = None if duration is None else time.monotonic() + duration
+        next_port_check = 0.0
+        next_frame = time.monotonic() + first_delay
+        while self._running:
+            # 后台线程的回调会提前唤醒循环，但不会打乱帧间隔
+            self._wake.clear()
+            while self._calls:
+                try:
+                    self._calls.popleft()()
+                except Exception as e:
+                    # 单个回调出错不能让无界面的渲染循环退出
+                    self.log(f"回调错误: {e}", LEVEL_ERROR)
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if self.has_serial and not self.ports_paused() and now >= next_port_check:
+                try:
+                    self.poll_ports()
+                except Exception as e:
+                    self.log(f"串口检测错误: {e}", LEVEL_ERROR)
+                # 串口列表不变时逐步降低枚举频率
+                next_port_check = now + self.port_discovery.interval
+
+            if self._woken:
+                # 空闲中被唤醒（设置修改、外部推送等）时立即渲染下一帧
+                self._woken = False
+                next_frame = min(next_frame, now)
+            if now >= next_frame:
+                next_frame = time.monotonic() + self.tick()
+            wait = next_frame - time.monotonic()
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+            if wait > 0:
+                self._wake.wait(wait)
+        self._running = False
+
+    def stop(self):
+        """让 run() 尽快返回（可在其他线程或信号处理函数中调用）"""
+        self._running = False
+        self._wake.set()
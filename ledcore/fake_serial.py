@@ -0,0 +1,131 @@
+"""串口模拟：无硬件时代替 serial.Serial（只用于测试和基准测试，引擎本身不导入）
+
+记录写入的字节，按波特率模拟传输耗时，并可按固定间隔或随机注入写入卡顿；
+卡顿超过 write_timeout 时与 pyserial 一样抛出 SerialTimeoutException。
+FakeDevice 在此基础上用协议参考解码器模拟控制器。
+"""
+import random
+import time
+
+from ledcore import protocol
+
+try:
+    from serial import SerialTimeoutException
+except ImportError:
+    class SerialTimeoutException(IOError):
+        """写入超时（未安装 pyserial 时的替代）"""
+
+
+class FakeSerial:
+    """回环串口
+
+    throttle 为 True 时每次写入按 “字节数 × 每字节位数 / 波特率” 阻塞；
+    每 stall_every 次写入（或以 stall_probability 的概率）额外阻塞 stall_time 秒。
+    written 保存最近 max_record 个写入的字节，stats() 返回累计统计。
+    """
+
+    def __init__(self, throttle=True, stall_every=0, stall_time=0.0, stall_probability=0.0,
+                 seed=None, max_record=1024 * 1024):
+        self.throttle = throttle
+        self.stall_every = stall_every
+        self.stall_time = stall_time
+        self.stall_probability = stall_probability
+        self.max_record = max_record
+        self._random = random.Random(seed)
+
+        self.port = None
+        self.baudrate = 115200
+        self.bytesize = 8
+        self.parity = 'N'
+        self.stopbits = 1
+        self.timeout = None
+        self.write_timeout = None
+        self.is_open = False
+
+        self.written = bytearray()
+        self.bytes_written = 0
+        self.writes = 0
+        self.stalls = 0
+        self.timeouts = 0
+        self.busy_time = 0.0
+        self._reply = bytearray()
+
+    @property
+    def bits_per_byte(self):
+        """起始位 + 数据位 + 校验位 + 停止位"""
+        return 1 + self.bytesize + (self.parity != 'N') + self.stopbits
+
+    def wire_time(self, nbytes):
+        return nbytes * self.bits_per_byte / self.baudrate
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def reset_input_buffer(self):
+        self._reply.clear()
+
+    def read(self, size=1):
+        out = bytes(self._reply[:size])
+        del self._reply[:size]
+        return out
+
+    def write(self, data):
+        if not self.is_open:
+            raise IOError("串口未打开")
+        nbytes = len(data)
+        delay = self.wire_time(nbytes) if self.throttle else 0.0
+        self.writes += 1
+        if ((self.stall_every and self.writes % self.stall_every == 0)
+                or (self.stall_probability and self._random.random() < self.stall_probability)):
+            self.stalls += 1
+            delay += self.stall_time
+        if self.write_timeout is not None and delay > self.write_timeout:
+            time.sleep(self.write_timeout)
+            self.busy_time += self.write_timeout
+            self.timeouts += 1
+            raise SerialTimeoutException("Write timeout")
+        if delay > 0:
+            time.sleep(delay)
+            self.busy_time += delay
+
+        self.bytes_written += nbytes
+        if self.max_record:
+            self.written += memoryview(data)
+            if len(self.written) > self.max_record:
+                del self.written[:len(self.written) - self.max_record]
+        self._received(data)
+        return nbytes
+
+    def _received(self, data):
+        """子类可在此模拟控制器对写入数据的处理"""
+
+    def stats(self):
+        return {
+            'writes': self.writes,
+            'bytes_written': self.bytes_written,
+            'stalls': self.stalls,
+            'timeouts': self.timeouts,
+            'busy_time': self.busy_time,
+        }
+
+
+class FakeDevice(FakeSerial):
+    """用参考解码器模拟的串口控制器，可替代 serial.Serial 进行无硬件测试
+
+    默认不限速；限速与写入卡顿的参数见 FakeSerial。
+    """
+
+    def __init__(self, caps=protocol.CAP_ALL, throttle=False, **kwargs):
+        super().__init__(throttle=throttle, **kwargs)
+        self.caps = caps
+        self.decoder = protocol.ReferenceDecoder()
+
+    def _received(self, data):
+        if bytes(data) == protocol.QUERY:
+            if self.caps:
+                self._reply += bytes([protocol.CMD_QUERY, self.caps])
+            return
+        self.decoder.feed(data)
@@ -0,0 +1,112 @@
+"""定长日志缓冲：合并重复消息、限制速率，可选滚动写入文件"""
+import collections
+import time
+
+LEVEL_INFO = 0
+LEVEL_ERROR = 1
+LEVEL_SUCCESS = 2
+
+# logging.INFO / logging.ERROR；logging 只在启用日志文件时导入，不拖慢启动
+_FILE_LEVELS = {
+    LEVEL_INFO: 20,
+    LEVEL_ERROR: 40,
+    LEVEL_SUCCESS: 20,
+}
+
+
+class LogEntry:
+    """一条日志，重复出现时只增加计数"""
+
+    __slots__ = ('message', 'level', 'time', 'count')
+
+    def __init__(self, message, level, timestamp):
+        self.message = message
+        self.level = level
+        self.time = timestamp
+        self.count = 1
+
+    def text(self):
+        """带重复次数和时间的显示文本"""
+        str_time = time.strftime('%H:%M:%S', time.localtime(self.time))
+        if self.count > 1:
+            return f"{self.message} ×{self.count}  @{str_time}"
+        return f"{self.message}  @{str_time}"
+
+
+class LogBuffer:
+    """固定容量的日志缓冲
+
+    - 超过 capacity 条时丢弃最旧的日志，内存占用恒定；
+    - 与上一条内容相同且间隔不超过 dedup_window 秒的消息合并为一条并计数；
+    - 每秒最多接收 max_per_second 条新日志，超出部分只计数，
+      下一条被接收的日志前会插入“已省略N条日志”。
+    version 在内容变化时递增，界面据此判断是否需要刷新。
+    """
+
+    def __init__(self, capacity=500, dedup_window=10.0, max_per_second=20):
+        self.entries = collections.deque(maxlen=capacity)
+        self.dedup_window = dedup_window
+        self.max_per_second = max_per_second
+        self.version = 0
+        self.suppressed = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self._file_logger = None
+
+    def append(self, message, level=LEVEL_INFO, timestamp=None):
+        """追加一条日志，返回是否产生了新的一行"""
+        now = time.time() if timestamp is None else timestamp
+
+        last = self.entries[-1] if self.entries else None
+        if (last is not None and last.message == message and last.level == level
+                and now - last.time <= self.dedup_window):
+            last.count += 1
+            last.time = now
+            self.version += 1
+            return False
+
+        if now - self._window_start >= 1.0:
+            self._window_start = now
+            self._window_count = 0
+        if self._window_count >= self.max_per_second:
+            self.suppressed += 1
+            return False
+        self._window_count += 1
+
+        if self.suppressed:
+            self.entries.append(LogEntry(f"已省略{self.suppressed}条日志", LEVEL_ERROR, now))
+            self.suppressed = 0
+        self.entries.append(LogEntry(message, level, now))
+        self.version += 1
+        if self._file_logger is not None:
+            # 合并掉的重复消息和被限速的消息不写文件，减少闪存写入
+            self._file_logger.log(_FILE_LEVELS.get(level, 20), message)
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.version += 1
+
+    def enable_file(self, path, max_bytes=1024 * 1024, backup_count=3):
+        """同时写入按大小滚动的日志文件，path 为空时关闭"""
+        self.disable_file()
+        if not path:
+            return
+        import logging
+        import logging.handlers
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger = logging.getLogger(f'ledcontrol.log.{id(self)}')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._file_logger = logger
+
+    def disable_file(self):
+        if self._file_logger is None:
+            return
+        for handler in list(self._file_logger.handlers):
+            self._file_logger.removeHandler(handler)
+            handler.close()
+        self._file_logger = None
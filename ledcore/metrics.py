@@ -0,0 +1,143 @@
+"""运行统计：帧间隔、渲染耗时、串口写入耗时、数据源到串口的延迟、吞吐量和丢帧数"""
+import collections
+import csv
+import json
+import time
+
+
+def percentile(sorted_values, p):
+    """已排序序列的百分位数（线性插值）"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(values):
+    """返回均值与 p50/p95/p99，单位与输入相同"""
+    values = sorted(values)
+    if not values:
+        return {'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    return {
+        'avg': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+    }
+
+
+def _to_ms(stats):
+    return {k: v * 1000.0 for k, v in stats.items()}
+
+
+class FrameMetrics:
+    """滚动窗口统计
+
+    record_frame 在渲染循环中调用，record_write / record_drop 在串口
+    发送线程中调用；deque 的追加在CPython中是原子操作，无需额外加锁。
+    """
+
+    def __init__(self, window=300):
+        self.window = window
+        self.idle = False  # 输出不变，渲染循环只定期重发
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self._intervals = collections.deque(maxlen=self.window)
+        self._render_times = collections.deque(maxlen=self.window)
+        self._writes = collections.deque(maxlen=self.window)  # (时间戳, 字节数, 耗时)
+        self._latencies = collections.deque(maxlen=self.window)
+
+    def record_frame(self, interval, render_time):
+        """记录一帧：与上一帧的间隔、渲染耗时（秒）"""
+        self.frames += 1
+        if interval > 0:
+            self._intervals.append(interval)
+        self._render_times.append(render_time)
+
+    def set_idle(self, idle):
+        """进入空闲时清空帧间隔统计，帧率只反映实际在变化的输出"""
+        if idle and not self.idle:
+            self._intervals.clear()
+        self.idle = idle
+
+    def record_write(self, nbytes, write_time):
+        """记录一次串口写入：字节数、写入耗时（秒）"""
+        self._writes.append((time.time(), nbytes, write_time))
+
+    def record_latency(self, latency):
+        """记录一帧从数据源（如音频块采集完成）到串口写完的延迟（秒）"""
+        self._latencies.append(latency)
+
+    def record_drop(self, count=1):
+        self.dropped += count
+
+    def record_error(self):
+        self.write_errors += 1
+
+    def bytes_per_second(self):
+        writes = list(self._writes)
+        if len(writes) < 2:
+            return 0.0
+        span = writes[-1][0] - writes[0][0]
+        if span <= 0:
+            return 0.0
+        # 第一笔写入落在统计区间起点，不计入
+        return sum(w[1] for w in writes[1:]) / span
+
+    def snapshot(self):
+        """返回当前统计结果，时间单位为毫秒"""
+        intervals = summarize(list(self._intervals))
+        fps = 1.0 / intervals['avg'] if intervals['avg'] > 0 else 0.0
+        return {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()),
+            'frames': self.frames,
+            'idle': self.idle,
+            'fps': fps,
+            'frame_interval_ms': _to_ms(intervals),
+            'render_ms': _to_ms(summarize(list(self._render_times))),
+            'write_ms': _to_ms(summarize([w[2] for w in list(self._writes)])),
+            'latency_ms': _to_ms(summarize(list(self._latencies))),
+            'bytes_per_sec': self.bytes_per_second(),
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+        }
+
+    def summary_text(self):
+        """界面上显示的简要统计"""
+        s = self.snapshot()
+        text = (f"FPS {s['fps']:.1f} | 渲染 {s['render_ms']['avg']:.2f}ms"
+                f" | 写入 {s['write_ms']['avg']:.1f}ms/p95 {s['write_ms']['p95']:.1f}"
+                f" | {s['bytes_per_sec'] / 1024:.1f}KB/s | 丢帧 {s['dropped']}")
+        if self.idle:
+            text = "空闲 | " + text
+        if self._latencies:
+            text += f" | 延迟 {s['latency_ms']['p50']:.0f}ms/p95 {s['latency_ms']['p95']:.0f}"
+        return text
+
+    def dump(self, path):
+        """导出统计结果，按扩展名选择 .json 或 .csv"""
+        s = self.snapshot()
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['metric', 'avg', 'p50', 'p95', 'p99'])
+                for key in ('frame_interval_ms', 'render_ms', 'write_ms', 'latency_ms'):
+                    d = s[key]
+                    writer.writerow([key, d['avg'], d['p50'], d['p95'], d['p99']])
+                for key in ('fps', 'bytes_per_sec', 'frames', 'dropped', 'write_errors'):
+                    writer.writerow([key, s[key], '', '', ''])
+        else:
+            s['samples'] = {
+                'frame_interval_ms': [v * 1000.0 for v in list(self._intervals)],
+                'render_ms': [v * 1000.0 for v in list(self._render_times)],
+                'latency_ms': [v * 1000.0 for v in list(self._latencies)],
+                'writes': [{'time': t, 'bytes': n, 'ms': d * 1000.0} for t, n, d in list(self._writes)],
+            }
+            with open(path, 'w') as f:
+                json.dump(s, f, indent=4)
@@ -0,0 +1,182 @@
+"""局域网控制接口：HTTP/JSON 修改设置，UDP(DDP) 或 HTTP 推送像素帧
+
+服务运行在独立线程的 asyncio 事件循环中，不占用界面线程；
+设置修改通过 engine.call_soon 切换到引擎线程执行，像素帧直接写入
+engine.stream（有界缓冲，只保留最新一帧），并唤醒空闲中的渲染循环。
+
+HTTP 接口（每个请求一个连接，返回JSON）：
+    GET  /api/state       当前设置、设备列表和运行统计
+    POST /api/settings    修改设置，如 {"check_run": true, "color_mode": 3, "device": 0}
+    POST /api/frame       请求体为原始RGB数据（所有设备的灯珠按顺序拼接）
+    POST /api/show        放映文件，如 {"playlist": ["a.show"], "loop": true}、
+                          {"seek": 12.5}、{"select": 1}、{"next": true}、{"stop": true}
+"""
+import asyncio
+import concurrent.futures
+import json
+import threading
+
+from ledcore.log_buffer import LEVEL_ERROR
+from ledcore.stream import DDP_PORT
+
+MAX_BODY = 1024 * 1024
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _DdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, engine):
+        self.engine = engine
+
+    def datagram_received(self, data, addr):
+        if self.engine.stream.feed_ddp(data):
+            self.engine.wake()
+
+
+class NetworkServer:
+    """HTTP 控制接口与 DDP 帧接收服务
+
+    http_port/ddp_port 为 None 时不启动对应服务，为0时由系统分配端口；
+    start() 返回后端口已绑定，实际地址见 http_address/ddp_address。
+    """
+
+    def __init__(self, engine, host='127.0.0.1', http_port=None, ddp_port=DDP_PORT):
+        self.engine = engine
+        self.host = host
+        self.http_port = http_port
+        self.ddp_port = ddp_port
+        self.http_address = None
+        self.ddp_address = None
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._transport = None
+
+    def start(self):
+        """在后台线程中启动服务，绑定失败时抛出异常"""
+        started = concurrent.futures.Future()
+        self._thread = threading.Thread(target=self._run, args=(started,),
+                                        name='NetworkServer', daemon=True)
+        self._thread.start()
+        started.result()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._loop = None
+        self._thread = None
+
+    def _run(self, started):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._bind(loop))
+        except Exception as e:
+            loop.close()
+            started.set_exception(e)
+            return
+        self._loop = loop
+        started.set_result(None)
+        try:
+            loop.run_forever()
+        finally:
+            if self._server is not None:
+                self._server.close()
+            if self._transport is not None:
+                self._transport.close()
+            loop.close()
+
+    async def _bind(self, loop):
+        if self.http_port is not None:
+            self._server = await asyncio.start_server(self._handle_http, self.host, self.http_port)
+            self.http_address = self._server.sockets[0].getsockname()[:2]
+        if self.ddp_port is not None:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DdpProtocol(self.engine), local_addr=(self.host, self.ddp_port))
+            self.ddp_address = self._transport.get_extra_info('sockname')[:2]
+
+    def _call(self, fn):
+        """在引擎线程中执行 fn，返回可等待的结果"""
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+        self.engine.call_soon(run)
+        return asyncio.wrap_future(future)
+
+    async def _handle_http(self, reader, writer):
+        try:
+            try:
+                status, body = 200, await self._dispatch(reader)
+            except HttpError as e:
+                status, body = e.status, {'error': str(e)}
+            except (ValueError, TypeError, KeyError) as e:
+                status, body = 400, {'error': str(e)}
+            except Exception as e:
+                status, body = 500, {'error': str(e)}
+                self.engine.call_soon(lambda: self.engine.log(f"网络接口错误: {e}", LEVEL_ERROR))
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                         f"Content-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('ascii') + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            raise HttpError(400, "无效的请求")
+        method, path = request_line[0], request_line[1].split('?')[0]
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        if length > MAX_BODY:
+            raise HttpError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b''
+
+        engine = self.engine
+        if path == '/api/state':
+            if method != 'GET':
+                raise HttpError(405, "只支持GET")
+            return await self._call(engine.state)
+        if path == '/api/settings':
+            if method != 'POST':
+                raise HttpError(405, "只支持POST")
+            values = json.loads(body or b'{}')
+            if not isinstance(values, dict):
+                raise ValueError("设置必须是JSON对象")
+            return await self._call(lambda: engine.apply_settings(values))
+        if path == '/api/show':
+            if method != 'POST':
+                raise HttpError(405, "只支持POST")
+            values = json.loads(body or b'{}')
+            if not isinstance(values, dict):
+                raise ValueError("请求必须是JSON对象")
+            return await self._call(lambda: engine.control_show(values))
+        if path == '/api/frame':
+            if method != 'POST':
+                raise HttpError(405, "只支持POST")
+            engine.stream.feed_frame(body)
+            engine.wake()
+            return {'frames': engine.stream.frames, 'dropped': engine.stream.dropped}
+        raise HttpError(404, f"未知路径: {path}")
@@ -0,0 +1,106 @@
+"""输出级：每帧写入数据包前的颜色顺序、伽马/亮度校正和电流限制
+
+颜色校正是每个通道一张256项查找表（伽马、亮度、白平衡增益合并在一起），
+按颜色顺序写入数据包后在数据包上原地查表；电流限制按整帧亮度估算电流，
+超出预算时再用一张按比例缩放的查找表整体压暗。每帧只有几次原地数组运算，
+参数都是默认值时跳过查表，输出与原来逐字节相同。
+"""
+import numpy as np
+
+from ledcore import render
+
+# WS2812 一类灯珠每个通道满亮度约20mA
+DEFAULT_LED_CURRENT = 0.06
+
+
+def build_luts(gamma=1.0, brightness=1.0, gain=(1.0, 1.0, 1.0)):
+    """按RGB通道顺序返回 (3, 256) 的 uint8 查找表"""
+    levels = (np.arange(256, dtype=np.float64) / 255) ** gamma
+    luts = np.empty((3, 256), dtype=np.uint8)
+    for c in range(3):
+        luts[c] = np.clip(np.rint(levels * 255 * brightness * gain[c]), 0, 255)
+    return luts
+
+
+class OutputStage:
+    """一台设备的输出级
+
+    configure() 在参数变化时重建查找表（每帧调用，参数不变时只比较一次元组）；
+    apply() 把 (N, 3) RGB 帧写入数据包并完成校正和限流。
+    current 为上一帧限流前估算的电流（安培，不限流时也计算），scale 为限流比例，
+    limited 为被限流的帧数。
+    """
+
+    def __init__(self):
+        self._key = None
+        self._order = render.GRB_ORDER
+        self._luts = None
+        self._shared = True
+        self._identity = True
+        self._index = np.zeros(0, dtype=np.intp)
+        self._offsets = np.zeros(0, dtype=np.intp)
+        self._ramp = np.arange(256, dtype=np.float64)
+        self._scaled = np.zeros(256, dtype=np.float64)
+        self._scale_lut = np.zeros(256, dtype=np.uint8)
+        self.current = 0.0
+        self.scale = 1.0
+        self.limited = 0
+
+    def configure(self, color_order='GRB', gamma=1.0, brightness=1.0, gain=(1.0, 1.0, 1.0)):
+        """设置颜色顺序和校正参数，无效时抛出 ValueError"""
+        key = (color_order, gamma, brightness, tuple(gain))
+        if key == self._key:
+            return
+        if gamma <= 0 or brightness < 0 or len(gain) != 3 or min(gain) < 0:
+            raise ValueError("gamma 必须大于0，brightness 和 gain 不能为负")
+        order = render.channel_order(color_order)
+        luts = build_luts(gamma, brightness, gain)
+        # 查找表按数据包中的通道顺序排列
+        self._luts = np.ascontiguousarray(luts[order])
+        self._order = order
+        self._shared = bool((self._luts == self._luts[0]).all())
+        self._identity = self._shared and bool((self._luts[0] == np.arange(256)).all())
+        self._key = key
+
+    def _lookup(self, flat, luts):
+        """在数据包的像素区原地查表
+
+        luts 为一张256项的表时所有通道共用；为 (3, 256) 时三张表首尾相接，
+        下标按通道加上 0/256/512，仍然只做一次连续的 np.take。
+        """
+        index = self._indices(flat)
+        if luts.ndim > 1:
+            np.add(index, self._offsets, out=index)
+            luts = luts.reshape(-1)
+        np.take(luts, index, out=flat, mode='clip')
+
+    def _indices(self, flat):
+        """把像素区复制到预分配的 intp 数组
+
+        np.take 直接用 uint8 下标、写入跨步视图，或 uint8 与 intp 混合运算时
+        都会在每帧分配临时缓冲区，统一转成 intp 后再运算就没有额外分配。
+        """
+        if len(self._index) != len(flat):
+            self._index = np.zeros(len(flat), dtype=np.intp)
+            self._offsets = np.tile(np.arange(0, 768, 256, dtype=np.intp), len(flat) // 3)
+        np.copyto(self._index, flat)
+        return self._index
+
+    def apply(self, packet, rgb, max_current=0.0, led_current=DEFAULT_LED_CURRENT):
+        """写入一帧；max_current（安培）大于0时估算的电流超出预算则整体压暗"""
+        render.write_pixels(packet, rgb, self._order)
+        flat = packet[render.HEADER_LEN:]
+        if not self._identity:
+            self._lookup(flat, self._luts[0] if self._shared else self._luts)
+
+        # 电流与各通道亮度之和近似成正比；不限流时也估算，state() 总是反映当前帧
+        self.scale = 1.0
+        self.current = int(self._indices(flat).sum()) / (255 * 3) * led_current if len(flat) else 0.0
+        if max_current > 0:
+            if self.current > max_current:
+                self.scale = max_current / self.current
+                np.multiply(self._ramp, self.scale, out=self._scaled)
+                np.copyto(self._scale_lut, self._scaled, casting='unsafe')
+                self._lookup(flat, self._scale_lut)
+                self.limited += 1
+        return packet
@@ -0,0 +1,58 @@
+"""按串口波特率计算帧间隔，使帧生成速度与链路能力匹配"""
+
+# 8N1：每字节1个起始位、8个数据位、1个停止位
+BITS_PER_BYTE = 10
+
+
+def wire_time(packet_len, baudrate, bits_per_byte=BITS_PER_BYTE):
+    """一帧数据在串口线上传输所需的秒数"""
+    return packet_len * bits_per_byte / baudrate
+
+
+def max_fps(packet_len, baudrate, bits_per_byte=BITS_PER_BYTE):
+    """给定包长和波特率下链路能承载的最高帧率"""
+    return baudrate / (packet_len * bits_per_byte)
+
+
+def max_fps_for_leds(total_len, baudrate, bits_per_byte=BITS_PER_BYTE):
+    """按原协议完整帧（3字节帧头 + 每颗灯珠3字节）计算的最高帧率"""
+    return max_fps(total_len * 3 + 3, baudrate, bits_per_byte)
+
+
+class FramePacer:
+    """帧调度器
+
+    帧间隔取“链路传输一帧所需时间”和“目标帧率对应间隔”中较大者，
+    再扣除本帧渲染已耗用的时间；target_fps 为 0 时只受链路限制。
+    停止运行时按 idle_interval 低频轮询。
+    """
+
+    def __init__(self, baudrate=115200, target_fps=0, idle_interval=1.0, min_interval=0.005):
+        self.baudrate = baudrate
+        self.target_fps = target_fps
+        self.idle_interval = idle_interval
+        self.min_interval = min_interval
+
+    def frame_interval(self, packet_len, baudrate=None):
+        """两帧之间的目标间隔（秒），baudrate 默认为调度器的波特率"""
+        interval = max(wire_time(packet_len, baudrate or self.baudrate), self.min_interval)
+        if self.target_fps > 0:
+            interval = max(interval, 1.0 / self.target_fps)
+        return interval
+
+    def achievable_fps(self, packet_len, baudrate=None):
+        return 1.0 / self.frame_interval(packet_len, baudrate)
+
+    def next_delay(self, packet_len, elapsed=0.0, baudrate=None):
+        """本帧结束后距离下一帧应等待的秒数，elapsed 为本帧已耗用时间"""
+        return max(self.frame_interval(packet_len, baudrate) - elapsed, 0.0)
+
+    def next_delay_for(self, links, elapsed=0.0):
+        """多个串口同时输出时，按最快的链路安排下一帧；links 为 (包长, 波特率) 列表
+
+        较慢的链路来不及发送的帧由各自发送线程的“新帧优先”队列丢弃，
+        一个慢串口不会拖慢其他设备。
+        """
+        if not links:
+            return self.idle_interval
+        return min(self.next_delay(length, elapsed, baudrate) for length, baudrate in links)
@@ -0,0 +1,54 @@
+"""串口发现：缓存串口列表，只在列表变化时通知，无变化时逐步降低枚举频率"""
+import time
+
+
+def list_serial_ports():
+    """枚举系统串口，返回设备名列表"""
+    import serial.tools.list_ports
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+class PortDiscovery:
+    """串口发现服务
+
+    poll() 枚举一次串口并与缓存比较，返回列表是否变化；
+    列表不变时下次枚举间隔 interval 加倍，直到 max_interval，
+    发生变化后恢复为 min_interval，插拔设备仍能较快响应。
+    串口打开期间由调用方暂停轮询。
+    """
+
+    def __init__(self, enumerate_ports=list_serial_ports, min_interval=1.0, max_interval=8.0):
+        self.enumerate_ports = enumerate_ports
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.ports = None
+        self.added = set()
+        self.removed = set()
+        self.last_scan = 0.0
+
+    def poll(self):
+        """枚举一次串口，返回列表是否发生变化"""
+        ports = sorted(self.enumerate_ports())
+        self.last_scan = time.monotonic()
+        old = set(self.ports or [])
+        if ports == self.ports:
+            self.added = set()
+            self.removed = set()
+            self.interval = min(self.interval * 2, self.max_interval)
+            return False
+        self.added = set(ports) - old
+        self.removed = old - set(ports)
+        self.ports = ports
+        self.interval = self.min_interval
+        return True
+
+    def reset(self):
+        """恢复最短枚举间隔（例如关闭串口后）"""
+        self.interval = self.min_interval
+
+    def is_present(self, port, max_age=1.0):
+        """port 是否仍然存在，缓存超过 max_age 秒时重新枚举"""
+        if self.ports is None or time.monotonic() - self.last_scan > max_age:
+            self.poll()
+        return port in self.ports
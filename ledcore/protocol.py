@@ -0,0 +1,179 @@
+"""串口协议扩展：跳过重复帧、游程编码和整体旋转命令
+
+原协议每帧发送 0x28, 长度高字节, 长度低字节, 之后每颗灯珠G、R、B三字节。
+扩展命令（控制器需在协商时声明支持）：
+
+    0x29 n_hi n_lo {count G R B}...   游程编码帧，count 为1~255，直到填满n颗灯珠
+    0x2A k_hi k_lo                    将上一帧整体旋转k颗：new[i] = old[(i + k) % n]
+    0x2F 0x00 0x00                    协商请求，控制器回复 0x2F caps
+
+caps 各位：CAP_RLE 支持0x29，CAP_ROTATE 支持0x2A，CAP_SKIP 允许画面不变时
+不发送数据。控制器无回复时按原协议发送，保证旧固件可用。
+"""
+import numpy as np
+
+from ledcore import render
+
+CMD_FRAME = 0x28
+CMD_RLE = 0x29
+CMD_ROTATE = 0x2A
+CMD_QUERY = 0x2F
+
+CAP_RLE = 0x01
+CAP_ROTATE = 0x02
+CAP_SKIP = 0x04
+CAP_ALL = CAP_RLE | CAP_ROTATE | CAP_SKIP
+
+QUERY = bytes([CMD_QUERY, 0, 0])
+
+
+def negotiate(ser, timeout=0.2):
+    """向控制器查询支持的扩展，无回复或回复无效时返回0（原协议）"""
+    old_timeout = ser.timeout
+    try:
+        ser.timeout = timeout
+        ser.reset_input_buffer()
+        ser.write(QUERY)
+        reply = ser.read(2)
+    finally:
+        ser.timeout = old_timeout
+    if len(reply) == 2 and reply[0] == CMD_QUERY:
+        return reply[1] & CAP_ALL
+    return 0
+
+
+def rle_runs(pixels):
+    """把 (N, 3) 的灯珠数据拆成游程，返回 (段数, 4) 的 [count, G, R, B] 数组"""
+    n = len(pixels)
+    key = (pixels[:, 0].astype(np.uint32) << 16) | (pixels[:, 1].astype(np.uint32) << 8) | pixels[:, 2]
+    starts = np.concatenate(([0], np.flatnonzero(key[1:] != key[:-1]) + 1))
+    lengths = np.diff(np.append(starts, n))
+    # 超过255的游程拆成多段
+    parts = (lengths + 254) // 255
+    run = np.repeat(np.arange(len(starts)), parts)
+    part_no = np.arange(len(run)) - np.repeat(np.cumsum(parts) - parts, parts)
+    out = np.empty((len(run), 4), dtype=np.uint8)
+    out[:, 0] = np.minimum(lengths[run] - part_no * 255, 255)
+    out[:, 1:] = pixels[starts[run]]
+    return out
+
+
+def find_rotation(prev, cur, max_candidates=16):
+    """若 cur 是 prev 整体旋转k颗的结果则返回k，否则返回 None"""
+    n = len(prev)
+    candidates = np.flatnonzero((prev == cur[0]).all(axis=1))
+    for k in candidates[:max_candidates]:
+        k = int(k)
+        if np.array_equal(cur[:n - k], prev[k:]) and np.array_equal(cur[n - k:], prev[:k]):
+            return k
+    return None
+
+
+class FrameEncoder:
+    """按控制器能力选择每帧最短的编码
+
+    encode() 在发送线程中对真正要发送的帧调用，返回要写入串口的数据，
+    画面不变且允许跳过时返回 None。每 keyframe_interval 帧强制发送一次
+    原协议完整帧，防止控制器状态因丢字节而长期错乱。
+    """
+
+    def __init__(self, caps=0, keyframe_interval=100):
+        self.keyframe_interval = keyframe_interval
+        self.reset(caps)
+
+    def reset(self, caps=0):
+        """重新设置控制器能力，并清除上一帧状态"""
+        self.caps = caps
+        self._prev = None
+        self._since_keyframe = 0
+        self.stats = {'full': 0, 'rle': 0, 'rotate': 0, 'skip': 0}
+
+    def encode(self, packet):
+        pixels = render.packet_pixels(packet)
+        prev = self._prev
+        keyframe = (prev is None or len(prev) != len(pixels)
+                    or self._since_keyframe >= self.keyframe_interval)
+        if not self.caps or keyframe:
+            return self._emit(pixels, 'full', packet)
+
+        if np.array_equal(pixels, prev):
+            if self.caps & CAP_SKIP:
+                self._since_keyframe += 1
+                self.stats['skip'] += 1
+                return None
+            if self.caps & CAP_ROTATE:
+                return self._emit(pixels, 'rotate', bytes([CMD_ROTATE, 0, 0]))
+
+        best_kind, best = 'full', packet
+        if self.caps & CAP_ROTATE:
+            k = find_rotation(prev, pixels)
+            if k is not None:
+                return self._emit(pixels, 'rotate', bytes([CMD_ROTATE, k // 256, k % 256]))
+        if self.caps & CAP_RLE:
+            runs = rle_runs(pixels)
+            if runs.size + 3 < len(packet):
+                best_kind = 'rle'
+                best = bytes([CMD_RLE, packet[1], packet[2]]) + runs.tobytes()
+        return self._emit(pixels, best_kind, best)
+
+    def _emit(self, pixels, kind, data):
+        if self._prev is None or self._prev.shape != pixels.shape:
+            self._prev = pixels.copy()
+        else:
+            self._prev[:] = pixels
+        self._since_keyframe = 0 if kind == 'full' else self._since_keyframe + 1
+        self.stats[kind] += 1
+        return data
+
+
+class ReferenceDecoder:
+    """协议参考解码器，按字节流还原控制器上的灯珠状态（GRB顺序）"""
+
+    def __init__(self):
+        self.pixels = None
+        self.frames = 0
+        self._buf = bytearray()
+
+    def feed(self, data):
+        """输入任意切分的字节流，返回本次解码出的帧数"""
+        self._buf += bytes(data)
+        decoded = 0
+        while self._buf:
+            used, is_frame = self._parse()
+            if used == 0:
+                break
+            del self._buf[:used]
+            decoded += is_frame
+        self.frames += decoded
+        return decoded
+
+    def _parse(self):
+        """解析缓冲区开头的一条命令，返回 (消耗字节数, 是否为一帧)，数据不完整时消耗0"""
+        buf = self._buf
+        if len(buf) < 3:
+            return 0, False
+        cmd, hi, lo = buf[0], buf[1], buf[2]
+        value = hi * 256 + lo
+        if cmd == CMD_FRAME:
+            size = 3 + value * 3
+            if len(buf) < size:
+                return 0, False
+            self.pixels = np.frombuffer(bytes(buf[3:size]), dtype=np.uint8).reshape(-1, 3).copy()
+            return size, True
+        if cmd == CMD_RLE:
+            pos, filled = 3, 0
+            while filled < value:
+                if len(buf) < pos + 4:
+                    return 0, False
+                filled += buf[pos]
+                pos += 4
+            runs = np.frombuffer(bytes(buf[3:pos]), dtype=np.uint8).reshape(-1, 4)
+            self.pixels = np.repeat(runs[:, 1:], runs[:, 0], axis=0)
+            return pos, True
+        if cmd == CMD_ROTATE:
+            if self.pixels is not None and len(self.pixels):
+                self.pixels = np.roll(self.pixels, -(value % len(self.pixels)), axis=0)
+            return 3, True
+        # 未知字节：丢弃一个字节重新同步
+        return 1, False
+
@@ -0,0 +1,197 @@
+"""帧渲染引擎：用NumPy整体数组运算生成灯条颜色并写入数据包"""
+import collections
+import math
+import threading
+
+import numpy as np
+
+# 数据包格式：0x28, 长度高字节, 长度低字节, 之后每颗灯珠3字节
+PACKET_HEAD = 0x28
+HEADER_LEN = 3
+MAX_LEDS = 0xFFFF  # 帧头长度字段为16位
+
+# 灯珠接收顺序是G、R、B
+GRB_ORDER = [1, 0, 2]
+
+# 流水灯颜色模式（与界面颜色模式下拉框的顺序一致）
+MODE_RAINBOW = 0
+MODE_SOLID = 1
+MODE_MULTI = 2
+
+
+def check_total_len(total_len):
+    """帧头用16位表示灯珠数，超出范围时抛出 ValueError"""
+    if not 0 < total_len <= MAX_LEDS:
+        raise ValueError(f"灯珠总数必须在1~{MAX_LEDS}之间（当前 {total_len}）")
+
+
+def new_packet(total_len):
+    """分配一帧数据包并写入帧头"""
+    check_total_len(total_len)
+    sendrgb = np.zeros((total_len + 1) * 3, dtype=np.uint8)
+    sendrgb[0] = PACKET_HEAD
+    sendrgb[1] = total_len // 256
+    sendrgb[2] = total_len % 256
+    return sendrgb
+
+
+class PacketPool:
+    """按灯条布局预分配、循环复用的数据包缓冲池
+
+    帧头只在分配时写一次。渲染循环 acquire() 取得空闲数据包，发送线程
+    写完或丢弃后 release() 归还。平时两块缓冲区轮换（一块渲染、一块发送），
+    串口积压时池中暂无空闲才补充分配，数量以发送队列长度为上限。
+    灯珠数变化时重新分配，旧布局的数据包归还时直接丢弃。
+    acquire() 与 release() 在不同线程中调用，检查长度和存取空闲列表都在锁内，
+    布局变化时旧长度的数据包不会在检查之后混入新的空闲列表。
+    """
+
+    def __init__(self, count=2):
+        self.count = count
+        self.total_len = None
+        self.allocated = 0
+        self._free = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, total_len):
+        """取得一块帧头已写好的数据包"""
+        with self._lock:
+            if total_len != self.total_len:
+                self._free.clear()
+                self.total_len = total_len
+                for _ in range(self.count):
+                    self._free.append(new_packet(total_len))
+                self.allocated = self.count
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return new_packet(total_len)
+
+    def release(self, packet):
+        """归还数据包，布局已变化的直接丢弃
+
+        只回收自己分配的数组，放映文件映射区的只读视图等外部数据包直接忽略。
+        """
+        if not packet.flags.owndata:
+            return
+        with self._lock:
+            if self.total_len is not None and len(packet) == (self.total_len + 1) * 3:
+                self._free.append(packet)
+
+
+def new_frame(total_len):
+    """分配一帧 (N, 3) 的RGB缓冲区"""
+    return np.zeros((total_len, 3), dtype=np.uint8)
+
+
+def packet_pixels(packet):
+    """返回数据包中灯珠数据部分的 (N, 3) 视图"""
+    return packet[HEADER_LEN:].reshape(-1, 3)
+
+
+def channel_order(name):
+    """把 'GRB'、'RGB'、'BGR' 等颜色顺序转换为RGB通道下标列表"""
+    name = name.upper()
+    if sorted(name) != ['B', 'G', 'R']:
+        raise ValueError(f"无效的颜色顺序: {name}")
+    return ['RGB'.index(c) for c in name]
+
+
+def write_pixels(packet, rgb, order=GRB_ORDER):
+    """将 (N, 3) 的RGB数组按 order 顺序写入数据包（逐通道跨步拷贝，不产生临时数组）"""
+    pixels = packet_pixels(packet)
+    for dst, src in enumerate(order):
+        pixels[:, dst] = rgb[:, src]
+
+
+def solid_colors(total_len, color):
+    """生成全部为同一颜色的RGB数组"""
+    rgb = np.empty((total_len, 3), dtype=np.uint8)
+    rgb[:] = color
+    return rgb
+
+
+def waterfall_colors(total_len, offset, color_mode, custom_color):
+    """生成流水灯一帧的RGB数组
+
+    color_mode: 0 彩虹色渐变，1 单色模式，2 多彩渐变。
+    运算顺序与原逐像素循环保持一致，保证输出字节完全相同。
+    """
+    if color_mode == MODE_SOLID:
+        return solid_colors(total_len, custom_color)
+
+    pos = (np.arange(total_len) + offset) % total_len
+    rgb = np.empty((total_len, 3), dtype=np.uint8)
+    if color_mode == MODE_RAINBOW:
+        rgb[:, 0] = 255 * (1 + np.sin(np.pi * 2 * pos / total_len)) / 2
+        rgb[:, 1] = 255 * (1 + np.sin(np.pi * 2 * (pos / total_len + 1/3))) / 2
+        rgb[:, 2] = 255 * (1 + np.sin(np.pi * 2 * (pos / total_len + 2/3))) / 2
+    else:
+        rgb[:, 0] = 255 * (1 + np.sin(np.pi * 2 * pos / total_len * 2)) / 2
+        rgb[:, 1] = 255 * (1 + np.sin(np.pi * 2 * (pos / total_len * 3 + 0.5))) / 2
+        rgb[:, 2] = 255 * (1 + np.sin(np.pi * 2 * (pos / total_len * 4 + 1))) / 2
+    return rgb
+
+
+class PaletteCache:
+    """流水灯调色板缓存
+
+    流水灯每帧只是把固定的渐变旋转 offset 个灯珠，因此按
+    (灯珠总数, 颜色模式, 自定义颜色) 只计算一次整条渐变，
+    之后每帧用两次切片拷贝完成旋转，不再做任何三角函数运算。
+    偏移量为小数时在相邻两颗灯珠之间线性插值。参数变化时自动重建。
+    """
+
+    def __init__(self):
+        self._key = None
+        self._rgb = None
+        self._scratch = None
+
+    def palette(self, total_len, color_mode, custom_color):
+        """返回 (N, 3) 的RGB调色板，参数变化时重建"""
+        key = (total_len, color_mode, tuple(custom_color))
+        if key != self._key:
+            self._rgb = waterfall_colors(total_len, 0, color_mode, custom_color)
+            self._scratch = new_scratch(self._rgb)
+            self._key = key
+        return self._rgb
+
+    def rotate_into(self, out, total_len, offset, color_mode, custom_color):
+        """将旋转 offset（可为小数）后的调色板写入 (N, 3) 的RGB缓冲区"""
+        rgb = self.palette(total_len, color_mode, custom_color)
+        shift_into(out, rgb, offset, self._scratch)
+
+
+def rotate_into(out, palette, offset):
+    """out[i] = palette[(i + offset) % N]，两次切片拷贝，不分配内存"""
+    n = len(palette)
+    k = offset % n
+    out[:n - k] = palette[k:]
+    out[n - k:] = palette[:k]
+
+
+def new_scratch(palette):
+    """shift_into 所需的浮点缓冲区"""
+    return np.zeros((2,) + palette.shape, dtype=np.float32)
+
+
+def shift_into(out, palette, offset, scratch):
+    """out[i] = palette[(i + offset) % N]，offset 为小数时在相邻两颗灯珠之间线性插值
+
+    offset 为整数时与 rotate_into 结果完全相同；scratch 由 new_scratch() 分配，
+    整个过程只有几次原地数组运算，不分配内存。
+    """
+    whole = math.floor(offset)
+    frac = offset - whole
+    if frac == 0:
+        rotate_into(out, palette, whole)
+        return
+    a, b = scratch
+    rotate_into(a, palette, whole)
+    rotate_into(b, palette, whole + 1)
+    a *= 1 - frac
+    b *= frac
+    a += b
+    if out.dtype.kind in 'ui':
+        np.rint(a, out=a)
+    np.copyto(out, a, casting='unsafe')
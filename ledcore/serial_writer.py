@@ -0,0 +1,165 @@
+"""串口发送线程：渲染循环只负责投递帧，实际写串口在后台线程完成"""
+import collections
+import threading
+import time
+
+from ledcore import protocol
+
+
+class SerialWriter:
+    """独占 serial.Serial 对象的后台发送器
+
+    帧队列容量很小且“新帧优先”：队列满时丢弃最旧的帧，
+    串口变慢时不会积压过期画面，渲染循环也永远不会阻塞在串口I/O上。
+    写入错误通过 on_error(exc) 回调报告（回调在发送线程中执行，
+    界面层需要自行切回主线程）。传入 metrics 时记录写入耗时、字节数和丢帧。
+    帧以 memoryview 交给串口，不再转换成中间 bytes/bytearray；
+    每帧写完或被丢弃后调用 on_release(frame)，调用方可据此复用缓冲区。
+    设置 encoder（protocol.FrameEncoder）后，每次打开串口先与控制器协商
+    扩展协议，协商结果通过 on_negotiated(caps) 回调报告。
+    长帧按 chunk_size 字节分块写入，write_timeout 作用于每一块，
+    低波特率下传输时间超过 write_timeout 的长灯条也不会被误判为超时；
+    串口锁只在写每一块时持有，关闭或重新打开串口最多等待一块的传输时间。
+    投递时可附带数据源时刻 stamp（time.monotonic()），写完后记入 metrics 的延迟统计。
+    """
+
+    def __init__(self, ser, on_error=None, maxsize=2, write_timeout=0.5, metrics=None,
+                 on_release=None, encoder=None, on_negotiated=None, chunk_size=1024):
+        self.ser = ser
+        self.chunk_size = chunk_size
+        self.on_error = on_error
+        self.on_release = on_release
+        self.encoder = encoder
+        self.on_negotiated = on_negotiated
+        self._negotiate_pending = False
+        self.metrics = metrics
+        self.write_timeout = write_timeout
+        self.dropped = 0
+        self.frames_written = 0  # 完整写完的帧数（分块写入时一帧只计一次）
+        self._frames = collections.deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._opened = 0  # 每次打开串口加1，写到一半的帧发现串口被重新打开时放弃剩余部分
+        self._running = False
+        self._thread = None
+
+    @property
+    def is_open(self):
+        return self.ser is not None and self.ser.is_open
+
+    def start(self):
+        """启动发送线程"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='SerialWriter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止发送线程并关闭串口"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.close()
+
+    def open(self, port, baudrate=115200, bytesize=8, parity='N', stopbits=1):
+        """打开串口，失败时抛出异常由调用方处理"""
+        with self._lock:
+            self.ser.port = port
+            self.ser.baudrate = baudrate
+            self.ser.bytesize = bytesize
+            self.ser.parity = parity
+            self.ser.stopbits = stopbits
+            self.ser.write_timeout = self.write_timeout
+            self.ser.open()
+            self._opened += 1
+            self._negotiate_pending = self.encoder is not None
+        self.clear()
+
+    def close(self):
+        """关闭串口并丢弃未发送的帧"""
+        self.clear()
+        with self._lock:
+            if self.ser is not None and self.ser.is_open:
+                self.ser.close()
+
+    def clear(self):
+        with self._cond:
+            frames = list(self._frames)
+            self._frames.clear()
+        for frame, _ in frames:
+            self._release(frame)
+
+    def _release(self, frame):
+        if self.on_release is not None:
+            self.on_release(frame)
+
+    def submit(self, frame, stamp=None):
+        """投递一帧，立即返回；队列已满时丢弃最旧的帧"""
+        stale = None
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                stale, _ = self._frames.popleft()
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.record_drop()
+            self._frames.append((frame, stamp))
+            self._cond.notify()
+        if stale is not None:
+            self._release(stale)
+
+    def _negotiate(self):
+        """与控制器协商扩展协议，失败时按原协议发送"""
+        self._negotiate_pending = False
+        try:
+            caps = protocol.negotiate(self.ser)
+        except Exception:
+            caps = 0
+        self.encoder.reset(caps)
+        if self.on_negotiated is not None:
+            self.on_negotiated(caps)
+
+    def _write(self, view, opened):
+        """分块写入一帧，每块单独加锁；串口在两块之间被关闭或重新打开时返回 False"""
+        size = self.chunk_size or len(view)
+        for offset in range(0, len(view), size):
+            with self._lock:
+                if self._opened != opened or self.ser is None or not self.ser.is_open:
+                    return False
+                self.ser.write(view[offset:offset + size])
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._frames:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame, stamp = self._frames.popleft()
+            try:
+                data = None
+                with self._lock:
+                    if self.ser is not None and self.ser.is_open:
+                        if self._negotiate_pending:
+                            self._negotiate()
+                        data = frame if self.encoder is None else self.encoder.encode(frame)
+                        opened = self._opened
+                if data is not None:
+                    start = time.perf_counter()
+                    if self._write(memoryview(data), opened):
+                        self.frames_written += 1
+                        if self.metrics is not None:
+                            self.metrics.record_write(len(data), time.perf_counter() - start)
+                            if stamp is not None:
+                                self.metrics.record_latency(time.monotonic() - stamp)
+            except Exception as e:
+                if self.metrics is not None:
+                    self.metrics.record_error()
+                if self.on_error is not None:
+                    self.on_error(e)
+            finally:
+                self._release(frame)
@@ -0,0 +1,300 @@
+"""放映文件：预先渲染好的帧序列，内存映射后直接发送，不再逐帧计算
+
+固定安装的场合全天循环播放同一段动画，可以先离线渲染（或录制运行中的输出，
+包括网络推送的画面）成放映文件，播放时每帧只是把映射区中的一段交给发送线程。
+
+文件格式（小端）：
+    文件头     HEADER：魔数、版本、帧率、帧数、布局长度
+    布局       UTF-8 JSON，每台设备一项 {name, D1~D4, segments, color_order, packet_len}
+    帧数据     从 DATA_ALIGN 对齐处开始，每帧为各设备的原始数据包按顺序拼接
+数据包已经过颜色顺序、校正和限流处理，与录制时发往串口的字节完全相同。
+录制中断时帧数字段可能为0，读取时按文件长度计算实际帧数。
+"""
+import json
+import mmap
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'LEDSHOW\0'
+VERSION = 1
+HEADER = struct.Struct('<8sHdII')  # 魔数、版本、帧率、帧数、布局长度
+DATA_ALIGN = 16
+
+
+def device_layout(device):
+    """录入放映文件的设备布局"""
+    return {
+        'name': device.name,
+        'D1': device.D1,
+        'D2': device.D2,
+        'D3': device.D3,
+        'D4': device.D4,
+        'segments': [dict(segment) for segment in device.segments],
+        'color_order': device.color_order,
+        'packet_len': (device.total_len + 1) * 3,
+    }
+
+
+def _data_offset(layout_size):
+    offset = HEADER.size + layout_size
+    return (offset + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+
+
+class ShowWriter:
+    """逐帧写入放映文件，close() 时回填帧数"""
+
+    def __init__(self, path, layout, fps):
+        if fps <= 0:
+            raise ValueError("放映文件的帧率必须大于0")
+        self.path = path
+        self.layout = layout
+        self.fps = fps
+        self.frame_len = sum(item['packet_len'] for item in layout)
+        self.frame_count = 0
+        layout_data = json.dumps(layout, ensure_ascii=False).encode('utf-8')
+        self._layout_size = len(layout_data)
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, fps, 0, self._layout_size))
+        self._file.write(layout_data)
+        self._file.write(bytes(_data_offset(self._layout_size) - HEADER.size - self._layout_size))
+
+    def write(self, packets):
+        """写入一帧（各设备的数据包，顺序与布局一致）"""
+        if len(packets) != len(self.layout):
+            raise ValueError(f"需要 {len(self.layout)} 台设备的数据包")
+        for packet, item in zip(packets, self.layout):
+            if len(packet) != item['packet_len']:
+                raise ValueError("数据包长度与放映文件布局不一致")
+            self._file.write(memoryview(packet))
+        self.frame_count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.fps, self.frame_count, self._layout_size))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShowFile:
+    """只读内存映射的放映文件
+
+    frames 为 (帧数, 帧长) 的 uint8 视图，直接引用映射区，访问到的页面才会读入内存，
+    几个小时的放映文件也不需要整个装入内存。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except Exception:
+            self._mmap.close()
+            raise
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            # 顺序播放，提示系统预读后续页面并及时回收已播放的页面
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+    def _parse(self):
+        mm = self._mmap
+        if len(mm) < HEADER.size:
+            raise ValueError(f"不是放映文件: {self.path}")
+        magic, version, fps, frame_count, layout_size = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise ValueError(f"不是放映文件: {self.path}")
+        if version != VERSION:
+            raise ValueError(f"不支持的放映文件版本: {version}")
+        if fps <= 0:
+            raise ValueError(f"放映文件帧率无效: {fps}")
+        self.fps = fps
+        self.layout = json.loads(mm[HEADER.size:HEADER.size + layout_size].decode('utf-8'))
+        self.frame_len = sum(item['packet_len'] for item in self.layout)
+        offset = _data_offset(layout_size)
+        available = max(0, len(mm) - offset) // self.frame_len if self.frame_len else 0
+        self.frame_count = min(frame_count, available) if frame_count else available
+        if not self.frame_count:
+            raise ValueError(f"放映文件没有帧: {self.path}")
+        self.frames = np.frombuffer(mm, dtype=np.uint8, count=self.frame_count * self.frame_len,
+                                    offset=offset).reshape(self.frame_count, self.frame_len)
+        self._bounds = []
+        start = 0
+        for item in self.layout:
+            self._bounds.append((start, start + item['packet_len']))
+            start += item['packet_len']
+
+    @property
+    def duration(self):
+        return self.frame_count / self.fps
+
+    def packets(self, index):
+        """第 index 帧各设备的数据包（只读视图，不复制）"""
+        frame = self.frames[index]
+        return [frame[start:end] for start, end in self._bounds]
+
+    def check_layout(self, devices):
+        """检查放映文件是否适用于当前设备，不适用时抛出 ValueError"""
+        if len(devices) != len(self.layout):
+            raise ValueError(f"放映文件有 {len(self.layout)} 台设备，当前配置有 {len(devices)} 台")
+        for device, item in zip(devices, self.layout):
+            if (device.total_len + 1) * 3 != item['packet_len']:
+                raise ValueError(f"{device}: 灯珠数与放映文件不一致")
+
+    def close(self):
+        self.frames = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 发送队列中还有引用映射区的帧，交给垃圾回收关闭
+            pass
+
+
+class ShowPlayer:
+    """按播放列表依次播放放映文件
+
+    同一时刻只映射当前一个文件；loop 为 True 时播完最后一个从头开始（单个文件即单曲循环）。
+    frame() 按时钟返回当前应发送的数据包，与上次为同一帧时返回 None，播放结束返回 False。
+    """
+
+    def __init__(self, paths, loop=True, clock=time.monotonic):
+        if not paths:
+            raise ValueError("播放列表为空")
+        self.paths = list(paths)
+        self.loop = loop
+        self.clock = clock
+        self.index = 0
+        self.show = None
+        self.finished = False
+        self._start = 0.0
+        self._frame = -1
+        self._open(0)
+
+    def _open(self, index, start=None):
+        if self.show is None or index != self.index:
+            show = ShowFile(self.paths[index])
+            if self.show is not None:
+                self.show.close()
+            self.show = show
+            self.index = index
+        self._start = self.clock() if start is None else start
+        self._frame = -1
+
+    def check_layout(self, devices):
+        """检查播放列表中的全部文件（打开后立即关闭，只读文件头）"""
+        for path in self.paths:
+            show = ShowFile(path)
+            try:
+                show.check_layout(devices)
+            finally:
+                show.close()
+
+    @property
+    def position(self):
+        """当前文件已播放的秒数"""
+        return self.clock() - self._start
+
+    def seek(self, seconds):
+        """跳到当前文件的指定位置"""
+        seconds = min(max(0.0, seconds), self.show.duration)
+        self._start = self.clock() - seconds
+        self._frame = -1
+
+    def select(self, index):
+        """从头播放播放列表中的第 index 个文件"""
+        if not 0 <= index < len(self.paths):
+            raise ValueError(f"无效的播放列表序号: {index}")
+        self._open(index)
+        self.finished = False
+
+    def next(self, start=None):
+        """播放下一个文件，已是最后一个且不循环时结束"""
+        if self.index + 1 < len(self.paths):
+            self._open(self.index + 1, start)
+        elif self.loop:
+            self._open(0, start)
+        else:
+            self.finished = True
+
+    def frame(self):
+        if self.finished:
+            return False
+        index = int(self.position * self.show.fps)
+        if index >= self.show.frame_count:
+            # 从上一个文件结束的时刻接着计时，循环播放时不会逐圈累积误差
+            self.next(self._start + self.show.duration)
+            if self.finished:
+                return False
+            index = min(int(self.position * self.show.fps), self.show.frame_count - 1)
+        if index == self._frame:
+            return None
+        self._frame = index
+        return self.show.packets(index)
+
+    def next_frame_delay(self):
+        """距离下一帧的秒数"""
+        return max(0.0, (self._frame + 1) / self.show.fps - self.position)
+
+    def state(self):
+        return {
+            'playlist': list(self.paths),
+            'loop': self.loop,
+            'index': self.index,
+            'file': self.show.path,
+            'position': round(min(self.position, self.show.duration), 3),
+            'duration': self.show.duration,
+            'frame': self._frame,
+            'frame_count': self.show.frame_count,
+            'fps': self.show.fps,
+            'finished': self.finished,
+        }
+
+    def close(self):
+        if self.show is not None:
+            self.show.close()
+            self.show = None
+
+
+class ShowRecorder:
+    """录制运行中的输出（包括网络推送的画面）
+
+    实际渲染帧率不固定，按固定 fps 采样：每次 add() 时把到当前时刻为止
+    应有的帧都补齐为最新的数据包，回放速度与录制时一致。
+    """
+
+    def __init__(self, path, devices, fps, clock=time.monotonic):
+        self.writer = ShowWriter(path, [device_layout(device) for device in devices], fps)
+        self.path = path
+        self.clock = clock
+        self._start = clock()
+
+    def add(self, packets):
+        due = int((self.clock() - self._start) * self.writer.fps) + 1
+        while self.writer.frame_count < due:
+            self.writer.write(packets)
+
+    def close(self):
+        self.writer.close()
+
+
+def render_show(devices, path, duration, fps, check_test=True, check_waterfall=True):
+    """离线渲染各设备当前的灯效，写入放映文件，返回帧数
+
+    动画由时间决定，离线渲染的画面与实时渲染在同一时刻完全相同。
+    """
+    count = int(round(duration * fps))
+    with ShowWriter(path, [device_layout(device) for device in devices], fps) as writer:
+        for i in range(count):
+            packets = [device.render_frame(i / fps, check_test, check_waterfall) for device in devices]
+            writer.write(packets)
+            for device, packet in zip(devices, packets):
+                device.pool.release(packet)
+    return count
@@ -0,0 +1,40 @@
+"""启动耗时打点
+
+各阶段的时刻都从 start（进程入口处记录的 time.perf_counter()）算起，
+同一阶段只记第一次。界面和命令行在启动完成后把 report() 写入日志。
+"""
+import time
+
+# 阶段名与显示名，report() 按这里的顺序输出
+STAGES = (
+    ('import', "导入"),
+    ('config', "加载配置"),
+    ('ports', "打开串口"),
+    ('first_frame', "首帧"),
+    ('first_packet', "首包"),
+    ('ui', "界面"),
+    ('network', "网络接口"),
+)
+
+
+class StartupTimer:
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = {}
+
+    def mark(self, stage):
+        """记录阶段完成的时刻，返回距 start 的秒数"""
+        if stage not in self.marks:
+            self.marks[stage] = time.perf_counter() - self.start
+        return self.marks[stage]
+
+    def pending(self, stage):
+        return stage not in self.marks
+
+    def report(self):
+        """如 “导入 180ms，加载配置 185ms，首包 210ms”（只列出已记录的阶段）"""
+        return '，'.join(f"{label} {self.marks[stage] * 1000:.0f}ms"
+                        for stage, label in STAGES if stage in self.marks)
+
+    def to_dict(self):
+        return {stage: self.marks[stage] * 1000 for stage, _ in STAGES if stage in self.marks}
@@ -0,0 +1,126 @@
+"""外部帧流：接收其他程序推送的像素数据（DDP协议或原始RGB），交给渲染循环发送
+
+所有设备的灯珠按设备顺序拼接成一段连续的像素空间，DDP 的偏移量以字节计。
+网络线程写入 pending 缓冲区，收到 push 标志（或一次写满整帧）时与 ready
+交换；渲染循环每帧只取最新的一帧，来不及发送的帧直接覆盖（计入 dropped），
+内存占用固定为三帧，与推送速率无关。
+"""
+import struct
+import threading
+import time
+
+import numpy as np
+
+# DDP 头部：flags, sequence, data type, destination id, offset(4), length(2)
+DDP_HEADER = struct.Struct('>BBBBIH')
+DDP_VERSION_MASK = 0xC0
+DDP_VERSION_1 = 0x40
+DDP_FLAG_TIMECODE = 0x10
+DDP_FLAG_STORAGE = 0x08
+DDP_FLAG_REPLY = 0x04
+DDP_FLAG_QUERY = 0x02
+DDP_FLAG_PUSH = 0x01
+DDP_ID_DISPLAY = 1
+DDP_PORT = 4048
+
+
+def ddp_packets(rgb, sequence=1, max_data=1440):
+    """把 (N, 3) RGB 数据拆成 DDP 数据包，最后一个包带 push 标志（供测试客户端使用）"""
+    data = memoryview(np.ascontiguousarray(rgb, dtype=np.uint8).reshape(-1))
+    packets = []
+    for offset in range(0, max(len(data), 1), max_data):
+        chunk = data[offset:offset + max_data]
+        flags = DDP_VERSION_1
+        if offset + max_data >= len(data):
+            flags |= DDP_FLAG_PUSH
+        header = DDP_HEADER.pack(flags, sequence & 0x0F, 0x01, DDP_ID_DISPLAY, offset, len(chunk))
+        packets.append(header + chunk)
+    return packets
+
+
+class FrameStream:
+    """外部帧缓冲（线程安全，latest-wins）
+
+    timeout 秒内没有收到新帧时视为推送结束，渲染循环恢复本地灯效。
+    """
+
+    def __init__(self, timeout=2.0):
+        self.timeout = timeout
+        self.frames = 0
+        self.dropped = 0
+        self.invalid = 0
+        self.last_frame = 0.0
+        self._lock = threading.Lock()
+        self._resize(0)
+
+    def _resize(self, total_len):
+        self.total_len = total_len
+        self._pending = np.zeros((total_len, 3), dtype=np.uint8)
+        self._ready = np.zeros((total_len, 3), dtype=np.uint8)
+        self._out = np.zeros((total_len, 3), dtype=np.uint8)
+        self._pending_flat = self._pending.reshape(-1)
+        self._has_ready = False
+
+    def resize(self, total_len):
+        """设置像素空间大小（灯珠总数变化时由渲染循环调用）"""
+        if total_len != self.total_len:
+            with self._lock:
+                self._resize(total_len)
+
+    def feed_ddp(self, packet):
+        """处理一个 DDP 数据包，返回是否完成了一帧"""
+        if len(packet) < DDP_HEADER.size:
+            self.invalid += 1
+            return False
+        flags, _, _, dest, offset, length = DDP_HEADER.unpack_from(packet)
+        if flags & DDP_VERSION_MASK != DDP_VERSION_1:
+            self.invalid += 1
+            return False
+        # 查询、回复和存储类请求不含像素数据
+        if flags & (DDP_FLAG_QUERY | DDP_FLAG_REPLY | DDP_FLAG_STORAGE) or dest not in (0, DDP_ID_DISPLAY):
+            return False
+        start = DDP_HEADER.size + (4 if flags & DDP_FLAG_TIMECODE else 0)
+        data = memoryview(packet)[start:start + length]
+        with self._lock:
+            end = min(offset + len(data), len(self._pending_flat))
+            if offset < end:
+                self._pending_flat[offset:end] = data[:end - offset]
+            if flags & DDP_FLAG_PUSH:
+                self._commit()
+                return True
+        return False
+
+    def feed_frame(self, data):
+        """写入一整帧原始 RGB 数据（不足部分保持上一帧的值，多余部分忽略）"""
+        data = memoryview(data)
+        with self._lock:
+            end = min(len(data), len(self._pending_flat))
+            self._pending_flat[:end] = data[:end]
+            self._commit()
+
+    def _commit(self):
+        if self._has_ready:
+            self.dropped += 1
+        self._pending, self._ready = self._ready, self._pending
+        # 新的 pending 从刚提交的帧开始，只更新部分像素的 DDP 包也能得到完整画面
+        self._pending[:] = self._ready
+        self._pending_flat = self._pending.reshape(-1)
+        self._has_ready = True
+        self.frames += 1
+        self.last_frame = time.monotonic()
+
+    def active(self):
+        return self.last_frame > 0 and time.monotonic() - self.last_frame < self.timeout
+
+    def take(self):
+        """返回最新一帧 (N, 3) RGB（推送中但没有新帧时返回上一帧），未在推送时返回 None
+
+        返回的数组在下次调用 take() 前有效。
+        """
+        if not self.active():
+            return None
+        with self._lock:
+            if self._has_ready:
+                self._out[:] = self._ready
+                self._has_ready = False
+        return self._out
@@ -1,35 +1,22 @@
+import time
+from ledcore.startup import StartupTimer
+# 启动耗时从这里算起（导入、加载配置、首包、界面）
+STARTUP = StartupTimer()
+
+# 启动时只导入点亮灯带和加载提示需要的模块，其余界面控件在第一帧发出后
+# 由 create_main_layout 导入（见 widgets.py）；串口库在第一次打开串口时才导入（见 LazySerial）
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.groupbox import GroupBox
-from kivy.uix.button import Button
 from kivy.uix.label import Label
-from kivy.uix.checkbox import CheckBox
-from kivy.uix.spinner import Spinner
-from kivy.uix.slider import Slider
-from kivy.uix.textbrowser import TextBrowser
 from kivy.clock import Clock
-from kivy.properties import StringProperty, ObjectProperty, ListProperty
-from kivy.graphics import Color, Rectangle
-import time
-import os
-import numpy as np
-# 尝试导入串口模块，Android上可能无法使用
-try:
-    import serial
-    import serial.tools.list_ports
-    HAS_SERIAL = True
-except ImportError:
-    serial = None
-    serial.tools = None
-    HAS_SERIAL = False
-import json
+from kivy.properties import StringProperty
+from ledcore import effects, pacing, render
+from ledcore.engine import (Engine, default_serial_factory,
+                            STATUS_CONNECTED, STATUS_FAILED, STATUS_UNPLUGGED)
+STARTUP.mark('import')
 
 CONFIG_FILE = 'config.json'
-
-class ColorButton(Button):
-    """自定义颜色按钮类"""
-    pass
+BAUD_RATES = ['115200', '230400', '460800', '921600', '1000000', '1500000', '2000000']
 
 class LEDControlApp(App):
     """LED灯条控制系统的Kivy应用"""
@@ -40,47 +27,72 @@ class LEDControlApp(App):
     log_text = StringProperty("")
     
     def build(self):
-        """构建应用UI"""
+        """构建应用：先恢复上次的配置并点亮灯带，完整界面在第一帧之后再创建"""
         self.title = "LED灯条控制系统"
-        
-        # 初始化变量
-        self.ser = None
-        if HAS_SERIAL:
-            self.ser = serial.Serial()
+        self.widgets_ready = False
+        self._syncing = False  # 同步控件期间不把控件的值写回设置
+        
+        # 渲染、发送和配置由引擎负责，界面只负责显示和修改设置
+        # 后台线程的回调经 Clock 切回主线程；日志界面每帧最多刷新一次
+        self._log_refresh = Clock.create_trigger(self.refresh_log_view)
+        self.engine = Engine(CONFIG_FILE, default_serial_factory(),
+                             call_soon=lambda fn: Clock.schedule_once(lambda dt: fn()),
+                             on_log=lambda message, error_level: self._log_refresh(),
+                             on_connection=self.on_device_connection,
+                             on_settings=self.sync_widgets,
+                             on_wake=self.wake_render,
+                             startup=STARTUP)
+        self._frame_event = None
         self.TimeCount = 0
-        self.LastTime = 0
-        self.waterfall_offset = 0
-        
-        # 灯条设置初始化
-        self.D1 = 11
-        self.D2 = 20
-        self.D3 = 11
-        self.D4 = 15
         
-        # 流水灯相关初始化
-        self.waterfall_speed = 1
-        self.waterfall_color_mode = 0
-        
-        # 自定义颜色初始化
-        self.custom_color = [255, 0, 0]  # 默认红色
-        
-        # 复选框状态
-        self.check_run = True
-        self.check_test = True
-        self.check_waterfall = True
-        
-        # 加载配置
-        self.load_config()
+        # 加载配置，不等串口枚举直接打开上次使用的串口，立即发出第一帧
+        self.engine.load_config()
+        if self.engine.has_serial:
+            self.engine.open_saved_ports()
+        self.ShotAndSendThread(0)
+        
+        # 先显示加载提示，下一帧再创建完整界面
+        self.root_layout = BoxLayout(orientation='vertical')
+        self.root_layout.add_widget(Label(text="（华浦科技）LED灯条控制系统\n正在加载…",
+                                          font_size='24sp', halign='center'))
+        Clock.schedule_once(self.build_widgets, 0)
+        return self.root_layout
+    
+    def build_widgets(self, dt):
+        """创建完整界面，之后再启动串口检测、统计刷新和网络接口等非关键任务"""
+        main_layout = self.create_main_layout()
+        self.root_layout.clear_widgets()
+        self.root_layout.add_widget(main_layout)
+        self.widgets_ready = True
+        self.update_connection_widgets()
+        self.refresh_log_view(0)
+        self.engine.startup.mark('ui')
         
-        # 启动时钟
         Clock.schedule_interval(self.update_time, 1)
-        Clock.schedule_once(self.port_check, 0.1)
-        Clock.schedule_once(self.ShotAndSendThread, 0.2)
-        
-        return self.create_main_layout()
+        Clock.schedule_interval(self.update_metrics, 1)
+        Clock.schedule_once(self.port_check, 0)
+        Clock.schedule_once(self.start_network, 0)
+    
+    def start_network(self, dt):
+        """按配置启动局域网控制接口，并记录启动耗时"""
+        self.engine.start_network()
+        self.log(f"启动耗时：{self.engine.startup.report()}")
+    
+    @property
+    def primary(self):
+        """界面编辑的设备（第一台）"""
+        return self.engine.primary
     
     def create_main_layout(self):
         """创建主布局"""
+        from kivy.uix.gridlayout import GridLayout
+        from kivy.uix.groupbox import GroupBox
+        from kivy.uix.button import Button
+        from kivy.uix.checkbox import CheckBox
+        from kivy.uix.spinner import Spinner
+        from kivy.uix.slider import Slider
+        from widgets import ColorButton, LogView
+        
         main_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
         
         # 标题
@@ -102,13 +114,15 @@ class LEDControlApp(App):
         
         # 串口设置组
         serial_group = GroupBox(title="串口设置", padding=10)
-        serial_layout = GridLayout(cols=4, spacing=5, size_hint_y=None, height=50)
+        serial_layout = GridLayout(cols=4, spacing=5, size_hint_y=None, height=90)
         
         serial_layout.add_widget(Label(text="串口选择:"))
         
+        # 启动时已直接打开上次的串口（此时暂停串口检测），先显示该串口
+        port = self.primary.port or 'COM1'
         self.combo_serial = Spinner(
-            text='COM1',
-            values=['COM1'],
+            text=port,
+            values=[port],
             size_hint=(None, 1),
             width=100
         )
@@ -126,6 +140,22 @@ class LEDControlApp(App):
         self.label_status = Label(text=self.connection_status)
         serial_layout.add_widget(self.label_status)
         
+        serial_layout.add_widget(Label(text="波特率:"))
+        baudrate = str(self.primary.baudrate)
+        self.spin_baudrate = Spinner(
+            text=baudrate,
+            values=BAUD_RATES if baudrate in BAUD_RATES else BAUD_RATES + [baudrate],
+            size_hint=(None, 1),
+            width=100
+        )
+        self.spin_baudrate.bind(text=self.on_baudrate_change)
+        serial_layout.add_widget(self.spin_baudrate)
+        
+        # 当前灯珠数和波特率下链路能承载的最高帧率
+        self.label_max_fps = Label(text="")
+        serial_layout.add_widget(self.label_max_fps)
+        serial_layout.add_widget(Label(text=""))
+        
         serial_group.add_widget(serial_layout)
         left_layout.add_widget(serial_group)
         
@@ -133,45 +163,22 @@ class LEDControlApp(App):
         light_group = GroupBox(title="灯条设置", padding=10)
         light_layout = GridLayout(cols=4, spacing=5, size_hint_y=None, height=80)
         
+        # 灯珠数直接输入（帧头为16位长度，总数最多65535颗）
         light_layout.add_widget(Label(text="左侧灯珠数:"))
-        self.spin_d1 = Spinner(
-            text=str(self.D1),
-            values=[str(i) for i in range(1, 50)],
-            size_hint=(None, 1),
-            width=80
-        )
-        self.spin_d1.bind(text=self.on_d1_change)
-        light_layout.add_widget(self.spin_d1)
+        self.input_d1 = self.create_count_input(self.primary.D1, self.on_d1_change)
+        light_layout.add_widget(self.input_d1)
         
         light_layout.add_widget(Label(text="上侧灯珠数:"))
-        self.spin_d2 = Spinner(
-            text=str(self.D2),
-            values=[str(i) for i in range(1, 50)],
-            size_hint=(None, 1),
-            width=80
-        )
-        self.spin_d2.bind(text=self.on_d2_change)
-        light_layout.add_widget(self.spin_d2)
+        self.input_d2 = self.create_count_input(self.primary.D2, self.on_d2_change)
+        light_layout.add_widget(self.input_d2)
         
         light_layout.add_widget(Label(text="右侧灯珠数:"))
-        self.spin_d3 = Spinner(
-            text=str(self.D3),
-            values=[str(i) for i in range(1, 50)],
-            size_hint=(None, 1),
-            width=80
-        )
-        self.spin_d3.bind(text=self.on_d3_change)
-        light_layout.add_widget(self.spin_d3)
+        self.input_d3 = self.create_count_input(self.primary.D3, self.on_d3_change)
+        light_layout.add_widget(self.input_d3)
         
         light_layout.add_widget(Label(text="下侧灯珠数:"))
-        self.spin_d4 = Spinner(
-            text=str(self.D4),
-            values=[str(i) for i in range(1, 50)],
-            size_hint=(None, 1),
-            width=80
-        )
-        self.spin_d4.bind(text=self.on_d4_change)
-        light_layout.add_widget(self.spin_d4)
+        self.input_d4 = self.create_count_input(self.primary.D4, self.on_d4_change)
+        light_layout.add_widget(self.input_d4)
         
         light_group.add_widget(light_layout)
         left_layout.add_widget(light_group)
@@ -186,11 +193,11 @@ class LEDControlApp(App):
         run_layout = BoxLayout(orientation='vertical', spacing=5)
         
         # 运行复选框
-        self.check_run_box = CheckBox(active=self.check_run)
+        self.check_run_box = CheckBox(active=self.engine.check_run)
         run_layout.add_widget(self.create_checkbox_row("启动（默认运行流光溢彩）", self.check_run_box, self.on_run_check))
         
         # 测试模式复选框
-        self.check_test_box = CheckBox(active=self.check_test)
+        self.check_test_box = CheckBox(active=self.engine.check_test)
         run_layout.add_widget(self.create_checkbox_row("灯条控制", self.check_test_box, self.on_test_check))
         
         # 颜色选择
@@ -237,15 +244,19 @@ class LEDControlApp(App):
         waterfall_layout = BoxLayout(orientation='vertical', spacing=5)
         
         # 流水灯复选框
-        self.check_waterfall_box = CheckBox(active=self.check_waterfall)
+        self.check_waterfall_box = CheckBox(active=self.engine.check_waterfall)
         waterfall_layout.add_widget(self.create_checkbox_row("流水灯", self.check_waterfall_box, self.on_waterfall_check))
         
         # 颜色模式
         mode_layout = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=None, height=40)
         mode_layout.add_widget(Label(text="颜色模式:"))
+        # 颜色模式列表由已注册的灯效生成
+        effect_labels = effects.effect_labels()
+        if not 0 <= self.primary.color_mode < len(effect_labels):
+            self.primary.color_mode = 0
         self.spin_color_mode = Spinner(
-            text="彩虹色渐变",
-            values=["彩虹色渐变", "单色模式", "多彩渐变"],
+            text=effect_labels[self.primary.color_mode],
+            values=effect_labels,
             size_hint=(1, 1)
         )
         self.spin_color_mode.bind(text=self.on_color_mode_change)
@@ -258,15 +269,30 @@ class LEDControlApp(App):
         self.slider_speed = Slider(
             min=1,
             max=10,
-            value=self.waterfall_speed,
+            value=self.primary.waterfall_speed,
             size_hint=(0.7, 1)
         )
         self.slider_speed.bind(value=self.on_speed_change)
         speed_layout.add_widget(self.slider_speed)
-        self.label_speed = Label(text=str(self.waterfall_speed), size_hint=(0.1, 1))
+        self.label_speed = Label(text=str(self.primary.waterfall_speed), size_hint=(0.1, 1))
         speed_layout.add_widget(self.label_speed)
         waterfall_layout.add_widget(speed_layout)
         
+        # 亮度（输出级查找表，对所有模式生效）
+        brightness_layout = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=None, height=40)
+        brightness_layout.add_widget(Label(text="亮度:"))
+        self.slider_brightness = Slider(
+            min=0,
+            max=100,
+            value=self.primary.brightness * 100,
+            size_hint=(0.7, 1)
+        )
+        self.slider_brightness.bind(value=self.on_brightness_change)
+        brightness_layout.add_widget(self.slider_brightness)
+        self.label_brightness = Label(text=f"{int(self.primary.brightness * 100)}%", size_hint=(0.1, 1))
+        brightness_layout.add_widget(self.label_brightness)
+        waterfall_layout.add_widget(brightness_layout)
+        
         # 测试按钮
         self.btn_test = Button(
             text="测试效果",
@@ -285,7 +311,7 @@ class LEDControlApp(App):
         
         # 日志区域
         log_group = GroupBox(title="日志信息", padding=10)
-        log_layout = GridLayout(cols=2, spacing=5, size_hint_y=None, height=40)
+        log_layout = GridLayout(cols=4, spacing=5, size_hint_y=None, height=40)
         
         self.label_time = Label(text=self.current_time)
         log_layout.add_widget(self.label_time)
@@ -293,14 +319,67 @@ class LEDControlApp(App):
         self.label_run_status = Label(text="消息日志：")
         log_layout.add_widget(self.label_run_status)
         
-        self.text_log = TextBrowser(size_hint_y=1)
+        # 运行统计
+        self.label_metrics = Label(text="", font_size='12sp')
+        log_layout.add_widget(self.label_metrics)
+        
+        self.btn_export_metrics = Button(
+            text="导出统计",
+            size_hint=(None, 1),
+            width=100
+        )
+        self.btn_export_metrics.bind(on_press=self.export_metrics)
+        log_layout.add_widget(self.btn_export_metrics)
+        
+        self.text_log = LogView(size_hint_y=1)
         
         log_group.add_widget(log_layout)
         log_group.add_widget(self.text_log)
         main_layout.add_widget(log_group)
         
+        self.update_max_fps()
         return main_layout
     
+    def sync_widgets(self):
+        """设置被网络接口修改后同步界面控件"""
+        if not self.widgets_ready:
+            return
+        primary = self.primary
+        self._syncing = True
+        try:
+            self._sync_widgets(primary)
+        finally:
+            self._syncing = False
+    
+    def _sync_widgets(self, primary):
+        self.input_d1.text = str(primary.D1)
+        self.input_d2.text = str(primary.D2)
+        self.input_d3.text = str(primary.D3)
+        self.input_d4.text = str(primary.D4)
+        self.spin_baudrate.text = str(primary.baudrate)
+        self.update_max_fps()
+        self.spin_color_mode.text = effects.effect_labels()[primary.color_mode]
+        self.slider_speed.value = primary.waterfall_speed
+        self.slider_brightness.value = primary.brightness * 100
+        self.check_run_box.active = self.engine.check_run
+        self.check_test_box.active = self.engine.check_test
+        self.check_waterfall_box.active = self.engine.check_waterfall
+        self.btn_color_picker.background_color = [c / 255 for c in primary.custom_color] + [1]
+    
+    def create_count_input(self, value, callback):
+        """创建灯珠数输入框，回车或失去焦点时生效"""
+        from kivy.uix.textinput import TextInput
+        text_input = TextInput(
+            text=str(value),
+            input_filter='int',
+            multiline=False,
+            size_hint=(None, 1),
+            width=80
+        )
+        text_input.bind(on_text_validate=callback)
+        text_input.bind(focus=lambda instance, focused: focused or callback(instance))
+        return text_input
+    
     def create_checkbox_row(self, text, checkbox, callback):
         """创建带标签的复选框行"""
         layout = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=None, height=30)
@@ -316,264 +395,215 @@ class LEDControlApp(App):
         self.current_time = time.strftime('%Y年%m月%d日 %H:%M:%S', time.localtime())
         self.label_time.text = self.current_time
     
-    def load_config(self):
-        """加载配置文件"""
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                
-                # 加载灯条设置
-                self.D1 = config.get('D1', 11)
-                self.D2 = config.get('D2', 20)
-                self.D3 = config.get('D3', 11)
-                self.D4 = config.get('D4', 15)
-                
-                # 加载颜色模式
-                self.waterfall_color_mode = config.get('color_mode', 0)
-                
-                # 加载流水灯速度
-                self.waterfall_speed = config.get('waterfall_speed', 5)
-                
-                # 加载复选框状态
-                self.check_run = config.get('check_run', True)
-                self.check_test = config.get('check_test', True)
-                self.check_waterfall = config.get('check_waterfall', True)
-                
-                # 加载自定义颜色
-                color_data = config.get('custom_color', {'r': 255, 'g': 0, 'b': 0})
-                self.custom_color = [color_data['r'], color_data['g'], color_data['b']]
-                
-                self.log("配置加载成功", 0)
-            except Exception as e:
-                self.log(f"加载配置失败: {e}", 1)
-        else:
-            self.log("配置文件不存在，使用默认配置", 0)
+    def update_metrics(self, dt):
+        """刷新运行统计"""
+        self.label_metrics.text = self.engine.metrics.summary_text()
     
-    def save_config(self):
-        """保存配置到文件"""
-        config = {
-            'D1': self.D1,
-            'D2': self.D2,
-            'D3': self.D3,
-            'D4': self.D4,
-            'color_mode': self.waterfall_color_mode,
-            'waterfall_speed': self.waterfall_speed,
-            'check_run': self.check_run,
-            'check_test': self.check_test,
-            'check_waterfall': self.check_waterfall,
-            'custom_color': {
-                'r': self.custom_color[0],
-                'g': self.custom_color[1],
-                'b': self.custom_color[2]
-            }
-        }
-        
+    def export_metrics(self, instance):
+        """导出运行统计为JSON和CSV文件"""
+        name = time.strftime('metrics_%Y%m%d_%H%M%S', time.localtime())
         try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f, indent=4)
-            self.log("配置保存成功", 0)
+            self.engine.metrics.dump(name + '.json')
+            self.engine.metrics.dump(name + '.csv')
+            self.log(f"运行统计已导出: {name}.json / {name}.csv", 2)
         except Exception as e:
-            self.log(f"保存配置失败: {e}", 1)
+            self.log(f"导出运行统计失败: {e}", 1)
+    
+    def save_config(self):
+        """保存配置到文件（延迟写盘）"""
+        self.engine.save_config()
     
     def log(self, message, error_level=0):
         """记录日志"""
-        str_nowtime = time.strftime('%H:%M:%S', time.localtime())
-        if error_level == 1:
-            log_entry = f"[color=ff0000]{message}  @{str_nowtime}[/color]"
-        elif error_level == 2:
-            log_entry = f"[color=00ff00]{message}  @{str_nowtime}[/color]"
-        else:
-            log_entry = f"[color=ffffff]{message}  @{str_nowtime}[/color]"
-        
-        self.text_log.text += log_entry + "\n"
-        self.text_log.scroll_to(self.text_log)
+        self.engine.log(message, error_level)
+    
+    def refresh_log_view(self, dt):
+        """将日志缓冲同步到日志视图并滚动到底部"""
+        if not self.widgets_ready:
+            return
+        from kivy.utils import escape_markup
+        colors = {1: 'ff0000', 2: '00ff00'}
+        self.text_log.data = [
+            {'text': f"[color={colors.get(entry.level, 'ffffff')}]{escape_markup(entry.text())}[/color]"}
+            for entry in self.engine.log_buffer.entries
+        ]
+        self.text_log.scroll_y = 0
     
     def port_check(self, dt):
-        """检测串口"""
-        if HAS_SERIAL:
-            try:
-                port_list = list(serial.tools.list_ports.comports())
-                ports = [port[0] for port in port_list]
-                
-                if ports:
-                    self.combo_serial.values = ports
-                    self.combo_serial.text = ports[0]
-                else:
-                    self.combo_serial.values = ['无可用串口']
-                    self.combo_serial.text = '无可用串口'
-            except Exception as e:
-                self.log(f"串口检测错误: {e}", 1)
-                self.combo_serial.values = ['串口不可用']
-                self.combo_serial.text = '串口不可用'
-        else:
+        """检测串口，只在串口列表变化时更新下拉框"""
+        if not self.engine.has_serial:
             self.combo_serial.values = ['串口功能不可用']
             self.combo_serial.text = '串口功能不可用'
             self.log("当前平台不支持串口功能", 1)
+            return
+        
+        # 所有设备的串口都已打开时暂停枚举，有串口断开后再恢复
+        if self.engine.ports_paused():
+            return
         
-        # 每秒刷新一次串口列表
-        Clock.schedule_once(self.port_check, 1.0)
+        try:
+            changed = self.engine.poll_ports()
+        except Exception as e:
+            self.log(f"串口检测错误: {e}", 1)
+            self.combo_serial.values = ['串口不可用']
+            self.combo_serial.text = '串口不可用'
+            changed = False
+        
+        if changed:
+            ports = self.engine.port_discovery.ports
+            if ports:
+                self.combo_serial.values = ports
+                # 保留用户当前的选择，否则优先选上次使用的串口
+                if self.combo_serial.text not in ports:
+                    self.combo_serial.text = self.primary.port if self.primary.port in ports else ports[0]
+            else:
+                self.combo_serial.values = ['无可用串口']
+                self.combo_serial.text = '无可用串口'
+        
+        # 串口列表不变时逐步降低枚举频率
+        Clock.schedule_once(self.port_check, self.engine.port_discovery.interval)
     
     def open_port(self, instance):
         """打开或关闭串口"""
-        if not HAS_SERIAL:
+        if not self.engine.has_serial:
             self.log("当前平台不支持串口功能", 1)
             return
         
-        try:
-            if self.ser and self.ser.is_open:
-                self.ser.close()
-                self.connection_status = "状态：已断开"
-                self.btn_connect.text = "连接"
-                self.label_status.text = self.connection_status
-                self.log("关闭串口成功", 0)
-            else:
-                self.ser.port = self.combo_serial.text
-                self.ser.baudrate = 115200
-                self.ser.bytesize = 8
-                self.ser.parity = 'N'
-                self.ser.stopbits = 1
-                self.ser.open()
+        if self.primary.writer.is_open:
+            self.engine.user_disconnected = True
+            self.engine.close_device(self.primary)
+        else:
+            self.engine.user_disconnected = False
+            self.engine.open_device(self.primary, self.combo_serial.text)
+    
+    def on_device_connection(self, device, status):
+        """设备串口打开或关闭后更新界面，有串口关闭时恢复串口检测"""
+        if device is self.primary:
+            if status == STATUS_CONNECTED:
                 self.connection_status = "状态：已连接"
-                self.btn_connect.text = "断开"
-                self.label_status.text = self.connection_status
-                self.log("打开串口成功", 0)
-        except Exception as e:
-            self.log(f"串口操作失败: {e}", 1)
-            self.connection_status = "状态：未连接"
-            self.label_status.text = self.connection_status
+            else:
+                self.connection_status = "状态：设备已拔出" if status == STATUS_UNPLUGGED else "状态：未连接"
+            self.update_connection_widgets()
+        if status != STATUS_CONNECTED and status != STATUS_FAILED:
+            self.resume_port_check()
     
-    def ShotAndSendThread(self, dt):
-        """主功能线程"""
-        try:
-            fps = round(1 / (time.time() - self.LastTime), 2) if self.LastTime > 0 else 0
-            # self.log(f"FPS: {fps}", 0)
-        except Exception:
-            pass
-        self.LastTime = time.time()
-        
-        if not self.check_run:
-            # 1秒后再次执行
-            Clock.schedule_once(self.ShotAndSendThread, 1.0)
+    def update_connection_widgets(self):
+        """按第一台设备的串口状态更新连接按钮和状态栏"""
+        if not self.widgets_ready:
             return
-        
-        # 获取上下左右四个方向所设置的灯珠数量
-        d1 = self.D1
-        d2 = self.D2
-        d3 = self.D3
-        d4 = self.D4
-        total_len = d1 + d2 + d3 + d4
-        
-        sendrgb = np.zeros((total_len + 1) * 3, dtype=np.uint8)
-        sendrgb[0] = 0x28
-        sendrgb[1] = total_len // 256
-        sendrgb[2] = total_len % 256
-        
-        if self.check_test:
-            if self.check_waterfall:
-                # 生成流水灯效果
-                for i in range(total_len):
-                    offset = (i + self.waterfall_offset) % total_len
-                    
-                    if self.waterfall_color_mode == 0:  # 彩虹色渐变
-                        r = int(255 * (1 + np.sin(np.pi * 2 * offset / total_len)) / 2)
-                        g = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len + 1/3))) / 2)
-                        b = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len + 2/3))) / 2)
-                    elif self.waterfall_color_mode == 1:  # 单色模式
-                        r, g, b = self.custom_color
-                    else:  # 多彩渐变模式
-                        r = int(255 * (1 + np.sin(np.pi * 2 * offset / total_len * 2)) / 2)
-                        g = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len * 3 + 0.5))) / 2)
-                        b = int(255 * (1 + np.sin(np.pi * 2 * (offset / total_len * 4 + 1))) / 2)
-                    
-                    sendrgb[3 + i*3] = g     # RGB顺序是G、R、B
-                    sendrgb[3 + i*3 + 1] = r
-                    sendrgb[3 + i*3 + 2] = b
-                
-                # 更新流水灯偏移量
-                self.waterfall_offset = (self.waterfall_offset + self.waterfall_speed) % total_len
-            else:  # 普通单色测试模式
-                r, g, b = self.custom_color
-                for i in range(total_len):
-                    sendrgb[3 + i*3] = g     # RGB顺序是G、R、B
-                    sendrgb[3 + i*3 + 1] = r
-                    sendrgb[3 + i*3 + 2] = b
-        else:   # 正常工作模式，这里简化处理，因为Android上无法直接截图
-            # 在Android上，我们需要使用其他方式获取图像，这里暂时使用测试模式的逻辑
-            r, g, b = self.custom_color
-            for i in range(total_len):
-                sendrgb[3 + i*3] = g
-                sendrgb[3 + i*3 + 1] = r
-                sendrgb[3 + i*3 + 2] = b
-        
-        if HAS_SERIAL and self.ser and self.ser.is_open:
-            self.uart_send_cmd(sendrgb)
-        
-        # 短时间后再次执行
-        Clock.schedule_once(self.ShotAndSendThread, 0.01)
-    
-    def uart_send_cmd(self, cmd):
-        """发送数据到串口"""
-        if HAS_SERIAL and self.ser and self.ser.is_open:
-            try:
-                self.ser.write(cmd)
-            except Exception as e:
-                self.log(f"串口发送错误: {e}", 1)
+        self.btn_connect.text = "断开" if self.primary.writer.is_open else "连接"
+        self.label_status.text = self.connection_status
+    
+    def resume_port_check(self):
+        """立即恢复串口检测（界面创建完成后才开始检测）"""
+        if not self.widgets_ready:
+            return
+        Clock.unschedule(self.port_check)
+        Clock.schedule_once(self.port_check, 0)
+    
+    def ShotAndSendThread(self, dt):
+        """主功能线程：渲染一帧，按引擎给出的间隔安排下一帧（输出不变时间隔很长）"""
+        delay = self.engine.tick()
+        self._frame_event = Clock.schedule_once(self.ShotAndSendThread, delay)
+    
+    def wake_render(self):
+        """引擎空闲中输入发生变化：取消已安排的下一帧，立即渲染"""
+        if self._frame_event is not None:
+            self._frame_event.cancel()
+        self._frame_event = Clock.schedule_once(self.ShotAndSendThread, 0)
+    
+    def on_pause(self):
+        """应用切到后台时立即保存配置"""
+        self.engine.flush_config()
+        return True
+    
+    def on_stop(self):
+        """应用退出时停止发送线程、关闭串口并保存配置"""
+        self.engine.close()
     
     def on_test_press(self, instance):
         """测试按钮按下事件"""
         self.log("测试按钮按下", 0)
         # 这里可以添加测试逻辑
     
-    def on_d1_change(self, instance, value):
+    def on_d1_change(self, instance):
         """左侧灯珠数变化事件"""
-        self.D1 = int(value)
-        self.save_config()
+        self.apply_led_count('D1', instance)
     
-    def on_d2_change(self, instance, value):
+    def on_d2_change(self, instance):
         """上侧灯珠数变化事件"""
-        self.D2 = int(value)
-        self.save_config()
+        self.apply_led_count('D2', instance)
     
-    def on_d3_change(self, instance, value):
+    def on_d3_change(self, instance):
         """右侧灯珠数变化事件"""
-        self.D3 = int(value)
-        self.save_config()
+        self.apply_led_count('D3', instance)
     
-    def on_d4_change(self, instance, value):
+    def on_d4_change(self, instance):
         """下侧灯珠数变化事件"""
-        self.D4 = int(value)
+        self.apply_led_count('D4', instance)
+    
+    def apply_led_count(self, key, instance):
+        """应用输入的灯珠数，无效时恢复原值"""
+        old = getattr(self.primary, key)
+        try:
+            value = int(instance.text)
+            if value < 0:
+                raise ValueError(f"{key} 必须是非负整数")
+            render.check_total_len(self.primary.total_len - old + value)
+        except ValueError as e:
+            self.log(f"灯珠数无效: {e}", 1)
+            instance.text = str(old)
+            return
+        if value != old:
+            setattr(self.primary, key, value)
+            self.update_max_fps()
+            self.save_config()
+    
+    def on_baudrate_change(self, instance, value):
+        """波特率变化事件，串口已打开时按新波特率重新连接"""
+        self.engine.set_baudrate(self.primary, int(value))
+        self.update_max_fps()
         self.save_config()
     
+    def update_max_fps(self):
+        """显示当前灯珠数和波特率下的最高帧率"""
+        total_len = self.primary.total_len
+        fps = pacing.max_fps_for_leds(total_len, self.primary.baudrate)
+        self.label_max_fps.text = f"{total_len}颗 最高{fps:.0f}FPS"
+    
     def on_run_check(self, instance, value):
         """运行复选框变化事件"""
-        self.check_run = value
+        self.engine.check_run = value
         self.save_config()
     
     def on_test_check(self, instance, value):
         """测试模式复选框变化事件"""
-        self.check_test = value
+        self.engine.check_test = value
         self.save_config()
     
     def on_waterfall_check(self, instance, value):
         """流水灯复选框变化事件"""
-        self.check_waterfall = value
+        self.engine.check_waterfall = value
         self.save_config()
     
     def on_color_mode_change(self, instance, value):
         """颜色模式变化事件"""
-        color_modes = {
-            "彩虹色渐变": 0,
-            "单色模式": 1,
-            "多彩渐变": 2
-        }
-        self.waterfall_color_mode = color_modes[value]
+        self.primary.color_mode = effects.effect_labels().index(value)
         self.save_config()
     
     def on_speed_change(self, instance, value):
         """流水灯速度变化事件"""
-        self.waterfall_speed = int(value)
-        self.label_speed.text = str(self.waterfall_speed)
+        self.primary.waterfall_speed = int(value)
+        self.label_speed.text = str(self.primary.waterfall_speed)
+        self.save_config()
+    
+    def on_brightness_change(self, instance, value):
+        """亮度变化事件（拖动时按整数百分比设置）"""
+        self.label_brightness.text = f"{int(value)}%"
+        if self._syncing:
+            # 网络接口设置的亮度可能不是整数百分比，不能截断后写回
+            return
+        self.primary.brightness = int(value) / 100
         self.save_config()
     
     def open_color_dialog(self, instance):
@@ -583,9 +613,10 @@ class LEDControlApp(App):
     
     def set_preset_color(self, color):
         """设置预设颜色"""
-        self.custom_color = [int(c * 255) for c in color[:3]]
+        self.primary.custom_color = [int(c * 255) for c in color[:3]]
         self.btn_color_picker.background_color = color
-        self.log(f"已设置预设颜色: R={self.custom_color[0]}, G={self.custom_color[1]}, B={self.custom_color[2]}", 0)
+        r, g, b = self.primary.custom_color
+        self.log(f"已设置预设颜色: R={r}, G={g}, B={b}", 0)
         self.save_config()
 
 if __name__ == '__main__':
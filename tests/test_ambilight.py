@@ -0,0 +1,112 @@
+"""流光溢彩：后台采集线程和单张图片缓存"""
+import threading
+
+import numpy as np
+import pytest
+
+from ledcore import ambilight
+
+
+class CountingSource:
+    def __init__(self, fail_at=None):
+        self.reads = 0
+        self.closed = False
+        self.fail_at = fail_at
+
+    def read(self):
+        self.reads += 1
+        if self.reads == self.fail_at:
+            raise OSError("读取失败")
+        return np.full((4, 4, 3), self.reads, dtype=np.uint8)
+
+    def close(self):
+        self.closed = True
+
+
+def test_capture_thread_returns_latest_frame():
+    source = CountingSource()
+    capture = ambilight.CaptureThread(lambda: source)
+    try:
+        first = capture.latest(timeout=1.0)
+        assert first is not None
+        # 每次 latest() 只请求一帧，不取帧时不会持续采集
+        for _ in range(200):
+            if capture.frames >= 2:
+                break
+            threading.Event().wait(0.005)
+        assert capture.frames == source.reads == 2
+        assert capture.latest()[0, 0, 0] == 2
+    finally:
+        capture.close()
+    assert source.closed
+
+
+def test_capture_thread_reports_errors():
+    capture = ambilight.CaptureThread(lambda: CountingSource(fail_at=1))
+    try:
+        assert capture.latest(timeout=1.0) is None
+        assert isinstance(capture.error, OSError)
+    finally:
+        capture.close()
+
+    def fail_open():
+        raise RuntimeError("无法打开")
+    capture = ambilight.CaptureThread(fail_open)
+    try:
+        capture.latest(timeout=1.0)
+        assert isinstance(capture.error, RuntimeError)
+    finally:
+        capture.close()
+
+
+def test_single_image_decoded_once(tmp_path, monkeypatch):
+    path = tmp_path / 'a.npy'
+    np.save(path, np.zeros((2, 2, 3), dtype=np.uint8))
+    loads = []
+    load_image = ambilight.load_image
+    monkeypatch.setattr(ambilight, 'load_image', lambda p: loads.append(p) or load_image(p))
+
+    source = ambilight.open_source(str(path))
+    for _ in range(5):
+        assert source.read().shape == (2, 2, 3)
+    assert len(loads) == 1
+
+
+def test_sequence_loops(tmp_path):
+    for i in range(3):
+        np.save(tmp_path / f'{i}.npy', np.full((2, 2, 3), i, dtype=np.uint8))
+    source = ambilight.open_source(str(tmp_path))
+    assert [int(source.read()[0, 0, 0]) for _ in range(4)] == [0, 1, 2, 0]
+
+
+@pytest.mark.parametrize('layout', [(3, 5, 3, 5), (0, 10, 0, 10)])
+def test_edge_sampler_solid_frame(layout):
+    frame = np.empty((90, 160, 3), dtype=np.uint8)
+    frame[:] = (10, 20, 30)
+    rgb = ambilight.EdgeSampler(*layout).sample(frame)
+    assert rgb.shape == (sum(layout), 3)
+    assert (rgb == (10, 20, 30)).all()
+
+
+def test_engine_captures_in_background(tmp_path):
+    from ledcore.engine import Engine
+
+    image = np.zeros((90, 160, 3), dtype=np.uint8)
+    image[:] = (0, 0, 255)
+    np.save(tmp_path / 'blue.npy', image)
+    engine = Engine(str(tmp_path / 'config.json'))
+    engine.load_config()
+    try:
+        engine.check_test = False
+        engine.capture_source = str(tmp_path / 'blue.npy')
+        frame = engine.capture_frame()
+        assert frame is not None and (frame == image).all()
+        assert engine.frame_source is not None
+        engine.tick()
+
+        # 切换到测试模式后停止采集
+        engine.check_test = True
+        engine.tick()
+        assert engine.frame_source is None
+    finally:
+        engine.close()
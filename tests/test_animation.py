@@ -0,0 +1,26 @@
+"""动画时钟：偏移量只由时间决定，改变速度时不跳变"""
+import pytest
+
+from ledcore.animation import REFERENCE_FPS, AnimationClock, leds_per_second
+
+
+def test_offset_independent_of_frame_rate():
+    fast, slow = AnimationClock(), AnimationClock()
+    slow.offset(0.0, 30, 76)
+    for i in range(100):
+        fast.offset(i / 100, 30, 76)
+    assert fast.offset(1.0, 30, 76) == pytest.approx(slow.offset(1.0, 30, 76))
+    assert slow.offset(3.0, 30, 76) == pytest.approx(90 % 76)
+
+
+def test_speed_change_continues_from_current_position():
+    clock = AnimationClock()
+    clock.offset(0.0, 10, 1000)
+    before = clock.offset(2.0, 10, 1000)
+    assert clock.offset(2.0, 40, 1000) == pytest.approx(before)
+    assert clock.offset(3.0, 40, 1000) == pytest.approx(before + 40)
+
+
+def test_leds_per_second():
+    assert leds_per_second(1) == REFERENCE_FPS
+    assert leds_per_second(5) == 5 * REFERENCE_FPS
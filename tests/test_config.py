@@ -0,0 +1,178 @@
+"""配置：旧版扁平键配置的迁移、设置检查和命令行覆盖值"""
+import json
+
+import pytest
+
+from ledcore.devices import OutputDevice, devices_from_config
+from ledcore.engine import Engine
+
+LEGACY_CONFIG = {
+    'last_port': 'COM3',
+    'baudrate': 230400,
+    'D1': 10, 'D2': 5, 'D3': 10, 'D4': 5,
+    'color_mode': 2,
+    'waterfall_speed': 3,
+    'custom_color': {'r': 1, 'g': 2, 'b': 3},
+    'target_fps': 30,
+    'check_run': False,
+}
+
+
+def make_engine(tmp_path, config=None):
+    path = tmp_path / 'config.json'
+    if config is not None:
+        path.write_text(json.dumps(config), encoding='utf-8')
+    engine = Engine(str(path))
+    engine.load_config()
+    return engine, path
+
+
+def saved_config(engine, path):
+    engine.flush_config()
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def test_devices_from_legacy_config():
+    [device] = devices_from_config(LEGACY_CONFIG)
+    assert device == {
+        'port': 'COM3', 'baudrate': 230400,
+        'D1': 10, 'D2': 5, 'D3': 10, 'D4': 5,
+        'color_mode': 2, 'waterfall_speed': 3,
+        'custom_color': {'r': 1, 'g': 2, 'b': 3},
+    }
+
+
+def test_devices_list_wins_over_legacy_keys():
+    config = dict(LEGACY_CONFIG, devices=[{'port': 'COM7'}, {'port': 'COM8'}])
+    assert devices_from_config(config) == [{'port': 'COM7'}, {'port': 'COM8'}]
+
+
+def test_load_legacy_config_and_save(tmp_path):
+    engine, path = make_engine(tmp_path, LEGACY_CONFIG)
+    try:
+        device = engine.primary
+        assert (device.port, device.baudrate, device.total_len) == ('COM3', 230400, 30)
+        assert device.custom_color == [1, 2, 3]
+        assert (engine.target_fps, engine.check_run) == (30, False)
+
+        engine.save_config()
+        saved = saved_config(engine, path)
+    finally:
+        engine.close()
+    for key in ('last_port', 'baudrate', 'D1', 'color_mode', 'custom_color'):
+        assert key not in saved
+    [device] = saved['devices']
+    assert (device['port'], device['baudrate'], device['D1']) == ('COM3', 230400, 10)
+    assert device['custom_color'] == {'r': 1, 'g': 2, 'b': 3}
+    assert saved['target_fps'] == 30
+
+
+def test_invalid_device_config_uses_defaults(tmp_path):
+    engine, _ = make_engine(tmp_path, {'devices': [{'port': 'COM3', 'gamma': 0}]})
+    try:
+        assert engine.primary.to_config() == OutputDevice().to_config()
+        assert any("设备配置无效" in entry.message for entry in engine.log_buffer.entries)
+    finally:
+        engine.close()
+
+
+@pytest.mark.parametrize('values', [
+    {'color_mode': 1.0},
+    {'color_mode': -1},
+    {'D1': True},
+    {'D1': -5},
+    {'D1': 2.5},
+    {'baudrate': 115200.0},
+    {'waterfall_speed': 0},
+    {'gamma': 0},
+    {'brightness': -1},
+    {'custom_color': [1, 2]},
+    {'custom_color': [0, 0, 256]},
+    {'channel_gain': [1, 1]},
+    {'color_order': 5},
+    {'color_order': 'RGX'},
+    {'segments': [0]},
+    {'target_fps': -1},
+    {'idle_keepalive': 'x'},
+    {'audio_block': 32},
+    {'target_fps': True},
+    {'idle_keepalive': True},
+    {'audio_block': True},
+    {'check_run': 'no'},
+    {'check_test': 1},
+    {'check_waterfall': None},
+    {'auto_reconnect': 'yes'},
+    {'capture_source': 5},
+    {'audio_source': None},
+    {'name': 5},
+    {'segments': [{'name': None, 'leds': 3}]},
+    {'bogus': 1},
+    {'device': 5},
+    {'device': '0'},
+    {'device': True, 'name': 'x'},
+])
+def test_apply_settings_rejects_invalid_values(tmp_path, values):
+    engine, path = make_engine(tmp_path)
+    try:
+        before = engine.state()
+        with pytest.raises(ValueError):
+            engine.apply_settings(values)
+        after = engine.state()
+        assert after['devices'] == before['devices']
+        assert after['target_fps'] == before['target_fps']
+        engine.flush_config()
+        assert not path.exists()
+    finally:
+        engine.close()
+
+
+def test_apply_settings(tmp_path):
+    engine, path = make_engine(tmp_path)
+    try:
+        engine.apply_settings({'custom_color': [10, 20, 30], 'D1': 12, 'target_fps': 25})
+        assert engine.primary.custom_color == [10, 20, 30]
+        assert engine.primary.D1 == 12
+        assert engine.pacer.target_fps == 25
+        saved = saved_config(engine, path)
+    finally:
+        engine.close()
+    assert saved['devices'][0]['custom_color'] == {'r': 10, 'g': 20, 'b': 30}
+    assert saved['devices'][0]['D1'] == 12
+
+
+def test_bad_device_name_not_saved(tmp_path):
+    engine, path = make_engine(tmp_path, {'devices': [{'port': 'COM3'}, {'port': 'COM4'}]})
+    try:
+        with pytest.raises(ValueError):
+            engine.apply_settings({'device': 1, 'name': 5})
+        assert str(engine.devices.devices[1]) == 'COM4'
+        engine.flush_config()
+        assert not path.read_text(encoding='utf-8').count('"name": 5')
+    finally:
+        engine.close()
+
+
+def test_invalid_device_name_in_file(tmp_path):
+    engine, _ = make_engine(tmp_path, {'devices': [{'port': 'COM3', 'name': 5}]})
+    try:
+        assert engine.primary.name == ''
+    finally:
+        engine.close()
+
+
+def test_override_not_saved(tmp_path):
+    engine, path = make_engine(tmp_path, {'target_fps': 30, 'devices': [{'port': 'COM3'}]})
+    try:
+        engine.override('target_fps', 60)
+        engine.override('port', 'COM9', engine.primary)
+        assert (engine.target_fps, engine.primary.port) == (60, 'COM9')
+        engine.save_config()
+        saved = saved_config(engine, path)
+        assert (saved['target_fps'], saved['devices'][0]['port']) == (30, 'COM3')
+
+        # 运行中又修改过的设置按新值保存
+        engine.apply_settings({'target_fps': 45})
+        saved = saved_config(engine, path)
+        assert saved['target_fps'] == 45
+    finally:
+        engine.close()
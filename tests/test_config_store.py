@@ -0,0 +1,89 @@
+"""配置存储：合并连续修改只写一次盘，原子替换，内容不变时不写"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from ledcore.config_store import ConfigStore
+
+
+def counting_store(path, delay):
+    saved = threading.Semaphore(0)
+    store = ConfigStore(str(path), delay=delay, on_saved=saved.release)
+    store.saves = saved
+    return store
+
+
+def test_debounced_single_write(tmp_path):
+    path = tmp_path / 'config.json'
+    store = counting_store(path, delay=0.1)
+    try:
+        for i in range(50):
+            store.replace({'value': i})
+        assert not path.exists()
+        assert store.saves.acquire(timeout=2.0)
+        assert json.loads(path.read_text()) == {'value': 49}
+        # 静默期后只写了一次
+        assert not store.saves.acquire(timeout=0.3)
+    finally:
+        store.close()
+
+
+def test_unchanged_content_not_written(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'a': 1}))
+    store = ConfigStore(str(path), delay=60)
+    try:
+        assert store.load() == {'a': 1}
+        store.replace({'a': 1})
+        assert store.flush() is False
+        store.replace({'a': 2})
+        assert store.flush() is True
+        assert store.flush() is False
+    finally:
+        store.close()
+    assert json.loads(path.read_text()) == {'a': 2}
+
+
+def test_replace_drops_old_keys(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'old': 1, 'keep': 2}))
+    store = ConfigStore(str(path), delay=60)
+    store.load()
+    store.replace({'keep': 3})
+    store.close()
+    assert json.loads(path.read_text()) == {'keep': 3}
+
+
+def test_failed_write_keeps_original(tmp_path, monkeypatch):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'a': 1}))
+    store = ConfigStore(str(path), delay=60)
+    store.load()
+    store.replace({'a': 2})
+
+    def fail(*args):
+        raise OSError("磁盘已满")
+    monkeypatch.setattr(os, 'fsync', fail)
+    with pytest.raises(OSError):
+        store.flush()
+    assert json.loads(path.read_text()) == {'a': 1}
+    assert os.listdir(tmp_path) == ['config.json']  # 临时文件已删除
+    monkeypatch.undo()
+    store.close()
+    assert json.loads(path.read_text()) == {'a': 2}
+
+
+def test_background_error_reported(tmp_path):
+    errors = []
+    store = ConfigStore(str(tmp_path / 'missing' / 'config.json'), delay=0.01,
+                        on_error=errors.append)
+    store.replace({'a': 1})
+    deadline = time.monotonic() + 2.0
+    while not errors and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert errors and isinstance(errors[0], OSError)
+    with pytest.raises(OSError):
+        store.close()
@@ -0,0 +1,52 @@
+"""灯效：输出只由时间决定，每帧不分配与灯珠数成正比的内存"""
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from ledcore import effects, render
+
+COLOR = [255, 128, 0]
+# 星光和火焰含随机数，不参与逐帧/跳帧一致性检查
+RANDOM_EFFECTS = (effects.TwinkleEffect, effects.FireEffect)
+
+
+@pytest.mark.parametrize('cls', [cls for cls in effects.EFFECTS if cls not in RANDOM_EFFECTS],
+                         ids=lambda cls: cls.__name__)
+def test_render_depends_only_on_time(cls):
+    a, b = cls(), cls()
+    a.setup(100)
+    b.setup(100)
+    out_a, out_b = render.new_frame(100), render.new_frame(100)
+    # a 逐帧渲染，b 直接跳到同一时刻
+    for i in range(10):
+        a.render(out_a, i * 0.05, i * 0.5, COLOR)
+    b.render(out_b, 9 * 0.05, 9 * 0.5, COLOR)
+    np.testing.assert_array_equal(out_a, out_b)
+
+
+@pytest.mark.parametrize('cls', effects.EFFECTS, ids=lambda cls: cls.__name__)
+def test_render_does_not_allocate(cls):
+    effect = cls()
+    effect.setup(4000)
+    out = render.new_frame(4000)
+    effect.render(out, 0.0, 0, COLOR)
+    tracemalloc.start()
+    try:
+        for i in range(1, 50):
+            effect.render(out, i * 0.02, i, COLOR)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1024
+
+
+def test_breathing_follows_color_change():
+    effect = effects.BreathingEffect()
+    effect.setup(3)
+    out = render.new_frame(3)
+    t = effect.period / 2  # 最亮
+    effect.render(out, t, 0, [255, 0, 0])
+    assert out.tolist() == [[255, 0, 0]] * 3
+    effect.render(out, t, 0, [0, 0, 200])
+    assert out.tolist() == [[0, 0, 200]] * 3
@@ -0,0 +1,98 @@
+"""空闲检测：输出不变时不再逐帧渲染，只按 idle_keepalive 重发，输入变化时立即唤醒"""
+import json
+import time
+
+import pytest
+
+from ledcore import effects
+from ledcore.devices import OutputDevice
+from ledcore.engine import Engine
+
+SOLID_MODE = effects.EFFECTS.index(effects.SolidEffect)
+RAINBOW_MODE = effects.EFFECTS.index(effects.RainbowEffect)
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+
+    def make(color_mode=SOLID_MODE, keepalive=1.0, **kwargs):
+        path = tmp_path / f'config{len(engines)}.json'
+        path.write_text(json.dumps({'idle_keepalive': keepalive,
+                                    'devices': [{'color_mode': color_mode}]}))
+        engine = Engine(str(path), **kwargs)
+        engine.load_config()
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.close()
+
+
+def test_static_state():
+    device = OutputDevice({'color_mode': SOLID_MODE})
+    state = device.static_state()
+    assert state is not None and state == device.static_state()
+    device.custom_color = [0, 0, 255]
+    assert device.static_state() != state
+    device.color_mode = RAINBOW_MODE
+    assert device.static_state() is None
+    # 测试模式不流水时输出与时间无关
+    assert device.static_state(check_waterfall=False) is not None
+
+
+def test_static_output_idles(make_engine):
+    engine = make_engine()
+    engine.tick()
+    assert engine.metrics.frames == 1
+    for _ in range(5):
+        delay = engine.tick()
+        assert 0 < delay <= 1.0
+    assert engine.idle
+    assert engine.metrics.frames == 1
+
+
+def test_keepalive_resends(make_engine):
+    engine = make_engine(keepalive=0.02)
+    engine.tick()
+    engine.tick()
+    assert engine.metrics.frames == 1
+    time.sleep(0.03)
+    engine.tick()
+    assert engine.metrics.frames == 2 and engine.idle
+
+
+@pytest.mark.parametrize('color_mode, keepalive', [(RAINBOW_MODE, 1.0), (SOLID_MODE, 0)])
+def test_never_idle(make_engine, color_mode, keepalive):
+    engine = make_engine(color_mode, keepalive)
+    for _ in range(5):
+        engine.tick()
+    assert engine.metrics.frames == 5
+    assert not engine.idle
+
+
+def test_settings_change_wakes(make_engine):
+    woken = []
+    engine = make_engine(on_wake=lambda: woken.append(True))
+    engine.tick()
+    engine.tick()
+    assert engine.idle
+    engine.apply_settings({'custom_color': [0, 255, 0]})
+    assert not engine.idle
+    engine.tick()
+    assert engine.metrics.frames == 2
+    # on_wake 经 call_soon 排入引擎线程，由 run() 执行
+    engine.run(0)
+    assert woken == [True]
+
+
+def test_pushed_frame_wakes(make_engine):
+    engine = make_engine()
+    engine.tick()
+    engine.tick()
+    engine.stream.feed_frame(bytes(engine.devices.total_len * 3))
+    engine.wake()
+    engine.tick()
+    assert engine.metrics.frames == 2
+    assert not engine.idle
@@ -0,0 +1,59 @@
+"""日志缓冲：合并重复消息、限速、定长和日志文件"""
+from ledcore.log_buffer import LEVEL_ERROR, LEVEL_INFO, LogBuffer
+
+
+def test_duplicates_merged_within_window():
+    log = LogBuffer(dedup_window=10.0)
+    assert log.append("串口已断开", LEVEL_ERROR, timestamp=100.0)
+    assert not log.append("串口已断开", LEVEL_ERROR, timestamp=105.0)
+    assert not log.append("串口已断开", LEVEL_ERROR, timestamp=114.0)
+    assert len(log.entries) == 1
+    assert log.entries[0].count == 3
+    assert "×3" in log.entries[0].text()
+    # 超出合并窗口、级别不同或中间插入了其他消息时另起一行
+    assert log.append("串口已断开", LEVEL_ERROR, timestamp=125.0)
+    assert log.append("串口已断开", LEVEL_INFO, timestamp=125.5)
+    assert len(log.entries) == 3
+
+
+def test_rate_limit_counts_suppressed():
+    log = LogBuffer(max_per_second=5)
+    for i in range(12):
+        log.append(f"消息{i}", timestamp=200.0 + i * 0.01)
+    assert [e.message for e in log.entries] == [f"消息{i}" for i in range(5)]
+    assert log.suppressed == 7
+    log.append("下一秒", timestamp=201.5)
+    assert [e.message for e in log.entries][-2:] == ["已省略7条日志", "下一秒"]
+    assert log.entries[-2].level == LEVEL_ERROR
+    assert log.suppressed == 0
+
+
+def test_capacity_bounded():
+    log = LogBuffer(capacity=10, max_per_second=1000)
+    for i in range(100):
+        log.append(f"消息{i}", timestamp=300.0)
+    assert len(log.entries) == 10
+    assert log.entries[0].message == "消息90"
+
+
+def test_version_changes():
+    log = LogBuffer()
+    v = log.version
+    log.append("a", timestamp=1.0)
+    log.append("a", timestamp=1.1)
+    assert log.version == v + 2
+    log.clear()
+    assert log.version == v + 3 and not log.entries
+
+
+def test_file_skips_merged_and_suppressed(tmp_path):
+    path = tmp_path / 'led.log'
+    log = LogBuffer(max_per_second=2)
+    log.enable_file(str(path))
+    try:
+        for message in ("a", "a", "b", "c", "d"):
+            log.append(message, timestamp=400.0)
+    finally:
+        log.disable_file()
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [line.split()[-1] for line in lines] == ["a", "b"]
@@ -0,0 +1,101 @@
+"""局域网控制接口：HTTP设置、无效值返回400、DDP推送的帧写到串口"""
+import http.client
+import json
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ledcore.engine import Engine
+from ledcore.fake_serial import FakeDevice
+from ledcore.netapi import NetworkServer
+from ledcore.stream import ddp_packets
+
+LEDS = 40
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'devices': [{'port': 'loop', 'D1': 10, 'D2': 10, 'D3': 10,
+                                             'D4': 10}]}))
+    fakes = []
+    engine = Engine(str(path), lambda: fakes.append(FakeDevice(caps=0)) or fakes[-1])
+    engine.load_config()
+    engine.open_device(engine.primary)
+    runner = threading.Thread(target=engine.run, daemon=True)
+    runner.start()
+    network = NetworkServer(engine, http_port=0, ddp_port=0)
+    network.start()
+    network.fake = fakes[0]
+    try:
+        yield network
+    finally:
+        network.stop()
+        engine.stop()
+        runner.join()
+        engine.close()
+
+
+def request(server, method, path, body=None):
+    conn = http.client.HTTPConnection(*server.http_address, timeout=5)
+    try:
+        conn.request(method, path, body=body if isinstance(body, (bytes, str)) else json.dumps(body))
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_state_and_settings(server):
+    status, state = request(server, 'GET', '/api/state')
+    assert status == 200 and state['devices'][0]['D1'] == 10
+    status, state = request(server, 'POST', '/api/settings', {'color_mode': 1, 'D1': 12})
+    assert status == 200
+    assert state['devices'][0]['color_mode'] == 1 and state['devices'][0]['D1'] == 12
+
+
+@pytest.mark.parametrize('body', [
+    {'name': 5},
+    {'check_run': 'no'},
+    {'target_fps': True},
+    {'device': True, 'name': 'x'},
+    {'color_mode': 1.0},
+    [1, 2],
+    'not json',
+])
+def test_invalid_settings_rejected(server, body):
+    status, result = request(server, 'POST', '/api/settings', body)
+    assert status == 400 and 'error' in result
+    status, state = request(server, 'GET', '/api/state')
+    assert state['check_run'] is True
+    assert state['devices'][0]['name'] == ''
+
+
+def test_errors(server):
+    assert request(server, 'GET', '/api/nothing')[0] == 404
+    assert request(server, 'GET', '/api/settings')[0] == 405
+
+
+def test_ddp_frame_reaches_controller(server):
+    rgb = np.random.default_rng(0).integers(0, 256, size=(LEDS, 3), dtype=np.uint8)
+    decoder = server.fake.decoder
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for packet in ddp_packets(rgb, max_data=60):
+            sock.sendto(packet, server.ddp_address)
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            if decoder.pixels is not None and len(decoder.pixels) == LEDS and (
+                    decoder.pixels[:, [1, 0, 2]] == rgb).all():
+                break
+            time.sleep(0.01)
+    # 控制器按 GRB 顺序接收
+    np.testing.assert_array_equal(decoder.pixels[:, [1, 0, 2]], rgb)
+
+
+def test_http_frame(server):
+    rgb = np.full((LEDS, 3), 7, dtype=np.uint8)
+    status, result = request(server, 'POST', '/api/frame', rgb.tobytes())
+    assert status == 200 and result['frames'] >= 1
@@ -0,0 +1,72 @@
+"""输出级：颜色顺序、校正查找表和电流限制"""
+import numpy as np
+import pytest
+
+from ledcore import render
+from ledcore.output_stage import OutputStage, build_luts
+
+
+def random_rgb(n=50, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=(n, 3), dtype=np.uint8)
+
+
+def test_default_matches_write_pixels():
+    rgb = random_rgb()
+    expected = render.new_packet(len(rgb))
+    render.write_pixels(expected, rgb)
+    stage = OutputStage()
+    stage.configure()
+    packet = stage.apply(render.new_packet(len(rgb)), rgb)
+    np.testing.assert_array_equal(packet, expected)
+
+
+@pytest.mark.parametrize('order', ['RGB', 'GRB', 'BGR', 'brg'])
+def test_color_order(order):
+    rgb = np.array([[1, 2, 3]], dtype=np.uint8)
+    stage = OutputStage()
+    stage.configure(order)
+    packet = stage.apply(render.new_packet(1), rgb)
+    values = {'R': 1, 'G': 2, 'B': 3}
+    assert render.packet_pixels(packet)[0].tolist() == [values[c] for c in order.upper()]
+
+
+def test_luts_per_channel():
+    rgb = random_rgb()
+    stage = OutputStage()
+    stage.configure('GRB', gamma=2.2, brightness=0.5, gain=(1.0, 0.8, 0.6))
+    packet = stage.apply(render.new_packet(len(rgb)), rgb)
+    luts = build_luts(2.2, 0.5, (1.0, 0.8, 0.6))
+    pixels = render.packet_pixels(packet)
+    for dst, src in enumerate(render.GRB_ORDER):
+        np.testing.assert_array_equal(pixels[:, dst], luts[src][rgb[:, src]])
+
+
+def test_invalid_parameters():
+    stage = OutputStage()
+    for kwargs in ({'gamma': 0}, {'brightness': -1}, {'gain': (1, 1)}, {'color_order': 'RGX'}):
+        with pytest.raises(ValueError):
+            stage.configure(**kwargs)
+
+
+def test_current_limit():
+    rgb = np.full((100, 3), 255, dtype=np.uint8)
+    stage = OutputStage()
+    stage.configure()
+    packet = stage.apply(render.new_packet(100), rgb, max_current=3.0, led_current=0.06)
+    assert stage.current == pytest.approx(6.0)
+    assert stage.scale == pytest.approx(0.5)
+    assert stage.limited == 1
+    assert (render.packet_pixels(packet) == 127).all()
+
+
+def test_current_reported_without_limit():
+    stage = OutputStage()
+    stage.configure()
+    stage.apply(render.new_packet(100), np.full((100, 3), 255, dtype=np.uint8), max_current=3.0)
+    # 不限流时 current 仍然反映当前帧，而不是上一个被限流的帧
+    stage.apply(render.new_packet(100), np.zeros((100, 3), dtype=np.uint8))
+    assert stage.current == 0.0
+    assert stage.scale == 1.0
+    stage.apply(render.new_packet(100), np.full((100, 3), 255, dtype=np.uint8))
+    assert stage.current == pytest.approx(6.0)
+    assert stage.limited == 1
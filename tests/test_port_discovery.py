@@ -0,0 +1,58 @@
+"""串口发现：列表不变时枚举间隔加倍，变化时恢复并报告增减"""
+from ledcore.port_discovery import PortDiscovery
+
+
+class Ports:
+    def __init__(self, *ports):
+        self.ports = list(ports)
+        self.scans = 0
+
+    def __call__(self):
+        self.scans += 1
+        return list(self.ports)
+
+
+def test_backoff_while_unchanged():
+    ports = Ports('COM1')
+    discovery = PortDiscovery(ports, min_interval=1.0, max_interval=8.0)
+    assert discovery.poll()
+    intervals = []
+    for _ in range(5):
+        assert not discovery.poll()
+        intervals.append(discovery.interval)
+    assert intervals == [2.0, 4.0, 8.0, 8.0, 8.0]
+
+
+def test_change_resets_interval_and_reports_diff():
+    ports = Ports('COM1', 'COM2')
+    discovery = PortDiscovery(ports, min_interval=0.5, max_interval=4.0)
+    discovery.poll()
+    discovery.poll()
+    assert discovery.interval == 1.0
+    ports.ports = ['COM3', 'COM2']
+    assert discovery.poll()
+    assert discovery.interval == 0.5
+    assert discovery.ports == ['COM2', 'COM3']
+    assert (discovery.added, discovery.removed) == ({'COM3'}, {'COM1'})
+    discovery.poll()
+    assert (discovery.added, discovery.removed) == (set(), set())
+
+
+def test_reset():
+    discovery = PortDiscovery(Ports(), min_interval=1.0)
+    discovery.poll()
+    discovery.poll()
+    assert discovery.interval == 2.0
+    discovery.reset()
+    assert discovery.interval == 1.0
+
+
+def test_is_present_uses_cache():
+    ports = Ports('COM1')
+    discovery = PortDiscovery(ports)
+    assert discovery.is_present('COM1')
+    ports.ports = []
+    assert discovery.is_present('COM1', max_age=60)
+    assert ports.scans == 1
+    assert not discovery.is_present('COM1', max_age=-1)
+    assert ports.scans == 2
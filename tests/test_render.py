@@ -0,0 +1,92 @@
+"""帧渲染：输出与原逐像素循环逐字节相同，数据包缓冲池的复用和布局变化"""
+import threading
+
+import numpy as np
+import pytest
+
+from benchmarks import bench_render
+from ledcore import render
+
+COLOR = [255, 0, 0]
+
+
+def test_pool_reuses_released_packets():
+    pool = render.PacketPool()
+    packet = pool.acquire(10)
+    assert len(packet) == 33 and list(packet[:3]) == [0x28, 0, 10]
+    pool.release(packet)
+    assert pool.acquire(10) is packet
+    assert pool.allocated == 2
+
+
+def test_pool_grows_when_empty():
+    pool = render.PacketPool(count=1)
+    packets = [pool.acquire(10) for _ in range(3)]
+    assert pool.allocated == 3
+    assert len({id(p) for p in packets}) == 3
+
+
+def test_pool_drops_old_layout_and_foreign_packets():
+    pool = render.PacketPool()
+    old = pool.acquire(10)
+    pool.acquire(20)
+    pool.release(old)
+    pool.release(np.zeros(63, dtype=np.uint8)[:])  # 外部数组的视图
+    for _ in range(4):
+        assert len(pool.acquire(20)) == 63
+
+
+def test_pool_layout_change_during_release():
+    """发送线程归还的同时渲染线程改变布局，池中只留下当前长度的数据包"""
+    pool = render.PacketPool()
+    stop = threading.Event()
+    in_flight = [pool.acquire(10) for _ in range(50)]
+
+    def release():
+        while not stop.is_set():
+            for packet in in_flight:
+                pool.release(packet)
+
+    thread = threading.Thread(target=release)
+    thread.start()
+    try:
+        for i in range(2000):
+            total_len = 10 if i % 2 else 20
+            assert len(pool.acquire(total_len)) == (total_len + 1) * 3
+    finally:
+        stop.set()
+        thread.join()
+
+
+@pytest.mark.parametrize('total_len', [1, 2, 3, 7, 61, 76, 196])
+@pytest.mark.parametrize('mode', [render.MODE_RAINBOW, render.MODE_SOLID, render.MODE_MULTI])
+def test_vector_frame_matches_legacy(total_len, mode):
+    """向量化渲染与原逐像素循环的数据包逐字节相同"""
+    for offset in range(total_len):
+        np.testing.assert_array_equal(
+            bench_render.vector_frame(total_len, offset, mode, COLOR),
+            bench_render.legacy_frame(total_len, offset, mode, COLOR))
+
+
+@pytest.mark.parametrize('mode', [render.MODE_RAINBOW, render.MODE_SOLID, render.MODE_MULTI])
+def test_palette_cache_matches_legacy(mode):
+    """调色板缓存旋转与原逐像素循环相同，参数变化时重建"""
+    cache = render.PaletteCache()
+    for total_len in (5, 76, 5):
+        for offset in range(total_len):
+            packet = render.new_packet(total_len)
+            rgb = render.new_frame(total_len)
+            cache.rotate_into(rgb, total_len, offset, mode, COLOR)
+            render.write_pixels(packet, rgb)
+            np.testing.assert_array_equal(
+                packet, bench_render.legacy_frame(total_len, offset, mode, COLOR))
+
+
+def test_shift_into_interpolates():
+    palette = np.array([[0, 0, 0], [100, 200, 50], [200, 0, 100]], dtype=np.uint8)
+    out = np.empty_like(palette)
+    scratch = render.new_scratch(palette)
+    render.shift_into(out, palette, 1, scratch)
+    assert out.tolist() == [[100, 200, 50], [200, 0, 100], [0, 0, 0]]
+    render.shift_into(out, palette, 0.5, scratch)
+    assert out.tolist() == [[50, 100, 25], [150, 100, 75], [100, 0, 50]]
@@ -0,0 +1,103 @@
+"""串口发送线程：新帧优先、丢弃旧帧、分块写入和错误回调"""
+import time
+
+import pytest
+
+from ledcore.fake_serial import FakeSerial, SerialTimeoutException
+from ledcore.metrics import FrameMetrics
+from ledcore.serial_writer import SerialWriter
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def released():
+    return []
+
+
+def make_writer(released, ser=None, **kwargs):
+    ser = ser or FakeSerial(throttle=False)
+    writer = SerialWriter(ser, on_release=released.append, **kwargs)
+    writer.open('COM1')
+    return writer
+
+
+def test_latest_frames_win(released):
+    writer = make_writer(released)
+    frames = [bytes([i]) * 4 for i in range(5)]
+    # 发送线程未启动，队列只保留最新的两帧
+    for frame in frames:
+        writer.submit(frame)
+    assert writer.dropped == 3
+    assert released == frames[:3]
+
+    writer.start()
+    try:
+        wait_until(lambda: writer.frames_written == 2)
+    finally:
+        writer.stop()
+    assert bytes(writer.ser.written) == frames[3] + frames[4]
+    assert released == frames
+
+
+def test_submit_never_blocks_on_slow_port(released):
+    ser = FakeSerial(throttle=False, stall_every=1, stall_time=0.2)
+    writer = make_writer(released, ser, write_timeout=1.0)
+    writer.start()
+    try:
+        start = time.monotonic()
+        for i in range(20):
+            writer.submit(bytes(8))
+        assert time.monotonic() - start < 0.1
+        wait_until(lambda: len(released) == 20)
+    finally:
+        writer.stop()
+    assert writer.dropped >= 17
+    assert writer.frames_written + writer.dropped == 20
+
+
+def test_frames_written_in_chunks(released):
+    writer = make_writer(released, chunk_size=100)
+    writer.start()
+    try:
+        writer.submit(bytes(range(250)))
+        wait_until(lambda: writer.frames_written == 1)
+    finally:
+        writer.stop()
+    assert writer.ser.writes == 3
+    assert bytes(writer.ser.written) == bytes(range(250))
+
+
+def test_closed_port_releases_frames(released):
+    writer = make_writer(released)
+    writer.close()
+    writer.start()
+    try:
+        writer.submit(b'abc')
+        wait_until(lambda: released == [b'abc'])
+    finally:
+        writer.stop()
+    assert writer.frames_written == 0
+
+
+def test_write_error_reported(released):
+    errors = []
+    metrics = FrameMetrics()
+    ser = FakeSerial(throttle=False, stall_every=1, stall_time=1.0)
+    writer = SerialWriter(ser, on_error=errors.append, on_release=released.append,
+                          write_timeout=0.01, metrics=metrics)
+    writer.open('COM1')
+    writer.start()
+    try:
+        writer.submit(b'abc')
+        wait_until(lambda: released == [b'abc'])
+    finally:
+        writer.stop()
+    assert len(errors) == 1 and isinstance(errors[0], SerialTimeoutException)
+    assert metrics.write_errors == 1 and writer.frames_written == 0
@@ -0,0 +1,121 @@
+"""放映文件：写入后读回的帧、帧率和布局与原始数据一致"""
+import numpy as np
+import pytest
+
+from ledcore import show
+from ledcore.devices import OutputDevice
+from ledcore.show import ShowFile, ShowPlayer, ShowWriter
+
+
+def make_devices():
+    return [OutputDevice({'name': '主', 'D1': 4, 'D2': 3, 'D3': 4, 'D4': 3}),
+            OutputDevice({'D1': 2, 'D2': 2, 'D3': 2, 'D4': 2, 'segments': [5]})]
+
+
+def write_show(path, devices, frames, fps=25.0):
+    rng = np.random.default_rng(0)
+    layout = [show.device_layout(device) for device in devices]
+    written = []
+    with ShowWriter(str(path), layout, fps) as writer:
+        for _ in range(frames):
+            packets = [rng.integers(0, 256, size=item['packet_len'], dtype=np.uint8)
+                       for item in layout]
+            writer.write(packets)
+            written.append(packets)
+    return layout, written
+
+
+def test_round_trip(tmp_path):
+    devices = make_devices()
+    path = tmp_path / 'a.show'
+    layout, written = write_show(path, devices, 10)
+
+    f = ShowFile(str(path))
+    try:
+        assert f.fps == 25.0
+        assert f.frame_count == 10
+        assert f.duration == pytest.approx(0.4)
+        assert f.layout == layout
+        assert layout[0]['name'] == '主'
+        assert layout[1]['segments'] == [{'name': '', 'leds': 5}]
+        for i, packets in enumerate(written):
+            for expected, actual in zip(packets, f.packets(i)):
+                np.testing.assert_array_equal(actual, expected)
+        f.check_layout(devices)
+    finally:
+        f.close()
+
+
+def test_frame_count_from_file_length(tmp_path):
+    """未正常关闭（文件头帧数为0）时按文件长度计算帧数"""
+    devices = make_devices()
+    path = tmp_path / 'a.show'
+    write_show(path, devices, 6)
+    data = bytearray(path.read_bytes())
+    magic, version, fps, _, layout_size = show.HEADER.unpack_from(data)
+    show.HEADER.pack_into(data, 0, magic, version, fps, 0, layout_size)
+    # 末尾写了一半的帧被忽略
+    path.write_bytes(bytes(data) + bytes(7))
+
+    f = ShowFile(str(path))
+    try:
+        assert f.frame_count == 6
+    finally:
+        f.close()
+
+
+def test_check_layout_mismatch(tmp_path):
+    path = tmp_path / 'a.show'
+    write_show(path, make_devices(), 2)
+    f = ShowFile(str(path))
+    try:
+        with pytest.raises(ValueError):
+            f.check_layout(make_devices()[:1])
+        with pytest.raises(ValueError):
+            f.check_layout([make_devices()[0], OutputDevice()])
+    finally:
+        f.close()
+
+
+def test_invalid_files(tmp_path):
+    empty = tmp_path / 'empty.show'
+    write_show(empty, make_devices(), 0)
+    other = tmp_path / 'other.show'
+    other.write_bytes(b'not a show file' * 4)
+    for path in (empty, other):
+        with pytest.raises(ValueError):
+            ShowFile(str(path))
+
+
+def test_writer_rejects_wrong_packets(tmp_path):
+    devices = make_devices()
+    layout = [show.device_layout(device) for device in devices]
+    with ShowWriter(str(tmp_path / 'a.show'), layout, 25.0) as writer:
+        with pytest.raises(ValueError):
+            writer.write([bytes(layout[0]['packet_len'])])
+        with pytest.raises(ValueError):
+            writer.write([bytes(layout[0]['packet_len']), bytes(3)])
+
+
+def test_player_follows_clock(tmp_path):
+    devices = make_devices()
+    paths = [tmp_path / 'a.show', tmp_path / 'b.show']
+    _, first = write_show(paths[0], devices, 5, fps=10.0)
+    _, second = write_show(paths[1], devices, 5, fps=10.0)
+    now = [0.0]
+    player = ShowPlayer([str(p) for p in paths], loop=False, clock=lambda: now[0])
+    try:
+        np.testing.assert_array_equal(player.frame()[0], first[0][0])
+        assert player.frame() is None
+        now[0] = 0.35
+        np.testing.assert_array_equal(player.frame()[1], first[3][1])
+        # 第一个文件在0.5秒结束，接着播放第二个
+        now[0] = 0.62
+        assert player.index == 0
+        np.testing.assert_array_equal(player.frame()[0], second[1][0])
+        assert player.index == 1
+        now[0] = 2.0
+        assert player.frame() is False
+        assert player.state()['finished']
+    finally:
+        player.close()
@@ -0,0 +1,27 @@
+"""启动：没有打开串口前不导入串口库"""
+import subprocess
+import sys
+import textwrap
+
+
+def run_isolated(code, tmp_path):
+    """在新进程中运行，sys.modules 不受其他测试影响"""
+    result = subprocess.run([sys.executable, '-c', textwrap.dedent(code), str(tmp_path)],
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+def test_serial_imported_on_first_open(tmp_path):
+    out = run_isolated('''
+        import os, sys
+        from ledcore.engine import Engine, default_serial_factory
+        engine = Engine(os.path.join(sys.argv[1], 'config.json'), default_serial_factory())
+        engine.load_config()
+        engine.tick()
+        print('serial' in sys.modules, engine.primary.writer.is_open)
+        engine.primary.writer.ser.port = None
+        print('serial' in sys.modules)
+        engine.close()
+    ''', tmp_path)
+    assert out == ['False', 'False', 'True']
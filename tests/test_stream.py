@@ -0,0 +1,78 @@
+"""外部帧流：DDP分包重组、新帧覆盖旧帧、超时后恢复本地灯效"""
+import numpy as np
+
+from ledcore import stream
+from ledcore.stream import FrameStream, ddp_packets
+
+
+def random_rgb(n, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=(n, 3), dtype=np.uint8)
+
+
+def test_ddp_frame_reassembled():
+    rgb = random_rgb(1000)
+    s = FrameStream()
+    s.resize(1000)
+    packets = ddp_packets(rgb)
+    assert len(packets) == 3
+    assert [s.feed_ddp(p) for p in packets] == [False, False, True]
+    np.testing.assert_array_equal(s.take(), rgb)
+    # 没有新帧时返回上一帧
+    np.testing.assert_array_equal(s.take(), rgb)
+
+
+def test_latest_frame_wins():
+    s = FrameStream()
+    s.resize(10)
+    frames = [random_rgb(10, seed) for seed in range(4)]
+    for rgb in frames:
+        s.feed_frame(rgb.tobytes())
+    assert (s.frames, s.dropped) == (4, 3)
+    np.testing.assert_array_equal(s.take(), frames[-1])
+
+
+def test_partial_update_keeps_other_pixels():
+    s = FrameStream()
+    s.resize(4)
+    base = random_rgb(4)
+    s.feed_frame(base.tobytes())
+    header = stream.DDP_HEADER.pack(stream.DDP_VERSION_1 | stream.DDP_FLAG_PUSH, 1, 1,
+                                    stream.DDP_ID_DISPLAY, 3, 3)
+    assert s.feed_ddp(header + bytes([9, 9, 9]))
+    expected = base.copy()
+    expected[1] = 9
+    np.testing.assert_array_equal(s.take(), expected)
+
+
+def test_invalid_and_ignored_packets():
+    s = FrameStream()
+    s.resize(4)
+    assert not s.feed_ddp(b'\x41')
+    bad_version = stream.DDP_HEADER.pack(0x80 | stream.DDP_FLAG_PUSH, 0, 1, 1, 0, 0)
+    assert not s.feed_ddp(bad_version)
+    assert s.invalid == 2
+    query = stream.DDP_HEADER.pack(stream.DDP_VERSION_1 | stream.DDP_FLAG_QUERY, 0, 1, 1, 0, 0)
+    assert not s.feed_ddp(query)
+    assert s.invalid == 2 and s.frames == 0
+    # 超出像素空间的数据被截断
+    s.feed_frame(bytes(range(20)))
+    assert s.take().reshape(-1).tolist() == list(range(12))
+
+
+def test_inactive_after_timeout():
+    s = FrameStream(timeout=0.0)
+    s.resize(4)
+    assert s.take() is None
+    s.feed_frame(bytes(12))
+    assert s.take() is None
+
+
+def test_memory_independent_of_push_rate():
+    s = FrameStream()
+    s.resize(300)
+    rgb = random_rgb(300)
+    for i in range(500):
+        for packet in ddp_packets(rgb, sequence=i):
+            s.feed_ddp(packet)
+    assert s.frames == 500 and s.dropped == 499
+    np.testing.assert_array_equal(s.take(), rgb)
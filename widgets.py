@@ -0,0 +1,35 @@
+"""界面控件：启动时不导入，第一帧发出后由 create_main_layout 导入"""
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.metrics import dp
+
+
+class ColorButton(Button):
+    """自定义颜色按钮类"""
+    pass
+
+
+class LogLine(Label):
+    """日志视图中的一行"""
+
+    def __init__(self, **kwargs):
+        super().__init__(markup=True, halign='left', valign='middle', **kwargs)
+        self.bind(size=self.setter('text_size'))
+
+
+class LogView(RecycleView):
+    """日志视图，只创建并复用可见行的控件"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = LogLine
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(22)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)